@@ -0,0 +1,139 @@
+"""Run the benchmark suite, write the results as JSON and compare them with a stored baseline.
+
+    python -m benchmarks                      # everything, compared with benchmarks/baseline.json
+    python -m benchmarks chat_list chat_turn  # a subset
+    python -m benchmarks --save-baseline      # make this run the new baseline
+    python -m benchmarks --check              # exit with 1 if a metric regressed beyond --tolerance
+
+Metrics are compared by the unit in their name: `_per_s` is better when higher; `_ms`, `_s`, `_kb`,
+`_failures` and `_connections` are better when lower; anything else (counts, sizes) is only reported.
+"""
+import argparse
+import importlib
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = BENCHMARKS_DIR / "baseline.json"
+RESULTS_PATH = BENCHMARKS_DIR / "results" / "latest.json"
+
+SUITE = {
+    "startup": "benchmarks.bench_startup",
+    "config": "benchmarks.bench_config",
+    "chat_list": "benchmarks.bench_chat_list",
+    "chat_turn": "benchmarks.bench_chat_turn",
+    "connection_reuse": "benchmarks.bench_connection_reuse",
+    "resilience": "benchmarks.bench_resilience",
+    "stream_parser": "benchmarks.bench_stream_parser",
+    "response_decoding": "benchmarks.bench_response_decoding",
+    "conversation_buffer": "benchmarks.bench_conversation_buffer",
+    "project_scan": "benchmarks.bench_project_scan",
+    "repo_delta": "benchmarks.bench_repo_delta",
+    "attachments": "benchmarks.bench_attachments",
+}
+
+HIGHER_IS_BETTER = ("_per_s",)
+LOWER_IS_BETTER = ("_ms", "_s", "_kb", "_failures", "_connections")
+DEFAULT_TOLERANCE = 0.2
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """{"chat_list": {"10_chats": {"cold_ms": 1}}} -> {"chat_list.10_chats.cold_ms": 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def direction(metric: str) -> int:
+    """1 if higher is better, -1 if lower is better, 0 if the metric is informational."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[tuple[str, float, float, float, bool]]:
+    """(metric, baseline, current, relative change, regressed) for every metric both runs measured."""
+    baseline, current = flatten(baseline), flatten(current)
+    rows = []
+
+    for metric, value in current.items():
+        if metric not in baseline or not direction(metric):
+            continue
+        before = baseline[metric]
+        change = (value - before) / before if before else 0.0
+        rows.append((metric, before, value, change, change * direction(metric) < -tolerance))
+
+    return rows
+
+
+def run_suite(names: list[str]) -> dict:
+    results = {}
+    for name in names:
+        print(f"running {name}...", file=sys.stderr, flush=True)
+        start = time.perf_counter()
+        results[name] = importlib.import_module(SUITE[name]).run()
+        print(f"    done in {time.perf_counter() - start:.1f} s", file=sys.stderr, flush=True)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*", metavar="BENCHMARK",
+                        help=f"benchmarks to run (default: all of {', '.join(SUITE)})")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH, help="where to write the results")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative change that counts as a regression (default: %(default)s)")
+    parser.add_argument("--check", action="store_true", help="exit with 1 if any metric regressed")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.benchmarks if name not in SUITE]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    report = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": run_suite(args.benchmarks or list(SUITE)),
+    }
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {args.output}")
+
+    regressions = 0
+    if args.baseline.exists():
+        rows = compare(json.loads(args.baseline.read_text())["results"], report["results"], args.tolerance)
+        width = max((len(row[0]) for row in rows), default=0)
+        for metric, before, value, change, regressed in rows:
+            regressions += regressed
+            print(f"{metric:<{width}}  {before:>12,.2f} -> {value:>12,.2f}  {change:>+8.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+        print(f"{regressions} of {len(rows)} metrics regressed by more than {args.tolerance:.0%}")
+    else:
+        print(f"no baseline at {args.baseline}, run with --save-baseline to create one")
+
+    if args.save_baseline:
+        # a partial run only replaces the baseline of the benchmarks it ran
+        if args.baseline.exists():
+            report["results"] = {**json.loads(args.baseline.read_text())["results"], **report["results"]}
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")
+
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
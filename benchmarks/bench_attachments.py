@@ -0,0 +1,66 @@
+"""Bytes on the wire and time for chat turns that attach the same files again, against the stand-in.
+
+    python -m benchmarks.bench_attachments
+"""
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+
+FILES = 20
+FILE_LINES = 4000
+TURNS = 5
+
+
+def write_files(directory: Path, files: int) -> list[Path]:
+    paths = []
+    for index in range(files):
+        path = directory / f"module_{index}.py"
+        path.write_text("".join(f"def handler_{index}_{line}(request):\n    return {line}\n\n"
+                                for line in range(FILE_LINES)))
+        paths.append(path)
+    return paths
+
+
+async def chat_turns(stand_in: NeptunStandIn, paths: list[Path], turns: int) -> list[tuple[float, int]]:
+    from neptun.bot.chat import Conversation
+
+    conversation = Conversation()
+    results = []
+    for turn in range(turns):
+        received = stand_in.bytes_received
+        start = time.perf_counter()
+        await conversation.send(f"question {turn}", files=paths)
+        results.append((time.perf_counter() - start, stand_in.bytes_received - received))
+
+    await conversation.chat_service.transport.aclose()
+    return results
+
+
+def run(files: int = FILES, turns: int = TURNS) -> dict:
+    with tempfile.TemporaryDirectory() as directory, NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, directory)
+        paths = write_files(Path(directory), files)
+        raw = sum(path.stat().st_size for path in paths)
+
+        results = asyncio.run(chat_turns(stand_in, paths, turns))
+
+    (first_time, first_bytes), repeated = results[0], results[1:]
+    return {
+        "attached_kb": round(raw / 1024, 1),
+        "first_turn_ms": round(first_time * 1000, 1),
+        "first_turn_sent_kb": round(first_bytes / 1024, 1),
+        "repeated_turn_ms": round(sum(elapsed for elapsed, _ in repeated) / len(repeated) * 1000, 1),
+        "repeated_turn_sent_kb": round(sum(sent for _, sent in repeated) / len(repeated) / 1024, 1),
+    }
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Loading the chat list from the stand-in with 10, 1k and 10k chats: cold, revalidated and the first page only.
+
+    python -m benchmarks.bench_chat_list
+"""
+import tempfile
+import time
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+
+CHAT_COUNTS = (10, 1_000, 10_000)
+RUNS = 5
+
+
+def best_of(function) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 2)
+
+
+def run(chat_counts=CHAT_COUNTS) -> dict:
+    results = {}
+
+    for chat_count in chat_counts:
+        with NeptunStandIn() as stand_in, tempfile.TemporaryDirectory() as directory:
+            configure_config_manager(stand_in.url, directory)
+            for index in range(chat_count):
+                stand_in.add_chat(f"chat {index}")
+
+            from neptun.utils.services import ChatService
+            chat_service = ChatService()
+
+            start = time.perf_counter()
+            assert len(chat_service.get_available_ai_chats().chats) == chat_count
+            cold_ms = round((time.perf_counter() - start) * 1000, 2)
+
+            results[f"{chat_count}_chats"] = {
+                "cold_ms": cold_ms,
+                "revalidated_ms": best_of(chat_service.get_available_ai_chats),
+                "first_page_ms": best_of(lambda: next(chat_service.iter_chat_pages())),
+            }
+
+    return results
+
+
+def main():
+    for name, result in run().items():
+        print(f"{name:>12}: cold {result['cold_ms']:>8} ms | revalidated {result['revalidated_ms']:>8} ms | "
+              f"first page {result['first_page_ms']:>8} ms")
+
+
+if __name__ == "__main__":
+    main()
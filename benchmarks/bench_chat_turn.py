@@ -0,0 +1,61 @@
+"""Time to first token and full-turn latency of chat turns against a paced stand-in stream.
+
+    python -m benchmarks.bench_chat_turn
+"""
+import asyncio
+import statistics
+import tempfile
+import time
+
+from benchmarks.stand_in import NeptunStandIn, StreamProfile, configure_config_manager
+
+TURNS = 20
+PROFILE = StreamProfile(latency=0.05, token_rate=500, jitter=0.002)
+PROMPT = "Write me a docker-compose file with a mysql service that keeps its data in ./mysql_data"
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def measure_turns(conversation, turns: int) -> tuple[list[float], list[float]]:
+    first_tokens, totals = [], []
+
+    for _ in range(turns):
+        start = time.perf_counter()
+        first_token = None
+        async for _ in conversation.send(PROMPT):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+        totals.append(time.perf_counter() - start)
+        first_tokens.append(first_token)
+
+    return first_tokens, totals
+
+
+def run(turns: int = TURNS, profile: StreamProfile = PROFILE) -> dict:
+    with NeptunStandIn() as stand_in, tempfile.TemporaryDirectory() as directory:
+        configure_config_manager(stand_in.url, directory)
+        stand_in.stream = profile
+        stand_in.reply = lambda model, messages: f"{model} says: " + "Here is the service definition. " * 10
+
+        from neptun.bot.chat import Conversation
+        first_tokens, totals = asyncio.run(measure_turns(Conversation(), turns))
+
+    return {
+        "turns": turns,
+        "ttft_p50_ms": round(statistics.median(first_tokens) * 1000, 2),
+        "ttft_p95_ms": round(percentile(first_tokens, 0.95) * 1000, 2),
+        "turn_p50_ms": round(statistics.median(totals) * 1000, 2),
+        "turn_p95_ms": round(percentile(totals, 0.95) * 1000, 2),
+    }
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:>12}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Config reads per second (re-parsing on every read versus the stat-validated snapshot) and writes per second.
+
+    python -m benchmarks.bench_config
+"""
+import configparser
+import tempfile
+import time
+from pathlib import Path
+
+from neptun.utils.managers import ConfigManager
+
+CONFIG = """[utils]
+neptun_api_server_host = https://neptun-webui.vercel.app/api
+neptun_github_app_url = https://github.com/apps/neptun-github-app/installations/new
+
+[auth]
+neptun_session_cookie = Fe26.2**cookie
+
+[auth.user]
+id = 5
+email = test@example.com
+
+[active_chat]
+chat_id = 12
+chat_name = test
+model = OpenAssistant/oasst-sft-4-pythia-12b-epoch-3.5
+"""
+
+DURATION = 0.5
+
+
+def operations_per_second(operation) -> int:
+    operations = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            operation()
+        operations += 100
+    return int(operations / DURATION)
+
+
+def run() -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        config_file_path = Path(directory) / "config.ini"
+        config_file_path.write_text(CONFIG)
+        config_manager = ConfigManager.__wrapped__(config_file_path)
+
+        def reparse_read():
+            config = configparser.ConfigParser()
+            config.read(config_file_path)
+            return config["active_chat"]["model"]
+
+        return {
+            "reparse_reads_per_s": operations_per_second(reparse_read),
+            "read_config_reads_per_s": operations_per_second(lambda: config_manager.read_config("active_chat", "model")),
+            "snapshot_reads_per_s": operations_per_second(lambda: config_manager.snapshot().model),
+            # every write takes the file lock and fsyncs a temp file before swapping it in
+            "update_config_writes_per_s": operations_per_second(
+                lambda: config_manager.update_config("active_chat", "chat_name", "test")),
+        }
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:>26}: {value:>10,}")
+
+
+if __name__ == "__main__":
+    main()
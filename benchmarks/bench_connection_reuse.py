@@ -0,0 +1,51 @@
+"""Repeated auth checks against the local stand-in: a client per call versus the shared pool.
+
+    python -m benchmarks.bench_connection_reuse
+"""
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+
+CALLS = 200
+
+
+def run() -> dict:
+    with NeptunStandIn() as stand_in, tempfile.TemporaryDirectory() as directory:
+        configure_config_manager(stand_in.url, directory)
+
+        from neptun.utils.services import AuthenticationService
+        authentication_service = AuthenticationService()
+
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            # what every call paid before: a fresh client (and connection) that is closed afterwards
+            with httpx.Client(cookies={"neptun-session": "stand-in-session"}) as client:
+                client.head(f"{stand_in.url}/auth/check")
+        per_call_client_seconds = time.perf_counter() - start
+        per_call_client_connections = stand_in.connections
+
+        stand_in.connections = 0
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            authentication_service.check_authenticated("stand-in-session")
+        shared_pool_seconds = time.perf_counter() - start
+
+        return {
+            "calls": CALLS,
+            "client_per_call_ms": round(per_call_client_seconds / CALLS * 1000, 3),
+            "client_per_call_connections": per_call_client_connections,
+            "shared_pool_ms": round(shared_pool_seconds / CALLS * 1000, 3),
+            "shared_pool_connections": stand_in.connections,
+        }
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:>28}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""CPU time and memory of building chat request bodies over a long conversation.
+
+    python -m benchmarks.bench_conversation_buffer
+"""
+import json
+import time
+import tracemalloc
+
+from neptun.bot.buffer import ConversationBuffer
+from neptun.model.http_requests import ChatRequest, Message
+
+QUESTION = "How do I expose port {turn} of the db service in my docker-compose file?"
+ANSWER = ("Add a ports entry to the service:\n```yaml\nservices:\n  db:\n    image: mysql:latest\n    ports:\n"
+          "      - \"{turn}:{turn}\"\n```\nThen restart it with `docker compose up -d db`.")
+
+
+def legacy_turns(turns: int) -> list[Message]:
+    """The path this benchmark replaced: a pydantic list, re-validated and re-serialized every turn."""
+    messages = []
+    for turn in range(turns):
+        messages.append(Message(role="user", content=QUESTION.format(turn=turn)))
+        body = json.dumps(ChatRequest(messages=messages).model_dump()).encode()
+        messages.append(Message(role="assistant", content=ANSWER.format(turn=turn)))
+    assert body
+    return messages
+
+
+def buffered_turns(turns: int) -> ConversationBuffer:
+    messages = ConversationBuffer()
+    for turn in range(turns):
+        messages.add("user", QUESTION.format(turn=turn))
+        body = ConversationBuffer.request_body(messages)
+        messages.add("assistant", ANSWER.format(turn=turn))
+    assert body
+    return messages
+
+
+def measure(function, turns: int) -> tuple[float, int, int]:
+    """Seconds for the whole conversation, memory retained by it and peak memory while building it."""
+    start = time.process_time()
+    function(turns)
+    elapsed = time.process_time() - start
+
+    tracemalloc.start()
+    conversation = function(turns)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del conversation
+    return elapsed, retained, peak
+
+
+def run(turns: int = 2000) -> dict:
+    assert json.loads(ConversationBuffer.request_body(buffered_turns(3))) == \
+           ChatRequest(messages=legacy_turns(3)).model_dump()
+
+    results = {}
+    for name, function in (("legacy", legacy_turns), ("buffer", buffered_turns)):
+        seconds, retained, peak = measure(function, turns)
+        results[name] = {
+            "turns": turns,
+            "cpu_s": round(seconds, 3),
+            "per_turn_ms": round(seconds / turns * 1000, 3),
+            "retained_kb": retained // 1024,
+            "peak_kb": peak // 1024,
+        }
+    return results
+
+
+def main():
+    for name, result in run().items():
+        print(f"{name:>7}: {result['turns']} turns in {result['cpu_s']:>7} s CPU ({result['per_turn_ms']} ms/turn) | "
+              f"retained {result['retained_kb']} KiB | peak {result['peak_kb']} KiB")
+
+
+if __name__ == "__main__":
+    main()
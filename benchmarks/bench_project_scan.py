@@ -0,0 +1,63 @@
+"""Full scan versus incremental rescan of a synthetic monorepo.
+
+    python -m benchmarks.bench_project_scan
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from neptun.utils.scanner import ManifestStore, ProjectScanner
+
+FILES = 100_000
+FILES_PER_DIRECTORY = 100
+CHANGED = 100
+
+
+def build_tree(root: Path, files: int) -> list[Path]:
+    paths = []
+    for index in range(files):
+        directory = root / "packages" / f"package-{index // (FILES_PER_DIRECTORY * 10)}" / \
+            f"module-{index // FILES_PER_DIRECTORY}"
+        if index % FILES_PER_DIRECTORY == 0:
+            directory.mkdir(parents=True)
+        path = directory / f"file-{index}.ts"
+        path.write_text(f"export const value{index} = {index};\n" * 20)
+        paths.append(path)
+
+    (root / ".gitignore").write_text("node_modules/\ndist/\n*.log\n")
+    (root / "package.json").write_text('{"workspaces": ["packages/*"], "devDependencies": {"vite": "5"}}')
+    return paths
+
+
+def run(files: int = FILES, changed: int = CHANGED) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "monorepo"
+        paths = build_tree(root, files)
+        scanner = ProjectScanner(root, store=ManifestStore(Path(directory) / "manifests"))
+
+        _, full = scanner.scan(full=True)
+        _, unchanged = scanner.scan()
+
+        for path in paths[::len(paths) // changed][:changed]:
+            path.write_text("export const changed = true;\n")
+            # make sure the new mtime differs even on coarse-grained file systems
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        _, incremental = scanner.scan()
+
+    return {
+        "files": full.files,
+        "full_scan_ms": round(full.elapsed * 1000, 1),
+        "unchanged_rescan_ms": round(unchanged.elapsed * 1000, 1),
+        "incremental_rescan_ms": round(incremental.elapsed * 1000, 1),
+        "incremental_hashed": incremental.hashed,
+    }
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
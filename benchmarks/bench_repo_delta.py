@@ -0,0 +1,71 @@
+"""Repository context refresh: index-based delta versus hashing every tracked file.
+
+    python -m benchmarks.bench_repo_delta
+"""
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from neptun.utils.gitindex import Repository, SnapshotStore, blob_id
+
+FILES = 20_000
+FILES_PER_DIRECTORY = 100
+CHANGED = 20
+
+
+def build_repository(root: Path, files: int) -> list[Path]:
+    paths = []
+    for index in range(files):
+        directory = root / "src" / f"module-{index // FILES_PER_DIRECTORY}"
+        if index % FILES_PER_DIRECTORY == 0:
+            directory.mkdir(parents=True)
+        path = directory / f"file-{index}.py"
+        path.write_text(f"VALUE_{index} = {index}\n" * 50)
+        paths.append(path)
+
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    subprocess.run(["git", "-C", str(root), "add", "."], check=True)
+    # a later index write leaves no entry racily clean
+    time.sleep(0.01)
+    subprocess.run(["git", "-C", str(root), "update-index", "--really-refresh"], check=True, capture_output=True)
+    return paths
+
+
+def run(files: int = FILES, changed: int = CHANGED) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "repo"
+        paths = build_repository(root, files)
+        repository = Repository(root, store=SnapshotStore(Path(directory) / "repositories"))
+
+        start = time.perf_counter()
+        for path in map(str, paths):
+            blob_id(path, os.stat(path).st_size)
+        rehash_all = time.perf_counter() - start
+
+        repository.mark_sent(repository.delta())
+        unchanged = repository.delta()
+
+        for path in paths[::len(paths) // changed][:changed]:
+            path.write_text("VALUE = 'changed'\n")
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        delta = repository.delta()
+
+    return {
+        "files": unchanged.tracked,
+        "rehash_all_ms": round(rehash_all * 1000, 1),
+        "unchanged_delta_ms": round(unchanged.elapsed * 1000, 1),
+        "changed_delta_ms": round(delta.elapsed * 1000, 1),
+        "changed_delta_hashed": delta.hashed,
+        "changed_delta_files": len(delta.modified),
+    }
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
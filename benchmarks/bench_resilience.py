@@ -0,0 +1,83 @@
+"""Message fetches against a fault-injecting stand-in: plain requests versus the resilience layer.
+
+    python -m benchmarks.bench_resilience
+"""
+import asyncio
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.stand_in import Faults, NeptunStandIn, configure_config_manager
+
+CALLS = 200
+FAULTS = Faults(error_rate=0.05, slow_rate=0.05, slow_delay=0.5, reset_rate=0.02)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def summarize(prefix: str, latencies: list[float], failures: int) -> dict:
+    return {
+        f"{prefix}_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        f"{prefix}_p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        f"{prefix}_p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        f"{prefix}_failures": failures,
+    }
+
+
+async def measure(fetch) -> tuple[list[float], int]:
+    latencies, failures = [], 0
+
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        try:
+            response = await fetch()
+            failures += response.status_code != 200
+        except httpx.HTTPError:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+
+    return latencies, failures
+
+
+def run() -> dict:
+    with NeptunStandIn() as stand_in, tempfile.TemporaryDirectory() as directory:
+        configure_config_manager(stand_in.url, directory)
+        stand_in.faults = FAULTS
+        for index in range(20):
+            stand_in.add_message(1, f"message {index}")
+
+        from neptun.utils.resilience import ResilienceLayer
+        from neptun.utils.transport import HttpTransport
+
+        transport = HttpTransport()
+        transport.resilience = ResilienceLayer(backoff_base=0.01, backoff_max=0.1, breaker_threshold=CALLS,
+                                               hedge_delay=0.05)
+        url = f"{stand_in.url}/users/1/chats/1/messages"
+
+        async def compare():
+            plain = await measure(lambda: transport.async_client.get(url))
+            resilient = await measure(lambda: transport.arequest("GET", url, hedge=True))
+            await transport.aclose()
+            return plain, resilient
+
+        plain, resilient = asyncio.run(compare())
+
+        return {
+            "calls": CALLS,
+            **summarize("plain", *plain),
+            **summarize("resilient", *resilient),
+        }
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:>28}: {value}")
+
+
+if __name__ == "__main__":
+    main()
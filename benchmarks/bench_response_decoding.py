@@ -0,0 +1,84 @@
+"""Time and peak memory of decoding large chat message listings into response models.
+
+    python -m benchmarks.bench_response_decoding
+"""
+import json
+import time
+import tracemalloc
+
+import httpx
+from pydantic import ValidationError
+
+from neptun.model.http_responses import ChatMessagesHttpResponse, ErrorResponse
+from neptun.utils.decoding import ResponseDecoder
+
+REPEATS = 5
+
+
+def build_payload(message_count: int) -> bytes:
+    messages = [{
+        "id": index,
+        "message": f"Message {index}: how do I mount ./mysql_data into the db service of my docker-compose file?",
+        "actor": "user" if index % 2 else "assistant",
+        "created_at": "2024-05-01T12:00:00.000Z",
+        "updated_at": "2024-05-01T12:00:00.000Z",
+        "neptun_user_id": 1,
+        "chat_conversation_id": 1,
+    } for index in range(message_count)]
+    return json.dumps({"chatMessages": messages}).encode()
+
+
+def legacy_decode(response: httpx.Response):
+    """The dict-then-validate path this benchmark replaced, including its error-model fallback."""
+    response_data = response.json()
+    try:
+        return ChatMessagesHttpResponse.model_validate(response_data)
+    except ValidationError:
+        return ErrorResponse.model_validate(response_data)
+
+
+def measure(function, response: httpx.Response) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        function(response)
+    elapsed = (time.perf_counter() - start) / REPEATS
+
+    tracemalloc.start()
+    function(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(message_counts=(1_000, 10_000)) -> dict:
+    decoder = ResponseDecoder(ChatMessagesHttpResponse, ErrorResponse)
+    results = {}
+
+    for message_count in message_counts:
+        payload = build_payload(message_count)
+        response = httpx.Response(200, content=payload, headers={"Content-Type": "application/json"})
+        assert decoder.decode(response) == legacy_decode(response)
+
+        legacy_seconds, legacy_peak = measure(legacy_decode, response)
+        decoder_seconds, decoder_peak = measure(decoder.decode, response)
+
+        results[f"{message_count}_messages"] = {
+            "payload_kb": len(payload) // 1024,
+            "legacy_ms": round(legacy_seconds * 1000, 2),
+            "legacy_peak_kb": legacy_peak // 1024,
+            "decoder_ms": round(decoder_seconds * 1000, 2),
+            "decoder_peak_kb": decoder_peak // 1024,
+        }
+
+    return results
+
+
+def main():
+    for name, result in run().items():
+        print(f"{name:>16} ({result['payload_kb']} KiB): "
+              f"legacy {result['legacy_ms']:>8} ms (peak {result['legacy_peak_kb']} KiB) | "
+              f"decoder {result['decoder_ms']:>8} ms (peak {result['decoder_peak_kb']} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Wall-clock startup per CLI command plus the slowest imports reported by `python -X importtime`.
+
+    python -m benchmarks.bench_startup
+"""
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = [
+    ["--version"],
+    ["config", "--help"],
+    ["auth", "--help"],
+    ["assistant", "--help"],
+    ["--help"],
+]
+
+RUNS = 5
+TOP_IMPORTS = 8
+
+
+def run_cli(args, *options) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, "-m", "neptun", *args], capture_output=True, text=True,
+                          cwd=ROOT, env={**os.environ, "PYTHONPATH": str(ROOT)})
+
+
+def wall_clock_ms(args) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        run_cli(args)
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 1)
+
+
+def slowest_imports(args) -> list[tuple[str, int]]:
+    """(module, cumulative microseconds) of the slowest top-level imports."""
+    imports = []
+    for line in run_cli(args, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        if not module.startswith("  "):
+            imports.append((module.strip(), int(cumulative)))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+
+
+def run() -> dict:
+    return {f"{' '.join(args)}_ms": wall_clock_ms(args) for args in COMMANDS}
+
+
+def main():
+    for args in COMMANDS:
+        print(f"neptun {' '.join(args):<20} {wall_clock_ms(args):>8} ms")
+        for module, cumulative in slowest_imports(args):
+            print(f"    {cumulative / 1000:>8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
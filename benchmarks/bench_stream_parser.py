@@ -0,0 +1,80 @@
+"""Throughput and peak memory of the data-stream parser over multi-megabyte chat streams.
+
+    python -m benchmarks.bench_stream_parser
+"""
+import json
+import time
+import tracemalloc
+
+from neptun.utils.parsers import DataStreamParser
+
+SAMPLE_TOKENS = ["Here", "'s", " a", " docker", "-", "com", "pose", ":", "\n", "```", "\n", "version", ":", " '",
+                 "3", "'", "\n", "services", ":", "\n", "  ", "db", ":", "\n", "    ", "image", ":", " mysql", ":",
+                 "latest", "\n", "      ", "-", "./", "mysql", "_", "data", ":/", "var", "/", "lib", "/", "mysql",
+                 "\n\n", "    ", "build", ":.", "\n", " \"", "5000", ":", "5000", "\""]
+
+CHUNK_SIZE = 4096
+
+
+def build_stream(size_in_bytes: int) -> bytes:
+    frames = ''.join(f"0:{json.dumps(token)}\n" for token in SAMPLE_TOKENS).encode()
+    return frames * (size_in_bytes // len(frames) + 1)
+
+
+def legacy_parse(response: str) -> str:
+    """The split-based parser this benchmark replaced (whole body in memory, breaks on colons)."""
+    return ''.join(line.split(':')[1].strip().strip('"') for line in response.splitlines())
+
+
+def incremental_parse(stream: bytes) -> int:
+    parser = DataStreamParser()
+    characters = 0
+
+    for offset in range(0, len(stream), CHUNK_SIZE):
+        for event in parser.feed(stream[offset:offset + CHUNK_SIZE]):
+            characters += len(event.text)
+    for event in parser.close():
+        characters += len(event.text)
+
+    return characters
+
+
+def measure(function, argument) -> tuple[float, int]:
+    start = time.perf_counter()
+    function(argument)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(sizes=(1, 4, 16)) -> dict:
+    results = {}
+
+    for megabytes in sizes:
+        stream = build_stream(megabytes * 1024 * 1024)
+
+        legacy_seconds, legacy_peak = measure(legacy_parse, stream.decode())
+        incremental_seconds, incremental_peak = measure(incremental_parse, stream)
+
+        results[f"{megabytes}mb"] = {
+            "legacy_mb_per_s": round(len(stream) / legacy_seconds / 1e6, 2),
+            "legacy_peak_kb": legacy_peak // 1024,
+            "incremental_mb_per_s": round(len(stream) / incremental_seconds / 1e6, 2),
+            "incremental_peak_kb": incremental_peak // 1024,
+        }
+
+    return results
+
+
+def main():
+    for size, result in run().items():
+        print(f"{size:>5}: legacy {result['legacy_mb_per_s']:>7} MB/s (peak {result['legacy_peak_kb']} KiB) | "
+              f"incremental {result['incremental_mb_per_s']:>7} MB/s (peak {result['incremental_peak_kb']} KiB)")
+
+
+if __name__ == "__main__":
+    main()
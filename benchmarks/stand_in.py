@@ -0,0 +1,437 @@
+"""In-process stand-in for the Neptun API, used by tests and benchmarks.
+
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, directory)
+        ...
+"""
+import gzip
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, parse_qsl, urlsplit
+
+from neptun.utils.managers import ConfigManager
+
+CONFIG_TEMPLATE = """[utils]
+neptun_api_server_host = {url}
+
+[auth]
+neptun_session_cookie = stand-in-session
+
+[auth.user]
+id = 1
+email = stand-in@example.com
+
+[active_chat]
+chat_id = 1
+chat_name = stand-in
+model = mistralai/Mistral-7B-Instruct-v0.1
+"""
+
+
+class Faults(NamedTuple):
+    """Share of requests that fail in each way, drawn independently per request."""
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_delay: float = 1.0
+    reset_rate: float = 0.0
+
+
+class StreamProfile(NamedTuple):
+    """Pacing of the chat stream: a delay before the response, then `token_rate` tokens per second
+    (as fast as possible if None) plus up to `jitter` seconds per token. `error_rate` is the share of
+    streams that break off halfway with an error frame."""
+    latency: float = 0.0
+    token_rate: float | None = None
+    jitter: float = 0.0
+    error_rate: float = 0.0
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # buffered writes and no Nagle, so headers and body leave in one segment without delayed-ack stalls
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    routes = [
+        ("HEAD", re.compile(r"^/auth/check$"), "auth_check"),
+        ("POST", re.compile(r"^/auth/login$"), "login"),
+        ("POST", re.compile(r"^/auth/sign-up$"), "sign_up"),
+        ("GET", re.compile(r"^/users/(?P<user_id>\d+)/chats$"), "chats"),
+        ("POST", re.compile(r"^/users/(?P<user_id>\d+)/chats$"), "create_chat"),
+        ("DELETE", re.compile(r"^/users/(?P<user_id>\d+)/chats/(?P<chat_id>\d+)$"), "delete_chat"),
+        ("GET", re.compile(r"^/users/(?P<user_id>\d+)/chats/(?P<chat_id>\d+)/messages$"), "chat_messages"),
+        ("HEAD", re.compile(r"^/users/(?P<user_id>\d+)/chats/(?P<chat_id>\d+)/attachments/(?P<digest>[0-9a-f]{64})$"),
+         "attachment_exists"),
+        ("PUT", re.compile(r"^/users/(?P<user_id>\d+)/chats/(?P<chat_id>\d+)/attachments/(?P<digest>[0-9a-f]{64})$"),
+         "upload_attachment"),
+        ("POST", re.compile(r"^/ai/huggingface/(?P<publisher>[^/]+)/(?P<model>[^/]+)/chat$"), "chat_stream"),
+    ]
+
+    @property
+    def stand_in(self) -> "NeptunStandIn":
+        return self.server.stand_in
+
+    @property
+    def query(self) -> dict:
+        return {key: values[-1] for key, values in parse_qs(urlsplit(self.path).query).items()}
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.stand_in.record_connection()
+
+    def _dispatch(self, method: str):
+        path = self.path.split("?", 1)[0]
+
+        for route_method, pattern, handler_name in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                if self._inject_fault():
+                    return
+                return getattr(self, handler_name)(**match.groupdict())
+
+        self.send_empty(404)
+
+    def _inject_fault(self) -> bool:
+        """Apply the stand-in's faults to this request, returns True if it was answered (or dropped)."""
+        fault = self.stand_in.draw_fault()
+
+        if fault == "slow":
+            time.sleep(self.stand_in.faults.slow_delay)
+        elif fault in ("error", "reset"):
+            self.read_body()
+            if fault == "reset":
+                self.close_connection = True
+            else:
+                self.send_json(503, {"statusCode": 503, "statusMessage": "Service Unavailable"})
+            return True
+        return False
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def send_empty(self, status: int):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_cacheable_json(self, payload):
+        """Answer with an ETag, or with an empty 304 if the client already holds this version."""
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+        if etag in self.headers.get("If-None-Match", ""):
+            self.stand_in.record_not_modified()
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_raw_body(self) -> bytes:
+        """The body as sent, with chunked transfer encoding undone."""
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";", 1)[0], 16)
+            if not size:
+                # trailer section, ends with an empty line
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def read_body(self) -> bytes:
+        body = self.read_raw_body()
+        self.stand_in.record_received(len(body))
+        return gzip.decompress(body) if self.headers.get("Content-Encoding") == "gzip" else body
+
+    def read_form(self) -> dict:
+        return dict(parse_qsl(self.read_body().decode()))
+
+    def read_json(self):
+        return json.loads(self.read_body() or b"null")
+
+    def send_stream(self, frames, pace=None):
+        """Send data-stream frames with chunked transfer encoding, one chunk per frame, calling `pace()`
+        before every frame but the first."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for index, frame in enumerate(frames):
+            if pace is not None and index:
+                pace()
+            data = frame.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def auth_check(self):
+        cookie = self.headers.get("Cookie", "")
+        self.send_empty(204 if "neptun-session=" in cookie else 401)
+
+    def login(self):
+        form = self.read_form()
+        user = self.stand_in.users.get(form.get("email"))
+
+        if user is None or user["password"] != form.get("password"):
+            self.send_json(401, {"statusCode": 401, "statusMessage": "Unauthorized"})
+            return
+        self.send_session(user)
+
+    def sign_up(self):
+        form = self.read_form()
+
+        if form.get("email") in self.stand_in.users:
+            self.send_json(400, {"statusCode": 400, "statusMessage": "Bad Request"})
+            return
+        self.send_session(self.stand_in.add_user(form["email"], form["password"]))
+
+    def send_session(self, user: dict):
+        body = json.dumps({"user": {"id": user["id"], "primary_email": user["email"]},
+                           "loggedInAt": datetime.now(timezone.utc).isoformat()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Set-Cookie", f"neptun-session={self.stand_in.seal_session()}; Path=/; HttpOnly")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def chats(self, user_id: str):
+        chats = sorted(self.stand_in.chats, key=lambda chat: chat["updated_at"], reverse=True)
+
+        offset = int(self.query.get("offset", 0))
+        limit = self.query.get("limit")
+        chats = chats[offset:offset + int(limit) if limit is not None else None]
+
+        self.send_cacheable_json({"chats": chats})
+
+    def create_chat(self, user_id: str):
+        form = self.read_form()
+        chat = self.stand_in.add_chat(form["name"], form["model"], int(user_id))
+        self.send_json(201, {"chat": chat})
+
+    def delete_chat(self, user_id: str, chat_id: str):
+        self.stand_in.chats = [chat for chat in self.stand_in.chats if chat["id"] != int(chat_id)]
+        self.stand_in.messages.pop(int(chat_id), None)
+        self.send_empty(204)
+
+    def chat_messages(self, user_id: str, chat_id: str):
+        messages = self.stand_in.messages.get(int(chat_id), [])
+
+        after_id = self.query.get("after_id")
+        if after_id is not None:
+            messages = [message for message in messages if message["id"] > int(after_id)]
+
+        self.send_cacheable_json({"chatMessages": messages})
+
+    def attachment_exists(self, user_id: str, chat_id: str, digest: str):
+        self.send_empty(200 if digest in self.stand_in.attachments.get(int(chat_id), {}) else 404)
+
+    def upload_attachment(self, user_id: str, chat_id: str, digest: str):
+        content = self.read_body()
+        if hashlib.sha256(content).hexdigest() != digest:
+            self.send_json(400, {"statusCode": 400, "statusMessage": "Digest does not match the content"})
+            return
+
+        self.stand_in.attachments.setdefault(int(chat_id), {})[digest] = content
+        self.send_empty(201)
+
+    def chat_stream(self, publisher: str, model: str):
+        messages = self.read_json()["messages"]
+
+        chat_id = int(self.query.get("chat_id", 0))
+        self.stand_in.streamed_chats.append(chat_id)
+        stored = self.stand_in.attachments.get(chat_id, {})
+        if any(attachment["digest"] not in stored
+               for message in messages for attachment in message.get("attachments", ())):
+            self.send_json(400, {"statusCode": 400, "statusMessage": "Unknown attachment"})
+            return
+        reply = self.stand_in.reply(f"{publisher}/{model}", messages)
+
+        profile = self.stand_in.stream
+        if profile.latency:
+            time.sleep(profile.latency)
+
+        tokens = re.findall(r"\S+\s*", reply)
+        frames = [f"0:{json.dumps(token)}\n" for token in tokens]
+        if self.stand_in.draw(profile.error_rate):
+            frames = frames[:len(frames) // 2] + ['3:"The model stopped unexpectedly"\n']
+        else:
+            frames.append("d:" + json.dumps({"finishReason": "stop",
+                                             "usage": {"promptTokens": len(messages),
+                                                       "completionTokens": len(tokens)}}) + "\n")
+
+        self.send_stream(frames, pace=self.stand_in.token_delay if profile.token_rate or profile.jitter else None)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients hanging up (e.g. the losing copy of a hedged request) are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class NeptunStandIn:
+    """Serves the Neptun API on a random localhost port from a background thread."""
+
+    def __init__(self, handler_class=StandInRequestHandler):
+        self.server = StandInServer(("127.0.0.1", 0), handler_class)
+        self.server.stand_in = self
+        self.connections = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+        self.attachments: dict[int, dict[str, bytes]] = {}
+        self.messages: dict[int, list[dict]] = {}
+        self.chats: list[dict] = []
+        # chat id of every chat stream request, in arrival order
+        self.streamed_chats: list[int] = []
+        self.faults = Faults()
+        self.stream = StreamProfile()
+        self.users: dict[str, dict] = {}
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_chat(self, name: str, model: str = "mistralai/Mistral-7B-Instruct-v0.1", user_id: int = 1) -> dict:
+        timestamp = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            chat = {"id": max((existing["id"] for existing in self.chats), default=0) + 1, "name": name,
+                    "model": model, "created_at": timestamp, "updated_at": timestamp, "neptun_user_id": user_id}
+            self.chats.append(chat)
+        return chat
+
+    def add_user(self, email: str, password: str) -> dict:
+        user = {"id": len(self.users) + 1, "email": email, "password": password}
+        self.users[email] = user
+        return user
+
+    @staticmethod
+    def seal_session(lifetime: float = 7 * 24 * 3600) -> str:
+        """A cookie shaped like an iron `Fe26.2` seal, with a readable expiration."""
+        expiration = int((time.time() + lifetime) * 1000)
+        return f"Fe26.2**stand-in-salt*stand-in-iv*stand-in-data*{expiration}*stand-in-hmac-salt*stand-in-hmac"
+
+    def draw(self, rate: float) -> bool:
+        if not rate:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def token_delay(self) -> None:
+        profile = self.stream
+        delay = 1 / profile.token_rate if profile.token_rate else 0.0
+        if profile.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, profile.jitter)
+        time.sleep(delay)
+
+    def draw_fault(self) -> str | None:
+        with self._lock:
+            roll = self._random.random()
+
+        faults = self.faults
+        for fault, rate in (("reset", faults.reset_rate), ("error", faults.error_rate), ("slow", faults.slow_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def add_message(self, chat_id: int, message: str, actor: str = "user", user_id: int = 1) -> dict:
+        messages = self.messages.setdefault(chat_id, [])
+        timestamp = datetime.now(timezone.utc).isoformat()
+        chat_message = {
+            "id": sum(len(chat_messages) for chat_messages in self.messages.values()) + 1,
+            "message": message,
+            "actor": actor,
+            "created_at": timestamp,
+            "updated_at": timestamp,
+            "neptun_user_id": user_id,
+            "chat_conversation_id": chat_id,
+        }
+        messages.append(chat_message)
+        return chat_message
+
+    def reply(self, model: str, messages: list[dict]) -> str:
+        """Answer of the fake model, override (or replace on the instance) to script replies."""
+        return f"{model} says: {messages[-1]['content']}"
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def record_received(self, length: int):
+        with self._lock:
+            self.bytes_received += length
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def __enter__(self) -> "NeptunStandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def configure_config_manager(url: str, directory) -> ConfigManager:
+    """Point the ConfigManager singleton at a throwaway config that targets the stand-in."""
+    config_file_path = Path(directory) / "config.ini"
+    config_file_path.write_text(CONFIG_TEMPLATE.format(url=url))
+
+    config_manager = ConfigManager(config_file_path)
+    config_manager.set_config_file_path(config_file_path)
+    return config_manager
@@ -1,6 +1,14 @@
 __app_name__ = "neptun"
 __version__ = "0.1.0"
 
+AVAILABLE_MODELS = [
+    "OpenAssistant/oasst-sft-4-pythia-12b-epoch-3.5",
+    "mistralai/Mistral-7B-Instruct-v0.1",
+]
+
+# prompts of a batch (`neptun assistant ask --batch`) streamed at the same time
+DEFAULT_CONCURRENCY = 4
+
 (
     SUCCESS,
     DIR_ERROR,
@@ -11,7 +19,10 @@ __version__ = "0.1.0"
     NO_INTERNET_CONNECTION_ERROR,
     NOT_AUTHENTICATED_ERROR,
     ID_ERROR,
-) = range(9)
+    CHAT_STREAM_ERROR,
+    CIRCUIT_OPEN_ERROR,
+    AUTH_SERVER_UNAVAILABLE_ERROR,
+) = range(12)
 
 ERRORS = {
     DIR_ERROR: "config directory error",
@@ -19,6 +30,9 @@ ERRORS = {
     UPDATE_CONFIG_ERROR: "update config error",
     CONFIG_KEY_NOT_FOUND_ERROR: "config key not found error",
     NO_INTERNET_CONNECTION_ERROR: "internet connection error",
-    NOT_AUTHENTICATED_ERROR: "authentication error"
+    NOT_AUTHENTICATED_ERROR: "authentication error",
+    CHAT_STREAM_ERROR: "chat stream error",
+    CIRCUIT_OPEN_ERROR: "api temporarily unavailable error",
+    AUTH_SERVER_UNAVAILABLE_ERROR: "authentication server unavailable error",
 
 }
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from neptun.model.http_requests import Attachment
+from neptun.model.responses import AttachmentReport, ConfigSnapshot
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 256 * 1024
+# gzip framing for zlib streams
+GZIP_WBITS = 31
+COMPRESS_LEVEL = 6
+
+
+def digest_file(path, limit: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[str, int]:
+    """sha256 of the first `limit` bytes of the file, read in chunks, and how many bytes that were."""
+    digest = hashlib.sha256()
+    remaining = limit
+
+    with open(path, "rb") as file:
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+
+    return digest.hexdigest(), limit - remaining
+
+
+class AttachmentBody:
+    """Upload body that reads the file in chunks and gzips them on the way out.
+
+    Every iteration opens the file again, so a retried request can send it a second time.
+    """
+
+    def __init__(self, path, size: int, chunk_size: int = DEFAULT_CHUNK_SIZE, compress: bool = True):
+        self.path = path
+        self.size = size
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.bytes_sent = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        self.bytes_sent = 0
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, GZIP_WBITS) if self.compress else None
+        remaining = self.size
+
+        with open(self.path, "rb") as file:
+            while remaining > 0:
+                # off the event loop, the TUI keeps rendering while large files are read
+                chunk = await asyncio.to_thread(file.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                self.bytes_sent += len(chunk)
+                yield chunk
+
+        if compressor is not None:
+            tail = compressor.flush()
+            self.bytes_sent += len(tail)
+            yield tail
+
+
+class AttachmentPipeline:
+    """Uploads local files to a chat once and references them by content hash afterwards.
+
+    A file whose size and mtime are unchanged is not even read again, and a digest already known
+    to be in the chat is only referenced. Files over `max_bytes` are cut off there.
+    """
+
+    def __init__(self, chat_service, max_bytes: int = DEFAULT_MAX_BYTES, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 compress: bool = True):
+        self.chat_service = chat_service
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self._digests: Dict[Path, Tuple[int, int, int, str, int]] = {}
+        self._uploaded: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def from_config(cls, chat_service, config: ConfigSnapshot) -> "AttachmentPipeline":
+        return cls(chat_service,
+                   max_bytes=config.attachment_max_bytes,
+                   chunk_size=config.attachment_chunk_size,
+                   compress=config.http_compress_requests)
+
+    def digest(self, path: Path) -> Tuple[str, int, int]:
+        """Digest, budgeted length and full size of the file; cached for as long as its stat info holds."""
+        stat = os.stat(path)
+        cached = self._digests.get(path)
+        if cached is not None and cached[:3] == (stat.st_size, stat.st_mtime_ns, self.max_bytes):
+            return cached[3], cached[4], stat.st_size
+
+        digest, length = digest_file(path, self.max_bytes, self.chunk_size)
+        self._digests[path] = (stat.st_size, stat.st_mtime_ns, self.max_bytes, digest, length)
+        return digest, length, stat.st_size
+
+    async def prepare(self, paths: Iterable, chat_id=None) -> Tuple[List[Attachment], AttachmentReport]:
+        """Make sure the chat has every file and return the references to send with the message."""
+        start = time.perf_counter()
+        chat_id = str(chat_id or self.chat_service.config_manager.snapshot().chat_id)
+        uploaded = self._uploaded.setdefault(chat_id, set())
+
+        attachments, sent, referenced, bytes_read, bytes_sent = [], 0, 0, 0, 0
+        for path in paths:
+            path = Path(path).resolve()
+            # stat and sha256 of a large file would stall the event loop, they run in a worker thread
+            digest, length, size = await asyncio.to_thread(self.digest, path)
+
+            if digest not in uploaded and not await self.chat_service.has_attachment(digest, chat_id=chat_id):
+                body = AttachmentBody(path, length, self.chunk_size, self.compress)
+                await self.chat_service.upload_attachment(digest, body, chat_id=chat_id, compressed=self.compress)
+                sent += 1
+                bytes_read += length
+                bytes_sent += body.bytes_sent
+            else:
+                referenced += 1
+            uploaded.add(digest)
+
+            attachments.append(Attachment(digest=digest, name=path.name, size=length, truncated=length < size))
+
+        return attachments, AttachmentReport(uploaded=sent, referenced=referenced, bytes_read=bytes_read,
+                                             bytes_sent=bytes_sent, elapsed=time.perf_counter() - start)
@@ -0,0 +1,132 @@
+import json
+import sys
+from typing import Iterable, List, Optional, Union
+
+from neptun.bot.context import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+from neptun.model.http_requests import Attachment, Message
+
+
+def encode_message(role: str, content: str, attachments: Optional[List[Attachment]] = None) -> bytes:
+    message = {"role": role, "content": content}
+    if attachments:
+        message["attachments"] = [attachment.model_dump() for attachment in attachments]
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class BufferedMessage:
+    """A conversation message that serializes itself once and keeps the JSON fragment.
+
+    Reads like a `Message` (`role`, `content`, `attachments`), but has no validation and no
+    per-instance dict.
+    """
+
+    __slots__ = ("role", "content", "attachments", "_fragment", "_tokens")
+
+    def __init__(self, role: str, content: str, attachments: Optional[List[Attachment]] = None):
+        # a handful of distinct roles across thousands of messages
+        self.role = sys.intern(role)
+        self.content = content
+        self.attachments = attachments
+        self._fragment = None
+        self._tokens = None
+
+    def attach(self, attachments: List[Attachment]) -> None:
+        self.attachments = attachments or None
+        self._fragment = None
+
+    @property
+    def fragment(self) -> bytes:
+        if self._fragment is None:
+            self._fragment = encode_message(self.role, self.content, self.attachments)
+        return self._fragment
+
+    @property
+    def tokens(self) -> int:
+        """Estimated prompt tokens, counted once per message instead of once per turn."""
+        if self._tokens is None:
+            self._tokens = estimate_tokens(self.content) + MESSAGE_OVERHEAD_TOKENS
+        return self._tokens
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (BufferedMessage, Message)):
+            return self.role == other.role and self.content == other.content \
+                and (self.attachments or None) == (other.attachments or None)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"BufferedMessage(role={self.role!r}, content={self.content!r})"
+
+
+class ConversationBuffer(list):
+    """List of BufferedMessages that builds chat request bodies from cached fragments.
+
+    Each turn only serializes the new message; the body is a concatenation of fragments.
+    `total_tokens` is kept up to date by every method that adds, replaces or removes messages.
+    """
+
+    def __init__(self, messages: Iterable[BufferedMessage] = ()):
+        super().__init__(messages)
+        self.total_tokens = sum(message.tokens for message in self)
+
+    def append(self, message: BufferedMessage) -> None:
+        super().append(message)
+        self.total_tokens += message.tokens
+
+    def extend(self, messages: Iterable[BufferedMessage]) -> None:
+        messages = list(messages)
+        super().extend(messages)
+        self.total_tokens += sum(message.tokens for message in messages)
+
+    def __iadd__(self, messages: Iterable[BufferedMessage]) -> "ConversationBuffer":
+        self.extend(messages)
+        return self
+
+    def __imul__(self, times: int) -> "ConversationBuffer":
+        super().__imul__(times)
+        self.total_tokens = sum(message.tokens for message in self)
+        return self
+
+    def insert(self, index: int, message: BufferedMessage) -> None:
+        super().insert(index, message)
+        self.total_tokens += message.tokens
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            value = list(value)
+            removed = sum(message.tokens for message in self[index])
+            added = sum(message.tokens for message in value)
+        else:
+            removed, added = self[index].tokens, value.tokens
+        super().__setitem__(index, value)
+        self.total_tokens += added - removed
+
+    def __delitem__(self, index) -> None:
+        removed = self[index]
+        super().__delitem__(index)
+        self.total_tokens -= sum(message.tokens for message in removed) if isinstance(index, slice) \
+            else removed.tokens
+
+    def pop(self, index: int = -1) -> BufferedMessage:
+        message = super().pop(index)
+        self.total_tokens -= message.tokens
+        return message
+
+    def remove(self, message: BufferedMessage) -> None:
+        del self[self.index(message)]
+
+    def clear(self) -> None:
+        super().clear()
+        self.total_tokens = 0
+
+    def add(self, role: str, content: str) -> BufferedMessage:
+        message = BufferedMessage(role, content)
+        self.append(message)
+        return message
+
+    @staticmethod
+    def request_body(messages: Iterable[Union[BufferedMessage, Message]]) -> bytes:
+        """JSON body of a chat request, the same document `ChatRequest(messages=messages)` serializes to."""
+        fragments = [message.fragment if isinstance(message, BufferedMessage)
+                     else encode_message(message.role, message.content, message.attachments)
+                     for message in messages]
+        return b'{"messages":[' + b",".join(fragments) + b"]}"
@@ -1,82 +1,163 @@
 import asyncio
-from neptun.model.http_requests import ChatRequest, Message
+from typing import AsyncIterator, Iterable, Optional
 from rich.console import Console
 from neptun.utils.services import ChatService
-from neptun.model.http_responses import ChatMessage, ChatMessagesHttpResponse, ErrorResponse
-from neptun.utils.helpers import ChatResponseConverter
+from neptun.utils.history import ChatHistoryStore
+from neptun.model.http_responses import ChatMessagesHttpResponse
+from neptun.model.responses import AttachmentReport, TextDelta, FinishEvent, ErrorEvent, TrimReport
+from neptun.bot.attachments import AttachmentPipeline
+from neptun.bot.buffer import BufferedMessage, ConversationBuffer
+from neptun.bot.context import ContextWindow
+from neptun.utils.exceptions import ChatStreamError
+from neptun.utils.logger import setup_logging, LogBody
 
 import logging
 
-logging.basicConfig(
-    filename='app.log',  # Name of the log file
-    filemode='a',  # Mode to open the file ('w' for overwrite, 'a' for append)
-    format='%(asctime)s - %(levelname)s - %(message)s',  # Log format
-    level=logging.DEBUG  # Minimum logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-)
-
 
 class Conversation:
     def __init__(self):
         self.chat_service = ChatService()
-        self.messages: list[Message] = []
+        self.messages = ConversationBuffer()
         self.console = Console()
-        self.chat_response_converter = ChatResponseConverter()
+        self._sent_since_load = False
+        self._attachment_pipeline = None
+
+    @property
+    def history_store(self) -> ChatHistoryStore:
+        return self.chat_service.history_store
+
+    @property
+    def attachment_pipeline(self) -> AttachmentPipeline:
+        """Remembers which files this chat already has, so they are referenced rather than sent again."""
+        if self._attachment_pipeline is None:
+            self._attachment_pipeline = AttachmentPipeline.from_config(self.chat_service,
+                                                                       self.chat_service.config_manager.snapshot())
+        return self._attachment_pipeline
+
+    @property
+    def chat_id(self) -> int | None:
+        chat_id = self.chat_service.config_manager.snapshot().chat_id
+        return int(chat_id) if chat_id else None
+
+    def load_cached_messages(self) -> list[BufferedMessage]:
+        """Load the active chat from the local history store, without touching the network."""
+        chat_id = self.chat_id
+        cached_messages = self.history_store.get_messages(chat_id) if chat_id is not None else []
+
+        self.messages = ConversationBuffer(BufferedMessage(msg.actor, msg.message) for msg in cached_messages)
+        self._sent_since_load = False
+        return self.messages
+
+    async def sync_messages(self) -> list[BufferedMessage]:
+        """Fetch only the messages newer than the local store, store them and return the new ones."""
+        chat_id = self.chat_id
+        if chat_id is None:
+            return []
+
+        after_id, updated_after = self.history_store.get_sync_marker(chat_id)
+        response = await self.chat_service.get_chat_messages_by_chat_id(chat_id=chat_id,
+                                                                        after_id=after_id,
+                                                                        updated_after=updated_after)
+
+        if not isinstance(response, ChatMessagesHttpResponse):
+            logging.error(f"Error syncing messages: {response.statusCode} - {response.statusMessage}")
+            return []
+
+        logging.debug("Messages synced: %d", len(response.chat_messages))
+        self.history_store.upsert_messages(response.chat_messages)
+
+        new_messages = [BufferedMessage(msg.actor, msg.message) for msg in response.chat_messages
+                        if after_id is None or msg.id > after_id]
+
+        # Turns sent meanwhile are already in memory and come back from the server on the next sync.
+        if self._sent_since_load:
+            return []
+
+        self.messages.extend(new_messages)
+        return new_messages
+
+    def send(self, message: str, files: Optional[Iterable] = None) -> "ChatStream":
+        """Add the user's message and return the reply stream; `files` are uploaded (or referenced) first."""
+        self._sent_since_load = True
+        user_message = self.messages.add("user", message)
+
+        return ChatStream(self, user_message, files)
 
-    async def fetch_latest_messages(self):
-        response = await self.chat_service.get_chat_messages_by_chat_id()
+    def clear(self) -> None:
+        self.messages = ConversationBuffer()
 
-        if isinstance(response, ChatMessagesHttpResponse):
-            logging.debug(f"Messages Loaded: {response.chat_messages}")
-            self.messages = [Message(role=msg.actor, content=msg.message) for msg in response.chat_messages]
-        else:
-            self.console.print(f"Error fetching messages: {response.detail}", style="bold red")
+    async def run(self):
+        self.load_cached_messages()
+        await self.sync_messages()
 
-    def parse_response(self, response: str) -> str:
-        lines = response.splitlines()
 
-        parsed_lines = []
+class ChatStream:
+    """Assistant reply that can be iterated token by token or awaited as a whole."""
 
-        for line in lines:
-            parsed_line = line.split(':')[1].strip().strip('"')
-            parsed_lines.append(parsed_line)
+    def __init__(self, conversation: Conversation, message: BufferedMessage | None = None,
+                 files: Optional[Iterable] = None):
+        self.conversation = conversation
+        self.message = message
+        self.files = list(files or [])
+        self.tokens: list[str] = []
+        self.finish: FinishEvent | None = None
+        self.trim_report: TrimReport | None = None
+        self.attachment_report: AttachmentReport | None = None
 
-        return ''.join(parsed_lines)
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._stream()
 
-    async def send(self, message: str) -> Message | None:
-        self.messages.append(Message(role="user", content=message))
+    def __await__(self):
+        return self._collect().__await__()
 
-        chat_request = ChatRequest(messages=self.messages)
+    async def _stream(self) -> AsyncIterator[str]:
+        if self.files:
+            attachments, self.attachment_report = await self.conversation.attachment_pipeline.prepare(self.files)
+            self.message.attach(attachments)
+            logging.debug("Attachments: %s", self.attachment_report)
 
-        logging.debug(f"Sending chat request: {chat_request.model_dump()}")
+        context_window = ContextWindow.from_config(self.conversation.chat_service.config_manager.snapshot())
+        messages, self.trim_report = context_window.apply(self.conversation.messages)
 
-        try:
-            response = await self.chat_service.post_chat_message(chat_request)
+        # only the newest message is serialized here, the others reuse their cached fragments
+        request_body = ConversationBuffer.request_body(messages)
 
-            converted_message = self.chat_response_converter.parse_response(response)
+        logging.debug("Sending chat request: %s", LogBody(request_body))
+        logging.debug("Context window: %s", self.trim_report)
 
-            logging.debug(f"Received response: {converted_message}")
+        async for event in self.conversation.chat_service.stream_chat_message(request_body):
+            if isinstance(event, TextDelta):
+                self.tokens.append(event.text)
+                yield event.text
+            elif isinstance(event, FinishEvent):
+                self.finish = event
+            elif isinstance(event, ErrorEvent):
+                raise ChatStreamError(event.message)
 
-            self.messages.append(Message(role="assistant", content=converted_message))
+        converted_message = ''.join(self.tokens)
 
-            return self.messages[-1]
+        logging.debug("Received response: %s", LogBody(converted_message))
+
+        self.conversation.messages.add("assistant", converted_message)
+
+    async def _collect(self) -> BufferedMessage | None:
+        try:
+            async for _ in self:
+                pass
+
+            return self.conversation.messages[-1]
         except Exception as e:
             logging.error(f"Error sending message: {e}")
             return None
 
-    def clear(self) -> None:
-        self.messages = []
-
-    async def run(self):
-        await self.fetch_latest_messages()
-
 
 async def main():
     conversation = Conversation()
 
-    result = await conversation.send("Hello world!")
-
-    print(result.message)
+    async for token in conversation.send("Hello world!"):
+        print(token, end="", flush=True)
 
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(main())
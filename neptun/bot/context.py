@@ -0,0 +1,118 @@
+import hashlib
+import re
+from typing import List, Optional, Tuple
+
+from neptun.model.http_requests import Message
+from neptun.model.responses import ConfigSnapshot, TrimReport
+
+# Context sizes of the models the web-ui offers; unknown models fall back to the smallest one.
+MODEL_TOKEN_BUDGETS = {
+    "OpenAssistant/oasst-sft-4-pythia-12b-epoch-3.5": 2048,
+    "mistralai/Mistral-7B-Instruct-v0.1": 8192,
+}
+DEFAULT_TOKEN_BUDGET = 2048
+RESERVED_COMPLETION_TOKENS = 512
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+CODE_BLOCK_PATTERN = re.compile(r"```[^\n]*\n.*?```", re.DOTALL)
+COLLAPSED_CODE_BLOCK = "```\n[identical code block omitted, see a later message]\n```"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token count: words and punctuation marks, close to what BPE tokenizers produce."""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def estimate_message_tokens(message: Message) -> int:
+    """BufferedMessages carry their estimate, other messages are counted on every call."""
+    tokens = getattr(message, "tokens", None)
+    return tokens if tokens is not None else estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindow:
+    """Trims a conversation to the model's token budget before it is sent.
+
+    Policies run in order: collapse repeated code blocks, keep system messages plus the last
+    `keep_last` messages, then drop the oldest messages until the budget fits. The latest
+    message is always sent.
+    """
+
+    def __init__(self, model: Optional[str], max_tokens: Optional[int] = None, keep_last: int = 0,
+                 collapse_code: bool = True, reserved_completion_tokens: int = RESERVED_COMPLETION_TOKENS):
+        budget = max_tokens or MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+        self.max_prompt_tokens = max(budget - reserved_completion_tokens, 0)
+        self.keep_last = keep_last
+        self.collapse_code = collapse_code
+
+    @classmethod
+    def from_config(cls, config: ConfigSnapshot) -> "ContextWindow":
+        return cls(model=config.model,
+                   max_tokens=config.context_max_tokens,
+                   keep_last=config.context_keep_last,
+                   collapse_code=config.context_collapse_code)
+
+    def apply(self, messages: List[Message]) -> Tuple[List[Message], TrimReport]:
+        # a ConversationBuffer keeps a running total, a plain list is summed up
+        tokens_before = getattr(messages, "total_tokens", None)
+        if tokens_before is None:
+            tokens_before = sum(estimate_message_tokens(message) for message in messages)
+
+        window = list(messages)
+        if self.collapse_code:
+            window = self._collapse_repeated_code_blocks(window)
+        if self.keep_last > 0:
+            window = self._keep_system_and_last(window)
+        window = self._drop_oldest(window)
+
+        tokens_sent = sum(estimate_message_tokens(message) for message in window)
+
+        return window, TrimReport(messages_trimmed=len(messages) - len(window),
+                                  tokens_trimmed=tokens_before - tokens_sent,
+                                  tokens_sent=tokens_sent)
+
+    @staticmethod
+    def _collapse_repeated_code_blocks(messages: List[Message]) -> List[Message]:
+        """Keep only the newest copy of a code block, older copies become a short placeholder."""
+        seen = set()
+        collapsed = []
+
+        for message in reversed(messages):
+            if "```" not in message.content:
+                collapsed.append(message)
+                continue
+
+            def collapse(match: re.Match) -> str:
+                digest = hashlib.blake2b(match.group(0).encode(), digest_size=16).digest()
+                if digest in seen:
+                    return COLLAPSED_CODE_BLOCK
+                seen.add(digest)
+                return match.group(0)
+
+            content = CODE_BLOCK_PATTERN.sub(collapse, message.content)
+            collapsed.append(message if content == message.content
+                             else Message(role=message.role, content=content, attachments=message.attachments))
+
+        collapsed.reverse()
+        return collapsed
+
+    def _keep_system_and_last(self, messages: List[Message]) -> List[Message]:
+        latest = set(range(max(len(messages) - self.keep_last, 0), len(messages)))
+
+        return [message for index, message in enumerate(messages)
+                if message.role == "system" or index in latest]
+
+    def _drop_oldest(self, messages: List[Message]) -> List[Message]:
+        tokens = [estimate_message_tokens(message) for message in messages]
+        excess = sum(tokens) - self.max_prompt_tokens
+        last_index = len(messages) - 1
+
+        window = []
+        for index, message in enumerate(messages):
+            if excess > 0 and message.role != "system" and index < last_index:
+                excess -= tokens[index]
+                continue
+            window.append(message)
+
+        return window
@@ -0,0 +1,161 @@
+import re
+from functools import lru_cache
+
+from rich.markdown import Markdown
+
+CODE_THEME = "monokai"
+FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+LIST_ITEM = re.compile(r" {0,3}(?:[-*+]|\d{1,9}[.)])(?: |$)")
+# a streamed line this short could still turn out to be a list item or not
+LIST_ITEM_PREFIX = re.compile(r"(?:[-*+]|\d{1,9}[.)]?)")
+
+
+@lru_cache(maxsize=2048)
+def render_markdown_block(block: str) -> Markdown:
+    """Parse a finished Markdown block once; history messages and paged-in boxes reuse the result."""
+    return Markdown(block, code_theme=CODE_THEME)
+
+
+def render_open_block(block: str) -> Markdown:
+    """Parse the block that is still streaming, it changes with every token so it is never cached."""
+    return Markdown(block, code_theme=CODE_THEME)
+
+
+class MarkdownBlockSplitter:
+    """Split streamed Markdown into top-level blocks as soon as they are complete.
+
+    A block ends at the end of a fenced code block, or at a blank line followed by a line that
+    neither is indented nor continues a list, so loose lists, list item paragraphs and indented
+    code stay in one block. Only the open block is kept and only complete lines after the last
+    scan position are looked at, so feeding a token does not rescan the text.
+    """
+
+    def __init__(self):
+        # tokens are joined on demand (once per frame at most), appending to a str would copy the block every token
+        self._parts = [""]
+        self.closed_blocks: list[str] = []
+        self._scan_position = 0
+        self._fence: str | None = None
+        self._fence_nested = False
+        # start of the first blank line after the block's content, the block may still continue
+        self._blank_at: int | None = None
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0]
+
+    @text.setter
+    def text(self, text: str) -> None:
+        self._parts = [text]
+
+    @property
+    def open_block(self) -> str:
+        return self.text
+
+    def feed(self, token: str) -> list[str]:
+        """Append a token and return the blocks it completed."""
+        self._parts.append(token)
+        # without a new line break nothing can complete, unless a blank line waits for the next line to start
+        if "\n" not in token and self._blank_at is None:
+            return []
+        closed = []
+
+        while (line_end := self.text.find("\n", self._scan_position)) != -1:
+            line_start, self._scan_position = self._scan_position, line_end + 1
+            closed.extend(self._scan_line(self.text[line_start:line_end], line_start))
+
+        # decide on a pending blank line as soon as the next line shows whether it continues the block
+        if self._blank_at is not None and self._scan_position < len(self.text):
+            closed.extend(self._resolve_blank(self.text[self._scan_position:], self._scan_position, complete=False))
+
+        self.closed_blocks.extend(closed)
+        return closed
+
+    def close(self) -> list[str]:
+        """Treat the remaining text as complete, e.g. once the stream finished."""
+        closed = []
+        if self._blank_at is not None and self._scan_position < len(self.text):
+            closed.extend(self._resolve_blank(self.text[self._scan_position:], self._scan_position))
+        if self.text.strip():
+            closed.append(self.text.strip("\n"))
+
+        self.text = ""
+        self._scan_position = 0
+        self._fence = self._blank_at = None
+        self.closed_blocks.extend(closed)
+        return closed
+
+    def _in_list(self) -> bool:
+        return LIST_ITEM.match(self.text) is not None
+
+    def _continues_block(self, line: str, complete: bool = True) -> bool | None:
+        """Whether the line after a blank line belongs to the block, None if a partial line cannot tell yet."""
+        if line[:1] in (" ", "\t"):
+            return True
+        if not self._in_list():
+            return False
+        if not complete and LIST_ITEM_PREFIX.fullmatch(line):
+            return None
+        return LIST_ITEM.match(line) is not None
+
+    def _resolve_blank(self, line: str, line_start: int, complete: bool = True) -> list[str]:
+        continues = self._continues_block(line, complete)
+        if continues is None:
+            return []
+
+        blank_at, self._blank_at = self._blank_at, None
+        if continues:
+            return []
+
+        block = self._take_block(blank_at)
+        # the new block starts at this line, the blank lines before it belong to neither
+        self._drop(line_start - blank_at)
+        return [block]
+
+    def _scan_line(self, line: str, line_start: int) -> list[str]:
+        closed = []
+
+        if self._fence is not None:
+            if line.strip().startswith(self._fence) and not line.strip().strip(self._fence[0]):
+                self._fence = None
+                if not self._fence_nested:
+                    closed.append(self._take_block(self._scan_position))
+            return closed
+
+        if not line.strip():
+            if not self.text[:line_start].strip():
+                self._drop(self._scan_position)
+            elif self._blank_at is None:
+                self._blank_at = line_start
+            return closed
+
+        if self._blank_at is not None:
+            closed.extend(self._resolve_blank(line, line_start))
+            line_start = self._scan_position - len(line) - 1
+
+        if fence := FENCE.match(line):
+            # a fence inside a list item belongs to it, otherwise it ends the paragraph before it
+            self._fence_nested = line[:1].isspace() and self._in_list()
+            if self.text[:line_start].strip() and not self._fence_nested:
+                closed.append(self._take_block(line_start))
+            self._fence = fence.group(1)
+
+        return closed
+
+    def _take_block(self, end: int) -> str:
+        block = self.text[:end].strip("\n")
+        self._drop(end)
+        return block
+
+    def _drop(self, end: int) -> None:
+        self.text = self.text[end:]
+        self._scan_position -= end
+
+
+def split_markdown_blocks(text: str) -> list[str]:
+    splitter = MarkdownBlockSplitter()
+    splitter.feed(text)
+    splitter.close()
+    return splitter.closed_blocks
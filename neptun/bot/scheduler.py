@@ -0,0 +1,122 @@
+import logging
+import time
+from typing import Callable, Hashable
+
+from textual.app import App
+from textual.timer import Timer
+
+from neptun.model.responses import RenderStats
+
+DEFAULT_FPS = 30
+DEFAULT_IDLE_TIMEOUT = 10.0
+
+
+class RenderScheduler:
+    """Coalesces UI updates into at most one flush per frame.
+
+    Updates are scheduled under a key; scheduling a key that is still pending replaces the
+    previous callback (counted as a dropped update), so a burst of tokens costs one repaint.
+    Animations run every frame, but only while the app is focused and the user was active
+    within `idle_timeout` seconds. The frame timer is paused whenever there is nothing to do.
+    A failing callback is logged and dropped, it never reaches the timer (and the app) itself.
+    `stats()` reports the CPU time of the whole process, repaints included.
+    """
+
+    def __init__(self, app: App, fps: int = DEFAULT_FPS, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        self.app = app
+        self.fps = max(fps, 1)
+        self.idle_timeout = idle_timeout
+        self.focused = True
+        self.last_activity = time.monotonic()
+
+        self._pending: dict[Hashable, Callable[[], None]] = {}
+        self._animations: list[Callable[[], None]] = []
+        self._timer: Timer | None = None
+
+        self._started_at = time.monotonic()
+        self._frames = 0
+        self._updates = 0
+        self._dropped_updates = 0
+        self._cpu_started_at = time.process_time()
+
+    @property
+    def animating(self) -> bool:
+        return bool(self._animations) and self.focused \
+            and time.monotonic() - self.last_activity < self.idle_timeout
+
+    def start(self) -> None:
+        self._timer = self.app.set_interval(1 / self.fps, self._tick, pause=True, name="render-scheduler")
+        self._wake()
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+    def schedule(self, key: Hashable, callback: Callable[[], None]) -> None:
+        self._updates += 1
+        if key in self._pending:
+            self._dropped_updates += 1
+
+        self._pending[key] = callback
+        self._wake()
+
+    def flush(self) -> None:
+        """Run pending updates right away, e.g. when a stream has finished."""
+        if self._pending:
+            self._tick()
+
+    def add_animation(self, callback: Callable[[], None]) -> None:
+        self._animations.append(callback)
+        self._wake()
+
+    def remove_animation(self, callback: Callable[[], None]) -> None:
+        if callback in self._animations:
+            self._animations.remove(callback)
+
+    def touch(self) -> None:
+        """Record user activity, which resumes idle animations."""
+        self.last_activity = time.monotonic()
+        self._wake()
+
+    def set_focused(self, focused: bool) -> None:
+        self.focused = focused
+        if focused:
+            self.touch()
+
+    def stats(self) -> RenderStats:
+        return RenderStats(frames=self._frames,
+                           updates=self._updates,
+                           dropped_updates=self._dropped_updates,
+                           cpu_time=time.process_time() - self._cpu_started_at,
+                           uptime=time.monotonic() - self._started_at)
+
+    def _wake(self) -> None:
+        if self._timer is not None and (self._pending or self.animating):
+            self._timer.resume()
+
+    @staticmethod
+    def _run(callback: Callable[[], None]) -> bool:
+        try:
+            callback()
+            return True
+        except Exception:
+            # typically the widget the callback renders into has been removed meanwhile
+            logging.exception("Render callback %r failed, dropping it", callback)
+            return False
+
+    def _tick(self) -> None:
+        pending, self._pending = self._pending, {}
+        for callback in pending.values():
+            self._run(callback)
+
+        animating = self.animating
+        if animating:
+            for callback in list(self._animations):
+                if not self._run(callback):
+                    self.remove_animation(callback)
+
+        if pending or animating:
+            self._frames += 1
+        if not self._pending and not animating and self._timer is not None:
+            self._timer.pause()
@@ -19,19 +19,11 @@ from rich.progress import Progress, BarColumn
 
 from textual.app import App, ComposeResult
 from textual.widgets import Static
-
-
-
-logging.basicConfig(
-    filename='app.log',          # Name of the log file
-    filemode='a',                # Mode to open the file ('w' for overwrite, 'a' for append)
-    format='%(asctime)s - %(levelname)s - %(message)s', # Log format
-    level=logging.DEBUG          # Minimum logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-)
-
-
-class FocusableContainer(Container, can_focus=True):
-    """Focusable container widget."""
+from neptun.utils.logger import setup_logging, LogBody
+from neptun.bot.widgets import ConversationView, MessageBox
+from neptun.bot.scheduler import RenderScheduler
+from neptun.utils.managers import ConfigManager
+from textual import events
 
 
 class SpinnerWidget(Static):
@@ -40,29 +32,15 @@ class SpinnerWidget(Static):
         self._spinner = Spinner("moon")
 
     def on_mount(self) -> None:
-        self.update_render = self.set_interval(1 / 60, self.update_spinner)
+        self.app.render_scheduler.add_animation(self.update_spinner)
+
+    def on_unmount(self) -> None:
+        self.app.render_scheduler.remove_animation(self.update_spinner)
 
     def update_spinner(self) -> None:
         self.update(self._spinner)
 
 
-class MessageBox(Widget):
-    def __init__(self, text: str, role: str, markdown_str: str = "") -> None:
-        super().__init__()
-        self.text = text
-        self.markdown_str = markdown_str
-        self.role = role
-
-    def compose(self) -> ComposeResult:
-        if self.markdown_str:
-            with Widget(classes=f"message {self.role}"):
-                yield Static(self.text)
-
-                if self.markdown_str:
-                    yield Markdown(self.markdown_str, id="markdown_box")
-        else:
-            yield Static(self.text, classes=f"message {self.role}")
-
 class IndeterminateProgress(Widget):
     def __init__(self) -> None:
         super().__init__()
@@ -74,12 +52,13 @@ class IndeterminateProgress(Widget):
         yield self.loading_indicator
 
     def on_mount(self) -> None:
-        self.update_render = self.set_interval(
-            1 / 60, self.update_progress_bar
-        )
+        self.app.render_scheduler.add_animation(self.update_progress_bar)
+
+    def on_unmount(self) -> None:
+        self.app.render_scheduler.remove_animation(self.update_progress_bar)
 
     def update_progress_bar(self) -> None:
-        self.update(self.progress)
+        self.refresh()
 
 
 class NeptunChatApp(App):
@@ -87,19 +66,43 @@ class NeptunChatApp(App):
     SUB_TITLE = "The NEPTUN-CHATBOT directly in your terminal"
     CSS_PATH = Path(__file__).parent / "static" / "style.css"
 
+    def __init__(self) -> None:
+        super().__init__()
+        config = ConfigManager().snapshot()
+        self.render_scheduler = RenderScheduler(self, fps=config.tui_fps, idle_timeout=config.tui_idle_timeout)
+
     def on_mount(self) -> None:
+        self.render_scheduler.start()
         self.conversation = Conversation()
+        self.query_one("#conversation_box", ConversationView).conversation = self.conversation
         self.query_one("#message_input", Input).focus()
         self.call_later(self.list_existing_chats)
 
+    async def on_unmount(self) -> None:
+        self.render_scheduler.stop()
+        logging.info("Render stats: %s", self.render_scheduler.stats())
+        await self.conversation.chat_service.transport.aclose()
+
+    async def on_event(self, event: events.Event) -> None:
+        if isinstance(event, events.InputEvent):
+            self.render_scheduler.touch()
+        await super().on_event(event)
+
+    def on_app_focus(self) -> None:
+        self.render_scheduler.set_focused(True)
+
+    def on_app_blur(self) -> None:
+        self.render_scheduler.set_focused(False)
+
     BINDINGS = [
         Binding("q", "quit", "Quit", key_display="Q / CTRL+C"),
         ("ctrl+x", "clear", "Clear"),
+        ("ctrl+r", "render_stats", "Render stats"),
     ]
 
     def compose(self) -> ComposeResult:
         yield Header()
-        with FocusableContainer(id="conversation_box"):
+        with ConversationView(id="conversation_box"):
             yield MessageBox(
                 "Welcome to neptun-chatbot!\n"
                 "Type your question, click enter or 'send' button "
@@ -123,64 +126,99 @@ class NeptunChatApp(App):
             w.disabled = not w.disabled
 
     async def list_existing_chats(self):
-        conversation_box = self.query_one("#conversation_box", Container)
-        await self.conversation.run()
-
-        for message in self.conversation.messages[-5:]:
-            await conversation_box.mount(
-                MessageBox(
-                    role=message.role,
-                    text=message.content
-                )
-            )
+        conversation_box = self.query_one("#conversation_box", ConversationView)
+
+        # Render instantly from the local history, then fetch only newer messages in the background.
+        self.conversation.load_cached_messages()
+        await conversation_box.show_latest()
+
+        self.run_worker(self.sync_existing_chats(), exclusive=True)
+
+    async def sync_existing_chats(self):
+        conversation_box = self.query_one("#conversation_box", ConversationView)
+
+        new_messages = await self.conversation.sync_messages()
+
+        if new_messages:
+            await conversation_box.sync_tail()
+            conversation_box.scroll_end(animate=False)
 
     async def process_conversation(self) -> None:
         message_input = self.query_one("#message_input", Input)
         button = self.query_one("#send_button", Button)
-        conversation_box = self.query_one("#conversation_box", Container)
+        conversation_box = self.query_one("#conversation_box", ConversationView)
 
         # Disable the widgets while answering
         self.toggle_widgets(message_input, button)
 
         user_message = message_input.value
-        user_message_box = MessageBox(role="user", text=user_message)
+        following = conversation_box.follows_tail
+        chat_stream = self.conversation.send(user_message)
 
-        await conversation_box.mount(user_message_box)
+        if following:
+            await conversation_box.sync_tail()
+        else:
+            await conversation_box.show_latest()
 
         conversation_box.scroll_end(animate=True)
 
-        logging.debug(f"User message: {user_message}")
+        logging.debug("User message: %s", LogBody(user_message))
 
         with message_input.prevent(Input.Changed):
             message_input.value = ""
 
+        assistant_message_box = await conversation_box.add_pending(MessageBox(role="assistant", text=""))
+
+        pending_tokens = []
+
+        def render_pending_tokens() -> None:
+            assistant_message_box.append("".join(pending_tokens))
+            pending_tokens.clear()
+            conversation_box.scroll_end(animate=False)
+
         try:
-            result = await self.conversation.send(user_message)
+            async for token in chat_stream:
+                # tokens arrive much faster than frames, render whatever arrived once per frame
+                pending_tokens.append(token)
+                self.render_scheduler.schedule(assistant_message_box, render_pending_tokens)
 
-            logging.debug(f"API response: {result}")
+            self.render_scheduler.flush()
+            assistant_message_box.finish()
+            logging.debug("API response: %s", LogBody(assistant_message_box.text))
 
-            if result:
-                await conversation_box.mount(
-                    MessageBox(role="assistant", text=result.content)
-                )
-            else:
+            if not assistant_message_box.text:
                 logging.error("No result returned from conversation.send()")
         except Exception as e:
             logging.error(f"Error in conversation: {e}")
+            self.notify(f"Failed to get an answer: {e}", title="Error", severity="error")
             logging.error("Exception details:\n" + traceback.format_exc())
+        finally:
+            self.render_scheduler.flush()
+            conversation_box.release_pending(assistant_message_box)
+
+        if len(self.conversation.messages) <= assistant_message_box.index:
+            await conversation_box.remove_boxes([assistant_message_box])
 
         self.toggle_widgets(message_input, button)
         conversation_box.scroll_end(animate=True)
 
-    def action_clear(self) -> None:
+    def action_render_stats(self) -> None:
+        stats = self.render_scheduler.stats()
+        self.notify(f"{stats.frames} frames, {stats.dropped_updates}/{stats.updates} updates coalesced, "
+                    f"{stats.cpu_time:.1f}s CPU in {stats.uptime:.0f}s")
+
+    async def action_clear(self) -> None:
         self.conversation.clear()
-        conversation_box = self.query_one("#conversation_box", Container)
+        conversation_box = self.query_one("#conversation_box", ConversationView)
+
+        await conversation_box.remove_boxes(conversation_box.boxes)
 
         for child in conversation_box.children:
             child.remove()
 
 
 def main():
+    setup_logging()
     neptun_bot = NeptunChatApp()
 
     neptun_bot.run()
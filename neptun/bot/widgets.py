@@ -0,0 +1,246 @@
+from textual.app import ComposeResult
+from textual.containers import Container
+from textual.widget import Widget
+from textual.widgets import Static
+
+from neptun.model.http_requests import Message
+from neptun.bot.rendering import MarkdownBlockSplitter, render_markdown_block, render_open_block
+
+MAX_LIVE_MESSAGES = 40
+PAGE_SIZE = 10
+PAGE_THRESHOLD = 2
+
+
+class FocusableContainer(Container, can_focus=True):
+    """Focusable container widget."""
+
+
+class MessageBox(Widget):
+    def __init__(self, text: str, role: str, index: int | None = None) -> None:
+        super().__init__()
+        # streamed tokens are joined on demand, appending to a str would copy the reply every token
+        self._parts = [text]
+        self.role = role
+        self.index = index
+        # set while the message is still streaming, ConversationView never unmounts a pending box
+        self.pending = False
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0]
+
+    def compose(self) -> ComposeResult:
+        if self.role == "assistant":
+            yield MarkdownMessage(self.text, classes=f"message {self.role}")
+        else:
+            yield Static(self.text, classes=f"message {self.role}", markup=False)
+
+    def append(self, token: str) -> None:
+        """Grow the message in place while the assistant is still streaming."""
+        self._parts.append(token)
+
+        # a box paged out of the view keeps collecting the text, there is nothing left to render
+        if not (self.is_mounted and self.is_attached):
+            return
+        if self.role == "assistant":
+            self.query_one(MarkdownMessage).append(token)
+        else:
+            self.query_one(Static).update(self.text)
+
+    def finish(self) -> None:
+        """Render the last block as complete once the stream ended."""
+        if self.role == "assistant" and self.is_mounted and self.is_attached:
+            self.query_one(MarkdownMessage).finish()
+
+
+class MarkdownMessage(Container):
+    """Markdown rendered block by block: finished blocks get their own (cached) widget, only the
+    trailing open block is re-parsed as tokens stream in."""
+
+    def __init__(self, text: str = "", **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.splitter = MarkdownBlockSplitter()
+        self.initial_text = text
+        self._rendered_open_block = ""
+
+    def compose(self) -> ComposeResult:
+        self.splitter.feed(self.initial_text)
+        self.splitter.close()
+
+        for block in self.splitter.closed_blocks:
+            yield Static(render_markdown_block(block), classes="markdown-block")
+        yield Static("", id="open_block")
+
+    def append(self, token: str) -> None:
+        self._mount_blocks(self.splitter.feed(token))
+        # a frame that only completed blocks (or brought whitespace the splitter dropped) leaves it as it was
+        open_block = self.splitter.open_block
+        if open_block != self._rendered_open_block:
+            self._rendered_open_block = open_block
+            self.query_one("#open_block", Static).update(render_open_block(open_block))
+
+    def finish(self) -> None:
+        self._mount_blocks(self.splitter.close())
+        self._rendered_open_block = ""
+        self.query_one("#open_block", Static).update("")
+
+    def _mount_blocks(self, blocks: list[str]) -> None:
+        if blocks:
+            self.mount(*[Static(render_markdown_block(block), classes="markdown-block") for block in blocks],
+                       before="#open_block")
+
+
+class ConversationView(FocusableContainer):
+    """Virtualized message list: only a window of at most `max_live_messages` boxes is mounted.
+
+    Messages are read from `conversation.messages`; older (or newer) ones are paged in as the user
+    scrolls towards an edge and boxes on the opposite edge are unmounted, so layout cost does not
+    grow with the length of the chat.
+    """
+
+    def __init__(self, *children: Widget, max_live_messages: int = MAX_LIVE_MESSAGES, page_size: int = PAGE_SIZE,
+                 **kwargs) -> None:
+        super().__init__(*children, **kwargs)
+        self.conversation = None
+        self.max_live_messages = max_live_messages
+        self.page_size = page_size
+        self.boxes: list[MessageBox] = []
+        self._paging = False
+
+    @property
+    def messages(self) -> list[Message]:
+        return self.conversation.messages if self.conversation is not None else []
+
+    @property
+    def follows_tail(self) -> bool:
+        return not self.boxes or self.boxes[-1].index >= len(self.messages) - 1
+
+    def _create_box(self, index: int) -> MessageBox:
+        message = self.messages[index]
+        return MessageBox(role=message.role, text=message.content, index=index)
+
+    async def show_latest(self) -> None:
+        """Replace the window with the newest messages and scroll to the end."""
+        await self.remove_boxes(self.boxes)
+
+        start = max(len(self.messages) - self.page_size, 0)
+        await self._mount_at_end([self._create_box(index) for index in range(start, len(self.messages))])
+        self.scroll_end(animate=False)
+        self.call_after_refresh(self._fill_viewport)
+
+    def _fill_viewport(self) -> None:
+        """Page in older messages until the view can scroll, otherwise the user could never reach them."""
+        if self._paging or not self.boxes or self.boxes[0].index == 0 or self.max_scroll_y > PAGE_THRESHOLD \
+                or len(self.boxes) + self.page_size > self.max_live_messages:
+            return
+
+        self._paging = True
+        self.call_later(self._page_older)
+
+    async def sync_tail(self) -> None:
+        """Mount messages appended to the conversation, as long as the view is following the tail."""
+        if not self.follows_tail:
+            return
+
+        start = self.boxes[-1].index + 1 if self.boxes else 0
+        if len(self.messages) - start > self.max_live_messages:
+            await self.show_latest()
+            return
+
+        await self._mount_at_end([self._create_box(index) for index in range(start, len(self.messages))])
+        await self._trim(from_top=True)
+
+    async def add_pending(self, box: MessageBox) -> MessageBox:
+        """Mount a box for the message that is about to be appended (e.g. a streaming reply)."""
+        if not self.follows_tail:
+            await self.show_latest()
+
+        box.index = len(self.messages)
+        box.pending = True
+        await self._mount_at_end([box])
+        await self._trim(from_top=True)
+        return box
+
+    async def remove_boxes(self, boxes: list[MessageBox]) -> None:
+        boxes = list(boxes)
+        for box in boxes:
+            self.boxes.remove(box)
+        if boxes:
+            await self.remove_children(boxes)
+
+    async def _mount_at_end(self, boxes: list[MessageBox]) -> None:
+        if boxes:
+            self.boxes.extend(boxes)
+            await self.mount(*boxes)
+
+    async def _trim(self, from_top: bool, incoming: int = 0) -> int:
+        """Unmount boxes from one edge so that `incoming` more boxes still fit the budget.
+
+        Trimming stops at a pending box, so the window stays contiguous and a streaming reply
+        stays mounted; returns how many of the `incoming` boxes fit afterwards.
+        """
+        excess = len(self.boxes) + incoming - self.max_live_messages
+        if excess > 0:
+            edge = self.boxes if from_top else self.boxes[::-1]
+            removable = next((position for position, box in enumerate(edge) if box.pending), len(edge))
+            await self.remove_boxes(edge[:min(excess, removable)])
+        return max(min(incoming, self.max_live_messages - len(self.boxes)), 0)
+
+    def release_pending(self, box: MessageBox) -> None:
+        """The stream into `box` ended, paging that had to wait for it can continue."""
+        box.pending = False
+        if not self._paging and self.boxes and self.boxes[0].index > 0 and self.scroll_y <= PAGE_THRESHOLD:
+            self._paging = True
+            self.call_after_refresh(self._page_older)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+
+        if self._paging or not self.boxes:
+            return
+
+        if new_value <= PAGE_THRESHOLD and self.boxes[0].index > 0:
+            self._paging = True
+            self.call_after_refresh(self._page_older)
+        elif new_value >= self.max_scroll_y - PAGE_THRESHOLD and not self.follows_tail:
+            self._paging = True
+            self.call_after_refresh(self._page_newer)
+
+    async def _page_older(self) -> None:
+        anchor = self.boxes[0]
+        anchor_y = anchor.virtual_region.y
+
+        start = max(anchor.index - self.page_size, 0)
+        fitting = await self._trim(from_top=False, incoming=anchor.index - start)
+        if not fitting:
+            self._paging = False
+            return
+
+        boxes = [self._create_box(index) for index in range(anchor.index - fitting, anchor.index)]
+        self.boxes[:0] = boxes
+        await self.mount(*boxes, before=anchor)
+
+        # keep the message the user was looking at in place
+        self.call_after_refresh(self._restore_anchor, anchor, anchor_y)
+
+    async def _page_newer(self) -> None:
+        anchor = self.boxes[-1]
+        anchor_y = anchor.virtual_region.y
+
+        end = min(anchor.index + 1 + self.page_size, len(self.messages))
+        fitting = await self._trim(from_top=True, incoming=end - anchor.index - 1)
+        if not fitting:
+            self._paging = False
+            return
+
+        first = anchor.index + 1
+        await self._mount_at_end([self._create_box(index) for index in range(first, first + fitting)])
+
+        self.call_after_refresh(self._restore_anchor, anchor, anchor_y)
+
+    def _restore_anchor(self, anchor: MessageBox, anchor_y: int) -> None:
+        self.scroll_to(y=self.scroll_y + anchor.virtual_region.y - anchor_y, animate=False)
+        self._paging = False
+        self._fill_viewport()
@@ -1,13 +1,65 @@
+import importlib
+from typing import Optional
+
 import typer
-from neptun.cmd.config import config_app
-from neptun.cmd.auth import auth_app
-from neptun.cmd.assistant import assistant_app
+from typer.core import TyperGroup
 from neptun import __app_name__, __version__
-from neptun.cmd.github import github_app
+from neptun.utils.exceptions import AuthServerUnavailableError, CircuitOpenError
+from neptun.utils.logger import setup_logging
+
+# Sub-apps are only imported once their command group is invoked, so that e.g. `neptun config status`
+# does not pay for the chat stack (textual, httpx, ...).
+SUB_APPS = {
+    "config": ("neptun.cmd.config", "config_app"),
+    "auth": ("neptun.cmd.auth", "auth_app"),
+    "assistant": ("neptun.cmd.assistant", "assistant_app"),
+    "github": ("neptun.cmd.github", "github_app"),
+    "diag": ("neptun.cmd.diag", "diag_app"),
+    "project": ("neptun.cmd.project", "project_app"),
+}
+
+
+class LazyTyperGroup(TyperGroup):
+    def list_commands(self, ctx) -> list[str]:
+        return list(super().list_commands(ctx)) + [name for name in SUB_APPS if name not in self.commands]
+
+    def get_command(self, ctx, cmd_name: str):
+        if cmd_name not in self.commands and cmd_name in SUB_APPS:
+            module_name, attribute = SUB_APPS[cmd_name]
+            sub_app = getattr(importlib.import_module(module_name), attribute)
+            command = typer.main.get_group(sub_app)
+            command.name = cmd_name
+            self.add_command(command, cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+    def invoke(self, ctx):
+        try:
+            return super().invoke(ctx)
+        except (CircuitOpenError, AuthServerUnavailableError) as e:
+            # the server is unreachable for now (e.g. the breaker gave up on it), every command can fail this way
+            typer.secho(e.message, fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+
+
+app = typer.Typer(cls=LazyTyperGroup)
+
+
+def _version_callback(value: bool) -> None:
+    if value:
+        typer.echo(f"{__app_name__} v{__version__}")
+        raise typer.Exit()
 
-app = typer.Typer()
 
-app.add_typer(config_app, name="config", help=config_app.info.help)
-app.add_typer(auth_app, name="auth", help=auth_app.info.help)
-app.add_typer(assistant_app, name="assistant", help=assistant_app.info.help)
-app.add_typer(github_app, name="github", help=github_app.info.help)
+@app.callback()
+def main(
+        version: Optional[bool] = typer.Option(
+            None,
+            "--version",
+            "-v",
+            help="Show the application's version and exit.",
+            callback=_version_callback,
+            is_eager=True,
+        )
+) -> None:
+    setup_logging()
@@ -1,40 +1,47 @@
 import asyncio
-import textwrap
+import json
+import sys
 import time
 from functools import wraps
-import re
-import httpx
-import questionary
+from pathlib import Path
+from typing import List, Optional
+
 import typer
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from neptun.utils.helpers import ChatResponseConverter
+from neptun import AVAILABLE_MODELS, DEFAULT_CONCURRENCY
 from neptun.utils.managers import ConfigManager
-from neptun.utils.services import ChatService
-from neptun.model.http_responses import ChatsHttpResponse, GeneralErrorResponse, ErrorResponse, CreateChatHttpResponse
-from neptun.model.http_requests import CreateChatHttpRequest
-from neptun.bot.tui import NeptunChatApp
-from rich.markdown import Markdown
 from rich.table import Table
-from io import StringIO
+
+# questionary, prompt_toolkit, httpx (with the services) and the scanners are imported by the commands
+# that use them, `neptun assistant --help` should not pay for any of it
 
 assistant_app = typer.Typer(name="Neptun Chatbot", help="Start chatting with the neptun-chatbot.")
 
 console = Console()
-bot = NeptunChatApp()
-chat_service = ChatService()
 config_manager = ConfigManager()
 
 
 def ensure_authenticated(method):
     @wraps(method)
     def wrapper(*args, **kwargs):
+        from neptun.utils.exceptions import AuthServerUnavailableError
+        from neptun.utils.services import AuthenticationService
+
         id = config_manager.read_config(section='auth.user', key='id')
         neptun_session_token = config_manager.read_config(section='auth', key='neptun_session_cookie')
 
-        if neptun_session_token is None or id is None:
-            raise
+        try:
+            authenticated = neptun_session_token is not None and id is not None \
+                and AuthenticationService().is_authenticated(neptun_session_token)
+        except AuthServerUnavailableError:
+            typer.secho("Authentication server unavailable, try again later.", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+
+        if not authenticated:
+            typer.secho("Not authenticated, log in with 'neptun auth login' first.", fg=typer.colors.RED)
+            raise typer.Exit(code=1)
 
         return method(*args, **kwargs)
 
@@ -72,6 +79,13 @@ def print_chat_table(chat):
 
 
 def create_new_chat_dialog():
+    import questionary
+    from neptun.model.http_requests import CreateChatHttpRequest
+    from neptun.model.http_responses import CreateChatHttpResponse, ErrorResponse
+    from neptun.utils.services import ChatService
+
+    chat_service = ChatService()
+
     new_chat_name = questionary.text(
         message="Name the chat:"
     ).ask()
@@ -80,8 +94,7 @@ def create_new_chat_dialog():
         raise typer.Exit()
 
     new_chat_model = questionary.select(message="Select a ai-base-model:",
-                                        choices=["OpenAssistant/oasst-sft-4-pythia-12b-epoch-3.5",
-                                                 "mistralai/Mistral-7B-Instruct-v0.1"]).ask()
+                                        choices=AVAILABLE_MODELS).ask()
 
     if new_chat_model is None:
         raise typer.Exit()
@@ -124,7 +137,23 @@ def create_new_chat_dialog():
                             fg=typer.colors.RED)
 
 
-def enter_available_chats_dialog():
+def pick_chat(message: str, chat_service):
+    """Fuzzy-search the user's chats; None if there are none, typer.Exit if the user aborts."""
+    import questionary
+    from prompt_toolkit.completion import Completer, Completion, ThreadedCompleter
+    from neptun.utils.search import ChatPicker
+
+    class ChatCompleter(Completer):
+        """Completes chat labels from the picker while the user types."""
+
+        def get_completions(self, document, complete_event):
+            query = document.text_before_cursor
+            for chat in picker.search(query):
+                yield Completion(ChatPicker.label(chat), start_position=-len(query), display=chat.name,
+                                 display_meta=chat.model)
+
+    picker = ChatPicker(chat_service)
+
     with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -132,40 +161,48 @@ def enter_available_chats_dialog():
     ) as progress:
         progress.add_task(description="Collecting available chats...",
                           total=None)
+        recent_chats = picker.search()
 
-        result = chat_service.get_available_ai_chats()
+    if not recent_chats:
+        return None
 
-        if isinstance(result, ChatsHttpResponse):
-            chat_dict = {f"{chat.id}: {chat.name}:[{chat.model}]": chat for chat in result.chats}
-            chat_choices = [f"{chat.id}: {chat.name}:[{chat.model}]" for chat in result.chats[:5]]
+    action = questionary.autocomplete(
+        message=message,
+        choices=[ChatPicker.label(chat) for chat in recent_chats],
+        completer=ThreadedCompleter(ChatCompleter()),
+        validate=lambda text: picker.find(text) is not None or "Type to search and pick a chat from the list.",
+    ).ask()
 
-            progress.stop()
+    if action is None:
+        raise typer.Exit()
 
-            if result.chats is not None and len(result.chats) > 0:
-                action = questionary.select(
-                    message="Select an available chat:",
-                    choices=chat_choices
-                ).ask()
+    return picker.find(action)
 
-                if action is None:
-                    raise typer.Exit()
 
-                selected_chat_object = chat_dict.get(action)
+def enter_available_chats_dialog():
+    from neptun.utils.services import ChatService
 
-                config_manager.update_active_chat(id=selected_chat_object.id,
-                                                  name=selected_chat_object.name,
-                                                  model=selected_chat_object.model)
-                typer.secho(f"Successfully selected: {selected_chat_object.name}!",
-                            fg=typer.colors.GREEN)
-            else:
-                typer.secho(f"No chats available!",
-                            fg=typer.colors.BRIGHT_YELLOW)
+    chat_service = ChatService()
 
-        elif isinstance(result, GeneralErrorResponse):
-            print(result.statusMessage)
+    selected_chat_object = pick_chat("Select an available chat:", chat_service)
+
+    if selected_chat_object is not None:
+        config_manager.update_active_chat(id=selected_chat_object.id,
+                                          name=selected_chat_object.name,
+                                          model=selected_chat_object.model)
+        typer.secho(f"Successfully selected: {selected_chat_object.name}!",
+                    fg=typer.colors.GREEN)
+    else:
+        typer.secho(f"No chats available!",
+                    fg=typer.colors.BRIGHT_YELLOW)
 
 
 def list_available_chats():
+    from neptun.model.http_responses import ChatsHttpResponse, GeneralErrorResponse
+    from neptun.utils.services import ChatService
+
+    chat_service = ChatService()
+
     with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -201,56 +238,51 @@ def list_available_chats():
 
 
 def delete_selected_chat_dialog():
+    import questionary
+    from neptun.utils.services import ChatService
+
+    chat_service = ChatService()
+
     questionary.text(message="")  # necessary but don't know why -> bug appears when running `neptun assistant delete` if non-existent
+
+    selected_chat_object = pick_chat("Select an available chat:", chat_service)
+
+    if selected_chat_object is None:
+        typer.secho(f"No chats available!",
+                    fg=typer.colors.BRIGHT_YELLOW)
+        return
+
     with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True,
     ) as progress:
-        collecting_data_task = progress.add_task(description="Collecting available chats...",
-                                                 total=None)
+        deleting_data_task = progress.add_task(description="Deleting selected chat...",
+                                               total=None)
 
-        result = chat_service.get_available_ai_chats()
-        chat_dict = {f"{chat.id}: {chat.name}:[{chat.model}]": chat for chat in result.chats}
-        chat_choices = [f"{chat.id}: {chat.name}:[{chat.model}]" for chat in result.chats[:5]]
-
-        if isinstance(result, ChatsHttpResponse):
-            progress.update(collecting_data_task, completed=True, visible=False)
+        deleted_chat = chat_service.delete_selected_chat(selected_chat_object.id)
 
-            if result.chats is not None and len(result.chats) > 0:
-                action = questionary.select(
-                    message="Select an available chat:",
-                    choices=chat_choices,
-                ).ask()
+        if deleted_chat is True:
+            progress.update(deleting_data_task, completed=True, visible=False)
 
-                if action is None:
-                    raise typer.Exit()
-
-                selected_chat_object = chat_dict.get(action)
-
-                deleting_data_task = progress.add_task(description="Deleting selected chat...",
-                                                       total=None)
-
-                deleted_chat = chat_service.delete_selected_chat(selected_chat_object.id)
-
-                if deleted_chat is True:
-                    progress.update(deleting_data_task, completed=True, visible=False)
-
-                    progress.stop()
-                    typer.secho(f"Successfully deleted chat: {selected_chat_object.name}.", fg=typer.colors.GREEN)
-                else:
-                    typer.secho(f"Failed to delete chat: {selected_chat_object.name}.", fg=typer.colors.RED)
-            else:
-                typer.secho(f"No chats available!",
-                            fg=typer.colors.BRIGHT_YELLOW)
+            progress.stop()
+            typer.secho(f"Successfully deleted chat: {selected_chat_object.name}.", fg=typer.colors.GREEN)
+        else:
+            typer.secho(f"Failed to delete chat: {selected_chat_object.name}.", fg=typer.colors.RED)
 
 
 def chat():
-    bot.run()
+    # textual is only needed for the interactive chat, keep it out of the other commands' startup
+    from neptun.bot.tui import NeptunChatApp
+
+    NeptunChatApp().run()
 
 
 @assistant_app.command(name="options", help="Open up all options available.")
+@ensure_authenticated
 def options():
+    import questionary
+
     choice = questionary.select(
         "Choose an available function:",
         choices=["Enter Chat()", "New Chat()", "List Chats()", "Delete Chat()"],
@@ -268,37 +300,252 @@ def options():
 
 
 @assistant_app.command(name="list", help="List all available ai chat-dialogs.")
+@ensure_authenticated
 def list_chats():
     list_available_chats()
 
 
 @assistant_app.command(name="enter", help="List and automatically enter a chat-dialog.")
+@ensure_authenticated
 def enter_chat():
     enter_available_chats_dialog()
-    bot.run()
+    chat()
 
 
 @assistant_app.command(name="delete", help="List and delete a chat-dialog.")
+@ensure_authenticated
 def delete_chat():
     delete_selected_chat_dialog()
 
 
 @assistant_app.command(name="create", help="Create a new chat-dialog.")
+@ensure_authenticated
 def create_chat():
     create_new_chat_dialog()
 
-'''
-@assistant_app.command(name="ask", help="Ask a question to the bot")
-def ask(question: str):
-    response = bot.respond(question)
-    if response.startswith("markdown:"):
-        markdown_content = response[len("markdown:"):].strip()
-        print_markdown_stream(markdown_content)
+
+@assistant_app.command(name="ask", help="Ask a question without the chat UI, or run a JSONL batch of prompts.")
+@ensure_authenticated
+def ask(
+        prompt: Optional[str] = typer.Argument(None, help="The question, read from stdin if omitted."),
+        batch: Optional[Path] = typer.Option(None, "--batch", "-b",
+                                             help="JSONL file with one prompt per line "
+                                                  "(a string or {\"id\", \"prompt\", \"model\"}), '-' for stdin."),
+        output: Optional[Path] = typer.Option(None, "--output", "-o",
+                                              help="Write batch results to this file instead of stdout."),
+        concurrency: int = typer.Option(DEFAULT_CONCURRENCY, "--concurrency", "-c", min=1,
+                                        help="Number of batch prompts streamed at the same time."),
+        model: Optional[str] = typer.Option(None, "--model", "-m",
+                                            help="Model to ask instead of the active chat's model."),
+        project: Optional[Path] = typer.Option(None, "--project", "-p", exists=True, file_okay=False,
+                                               help="Attach the stack and layout of this project (see "
+                                                    "'neptun project scan') to the prompt."),
+        repo: Optional[Path] = typer.Option(None, "--repo", "-r", exists=True, file_okay=False,
+                                            help="Attach the files of this git repository that changed since it "
+                                                 "was last attached."),
+        attach: Optional[List[Path]] = typer.Option(None, "--attach", "-a", exists=True, dir_okay=False,
+                                                     help="Attach a file to the prompt (repeatable). Files the "
+                                                          "chat already has are referenced, not uploaded again."),
+        chat: Optional[int] = typer.Option(None, "--chat",
+                                           help="Post the prompts to this chat. By default a temporary chat is "
+                                                "used and deleted afterwards, the active chat is never touched."),
+):
+    """--project, --repo and --attach apply to the single prompt or to every prompt of a batch."""
+    contexts = []
+    if project:
+        from neptun.utils.scanner import ManifestStore, project_context
+
+        contexts.append(project_context(project, ManifestStore.next_to(config_manager.config_file_path)))
+    if repo:
+        from neptun.utils.gitindex import Repository, SnapshotStore, describe_delta
+
+        try:
+            repository = Repository(repo, store=SnapshotStore.next_to(config_manager.config_file_path), chat_id=chat)
+        except ValueError as e:
+            typer.secho(str(e), fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        # a temporary chat has seen nothing, it gets the whole summary and no snapshot is kept for it
+        delta = repository.delta(full=chat is None)
+        contexts.append(describe_delta(repository.root, delta))
+    context = "\n\n".join(contexts) or None
+
+    if batch is not None:
+        failed = asyncio.run(run_batch(batch, output, concurrency, model, context, attach, chat))
+        if repo and chat is not None and not failed:
+            repository.mark_sent(delta)
+        raise typer.Exit(code=1 if failed else 0)
+
+    if prompt is None:
+        if sys.stdin.isatty():
+            typer.secho("Provide a prompt as argument or on stdin.", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        prompt = sys.stdin.read()
+
+    try:
+        asyncio.run(stream_to_stdout(prompt, model, context, attach, chat))
+    except Exception as e:
+        typer.secho(f"\nFailed to get an answer: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+    if repo and chat is not None:
+        # only once the assistant has actually seen it
+        repository.mark_sent(delta)
+
+
+async def stream_to_stdout(prompt: str, model: Optional[str], context: Optional[str] = None,
+                           files: Optional[List[Path]] = None, chat: Optional[int] = None):
+    from neptun.bot.attachments import AttachmentPipeline
+    from neptun.utils.runners import headless_chat, stream_answer
+    from neptun.utils.services import ChatService
+
+    chat_service = ChatService()
+    try:
+        async with headless_chat(chat, model) as chat_id:
+            attachments = None
+            if files:
+                pipeline = AttachmentPipeline.from_config(chat_service, config_manager.snapshot())
+                attachments, _ = await pipeline.prepare(files, chat_id=chat_id)
+
+            async for token in stream_answer(prompt, model=model, context=context, attachments=attachments,
+                                             chat_id=chat_id):
+                sys.stdout.write(token)
+                sys.stdout.flush()
+            sys.stdout.write("\n")
+    finally:
+        await chat_service.transport.aclose()
+
+
+async def run_batch(batch: Path, output: Optional[Path], concurrency: int, model: Optional[str],
+                    context: Optional[str] = None, files: Optional[List[Path]] = None,
+                    chat: Optional[int] = None) -> int:
+    """Write one JSON line per prompt in completion order and return the number of failed prompts."""
+    import httpx
+    from neptun.bot.attachments import AttachmentPipeline
+    from neptun.utils.exceptions import ChatStreamError
+    from neptun.utils.runners import BatchRunner, headless_chat, read_batch_jobs
+    from neptun.utils.services import ChatService
+
+    batch_file = output_file = None
+    try:
+        batch_file = sys.stdin if str(batch) == "-" else open(batch)
+        output_file = open(output, "w") if output else sys.stdout
+    except OSError as e:
+        typer.secho(f"Could not open {e.filename}: {e.strerror}", fg=typer.colors.RED, err=True)
+        if batch_file not in (None, sys.stdin):
+            batch_file.close()
+        return 1
+
+    chat_service = ChatService()
+    failed = total = 0
+    start = time.perf_counter()
+
+    try:
+        # every prompt of the batch goes to the same (by default temporary) chat
+        async with headless_chat(chat, model, name="neptun batch") as chat_id:
+            attachments = None
+            if files:
+                # uploaded once, every prompt references the same files
+                pipeline = AttachmentPipeline.from_config(chat_service, config_manager.snapshot())
+                attachments, _ = await pipeline.prepare(files, chat_id=chat_id)
+
+            jobs = (job._replace(model=job.model or model) for job in read_batch_jobs(batch_file))
+            runner = BatchRunner(concurrency, context=context, attachments=attachments, chat_id=chat_id)
+
+            async for result in runner.run(jobs):
+                total += 1
+                failed += result.error is not None
+
+                output_file.write(json.dumps(result._asdict()) + "\n")
+                output_file.flush()
+    except ValueError as e:
+        typer.secho(f"Invalid batch file: {e}", fg=typer.colors.RED, err=True)
+        failed += 1
+    except ChatStreamError as e:
+        typer.secho(str(e), fg=typer.colors.RED, err=True)
+        failed += 1
+    except (OSError, httpx.HTTPError) as e:
+        typer.secho(f"Failed to attach files: {e}", fg=typer.colors.RED, err=True)
+        failed += 1
+    finally:
+        if batch_file is not sys.stdin:
+            batch_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+        await chat_service.transport.aclose()
+
+    typer.secho(f"{total} prompts, {failed} failed in {time.perf_counter() - start:.1f}s",
+                fg=typer.colors.RED if failed else typer.colors.GREEN, err=True)
+    return failed
+
+
+@assistant_app.command(name="compare", help="Send one prompt to several models at once and compare their speed.")
+@ensure_authenticated
+def compare(
+        prompt: Optional[str] = typer.Argument(None, help="The question, read from stdin if omitted."),
+        models: Optional[list[str]] = typer.Option(None, "--model", "-m",
+                                                   help="Model to include, repeat for more (default: all models)."),
+        as_json: bool = typer.Option(False, "--json", help="Print the measurements as JSON lines only."),
+):
+    if prompt is None:
+        if sys.stdin.isatty():
+            typer.secho("Provide a prompt as argument or on stdin.", fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        prompt = sys.stdin.read()
+
+    results = asyncio.run(run_comparison(prompt, models or AVAILABLE_MODELS, live=not as_json))
+
+    if as_json:
+        for result in results:
+            typer.echo(json.dumps(result._asdict()))
     else:
-        console.print(f"Bot: {response}")
-'''
+        print_comparison_table(results)
+
+    raise typer.Exit(code=1 if any(result.error for result in results) else 0)
+
 
+async def run_comparison(prompt: str, models: list[str], live: bool):
+    from rich.live import Live
+    from neptun.utils.runners import compare_models
+    from neptun.utils.services import ChatService
 
+    replies = {model: "" for model in models}
 
+    def render_replies() -> Table:
+        table = Table(expand=True)
+        for model in models:
+            table.add_column(model, ratio=1)
+        table.add_row(*replies.values())
+        return table
 
+    def on_token(model: str, text: str):
+        replies[model] += text
 
+    try:
+        if not live:
+            return await compare_models(prompt, models)
+
+        # Live repaints at its own rate, so bursts of tokens do not cause a repaint each
+        with Live(get_renderable=render_replies, console=console, refresh_per_second=8):
+            return await compare_models(prompt, models, on_token=on_token)
+    finally:
+        await ChatService().transport.aclose()
+
+
+def print_comparison_table(results):
+    table = Table()
+    table.add_column("Model", justify="left", no_wrap=True)
+    table.add_column("First token", justify="right")
+    table.add_column("Tokens/s", justify="right")
+    table.add_column("Latency", justify="right")
+    table.add_column("Tokens", justify="right")
+    table.add_column("Status", justify="left")
+
+    for result in sorted(results, key=lambda result: (result.error is not None, result.latency)):
+        table.add_row(result.model,
+                      f"{result.time_to_first_token * 1000:.0f} ms" if result.time_to_first_token is not None else "-",
+                      f"{result.tokens_per_second:.1f}" if result.tokens_per_second else "-",
+                      f"{result.latency * 1000:.0f} ms",
+                      f"{result.tokens}",
+                      f"[red]{result.error}[/red]" if result.error else "[green]ok[/green]")
+
+    console.print(table)
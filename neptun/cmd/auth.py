@@ -1,6 +1,7 @@
 import typer
 from neptun.model.http_requests import SignUpHttpRequest, LoginHttpRequest
 from neptun.model.http_responses import SignUpHttpResponse, ErrorResponse, LoginHttpResponse
+from neptun.utils.exceptions import AuthServerUnavailableError
 from neptun.utils.services import AuthenticationService
 import re
 import questionary
@@ -11,7 +12,6 @@ from rich.console import Console
 from rich.table import Table
 
 console = Console()
-authentication_service = AuthenticationService()
 config_manager = ConfigManager()
 
 regex = re.compile(r'([A-Za-z0-9]+[.-_])*[A-Za-z0-9]+@[A-Za-z0-9-]+(\.[A-Z|a-z]{2,})+')
@@ -55,7 +55,7 @@ def login():
         login_http_request = LoginHttpRequest(email=email,
                                               password=password)
 
-        result = authentication_service.login(login_up_http_request=login_http_request)
+        result = AuthenticationService().login(login_up_http_request=login_http_request)
 
         progress.stop()
 
@@ -117,7 +117,7 @@ def register():
         signup_http_request = SignUpHttpRequest(email=email,
                                                 password=password)
 
-        result = authentication_service.sign_up(sign_up_http_request=signup_http_request)
+        result = AuthenticationService().sign_up(sign_up_http_request=signup_http_request)
 
         progress.stop()
         if isinstance(result, SignUpHttpResponse):
@@ -143,11 +143,15 @@ def register():
 
 @auth_app.command(name="status",
                   help="Get your current authentication-status and user-data if provided.")
-def status():
+def status(
+        refresh: bool = typer.Option(False, "--refresh", "-r",
+                                     help="Ask the server even if a recent verdict is cached."),
+):
     neptun_session_cookie = config_manager.read_config('auth', 'neptun_session_cookie')
     email = config_manager.read_config('auth.user', 'email')
 
     is_authenticated = neptun_session_cookie not in [None, "None", ""]
+    server_unavailable = False
 
     if is_authenticated:
         with Progress(
@@ -157,7 +161,10 @@ def status():
         ) as progress:
             progress.add_task(description="Checking authentication status...",
                               total=None)
-            is_authenticated = authentication_service.check_authenticated(neptun_session_cookie)
+            try:
+                is_authenticated = AuthenticationService().is_authenticated(neptun_session_cookie, refresh=refresh)
+            except AuthServerUnavailableError:
+                is_authenticated, server_unavailable = False, True
 
             progress.stop()
 
@@ -167,9 +174,10 @@ def status():
     table.add_column("Session Cookie (truncated): ", justify="left", no_wrap=True)
 
     table.add_row(
-        "Authenticated" if is_authenticated else "Not authenticated",
+        "Authenticated" if is_authenticated else "Unknown (server unavailable)" if server_unavailable
+        else "Not authenticated",
         email if email else "No Email Found",
-        f"{neptun_session_cookie[:10]}..." if is_authenticated else "No Session Cookie"
+        f"{neptun_session_cookie[:10]}..." if is_authenticated or server_unavailable else "No Session Cookie"
     )
 
     console.print(table)
@@ -0,0 +1,159 @@
+import socket
+import time
+from typing import Optional
+
+import httpx
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from neptun.model.responses import RequestTiming
+from neptun.utils.managers import ConfigManager
+from neptun.utils.metrics import HISTOGRAM_BUCKETS, RequestTracer, histogram, summarize
+from neptun.utils.transport import HttpTransport
+
+console = Console()
+config_manager = ConfigManager()
+
+diag_app = typer.Typer(name="Neptun Diagnostics", help="Show where the time of API requests goes and probe the "
+                                                       "API server.")
+
+HISTOGRAM_WIDTH = 40
+
+
+def format_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.0f} ms"
+
+
+def print_summary_table(title: str, column: str, summaries):
+    table = Table(title=title)
+    table.add_column(column, justify="left", no_wrap=True)
+    for name in ("Count", "Errors", "p50", "p95", "p99", "TTFB p50", "TTFB p95", "TTFB p99", "Received"):
+        table.add_column(name, justify="right")
+
+    for summary in summaries:
+        table.add_row(summary.name,
+                      f"{summary.count}",
+                      f"{summary.errors}",
+                      format_seconds(summary.p50),
+                      format_seconds(summary.p95),
+                      format_seconds(summary.p99),
+                      format_seconds(summary.ttfb_p50),
+                      format_seconds(summary.ttfb_p95),
+                      format_seconds(summary.ttfb_p99),
+                      f"{summary.response_bytes / 1024:.1f} KiB")
+
+    console.print(table)
+
+
+def print_histogram(timings: list[RequestTiming]):
+    counts = histogram(timing.total for timing in timings)
+    widest = max(counts) or 1
+
+    table = Table(title="Request latency", show_header=False, box=None)
+    table.add_column(justify="right", no_wrap=True)
+    table.add_column(justify="left", no_wrap=True)
+    table.add_column(justify="right")
+
+    lower = 0.0
+    for bound, count in zip(HISTOGRAM_BUCKETS, counts):
+        label = f"> {format_seconds(lower)}" if bound == float("inf") else f"≤ {format_seconds(bound)}"
+        table.add_row(label, "█" * round(count / widest * HISTOGRAM_WIDTH), f"{count}")
+        lower = bound
+
+    console.print(table)
+
+
+def is_probeable(host: Optional[str]) -> bool:
+    """Whether the configured host is an absolute http(s) URL, an unset one would be probed as "None/auth/check"."""
+    if not host or host == "None":
+        return False
+    try:
+        url = httpx.URL(host)
+    except httpx.InvalidURL:
+        return False
+    return url.scheme in ("http", "https") and bool(url.host)
+
+
+def probe(host: str, count: int) -> list[tuple[Optional[float], RequestTiming]]:
+    """Time `count` fresh connections to the API host, each with its own DNS lookup."""
+    url = httpx.URL(f"{host}/auth/check")
+    port = url.port or (443 if url.scheme == "https" else 80)
+    results = []
+
+    for _ in range(count):
+        try:
+            start = time.perf_counter()
+            socket.getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+            dns = time.perf_counter() - start
+        except OSError:
+            dns = None
+
+        timings = []
+        tracer = RequestTracer(timings.append)
+        # no pooling and no retries, every probe pays for its own connection
+        with httpx.Client(event_hooks=tracer.event_hooks(), timeout=HttpTransport().timeout) as client:
+            try:
+                client.head(url)
+            except httpx.HTTPError:
+                pass
+
+        results.extend((dns, timing) for timing in timings)
+
+    return results
+
+
+def print_probe_table(host: str, results):
+    table = Table(title=f"Probe: HEAD {host}/auth/check")
+    table.add_column("#", justify="right")
+    for name in ("DNS", "Connect", "TLS", "TTFB", "Transfer", "Total"):
+        table.add_column(name, justify="right")
+    table.add_column("Status", justify="left")
+
+    for index, (dns, timing) in enumerate(results, start=1):
+        table.add_row(f"{index}",
+                      format_seconds(dns),
+                      format_seconds(timing.connect),
+                      format_seconds(timing.tls),
+                      format_seconds(timing.time_to_first_byte),
+                      format_seconds(timing.transfer),
+                      format_seconds(timing.total),
+                      f"[red]{timing.error}[/red]" if timing.error else f"{timing.status}")
+
+    console.print(table)
+
+
+@diag_app.callback(invoke_without_command=True)
+def diag(
+        probes: int = typer.Option(3, "--probes", "-p", min=0,
+                                   help="Synthetic requests against the API server, 0 to skip the probe."),
+        last: Optional[int] = typer.Option(None, "--last", "-l", min=1,
+                                           help="Only include the latest N recorded requests."),
+        clear: bool = typer.Option(False, "--clear", help="Forget all recorded request timings."),
+):
+    metrics_store = HttpTransport().metrics_store
+
+    if clear:
+        metrics_store.clear()
+        typer.secho("Cleared the recorded request timings.", fg=typer.colors.GREEN)
+        raise typer.Exit()
+
+    timings = metrics_store.get_timings(limit=last)
+
+    if timings:
+        print_summary_table("Requests by endpoint", "Endpoint", summarize(timings, lambda timing: timing.endpoint))
+        by_model = summarize(timings, lambda timing: timing.model)
+        if by_model:
+            print_summary_table("Requests by model", "Model", by_model)
+        print_histogram(timings)
+    else:
+        typer.secho("No requests recorded yet.", fg=typer.colors.BRIGHT_YELLOW)
+
+    if probes:
+        host = config_manager.snapshot().neptun_api_server_host
+        if not is_probeable(host):
+            typer.secho(f"No usable API server configured (neptun_api_server_host is {host!r}), set it with "
+                        f"'neptun config dynamic utils.neptun_api_server_host=https://...' or pass --probes 0.",
+                        fg=typer.colors.RED, err=True)
+            raise typer.Exit(code=1)
+        print_probe_table(host, probe(host, probes))
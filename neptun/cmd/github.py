@@ -1,18 +1,30 @@
 import typer
 import webbrowser
+from pathlib import Path
+from typing import Optional
 from rich.console import Console
+from rich.table import Table
+from neptun.utils.gitindex import Repository, SnapshotStore, describe_delta
 from neptun.utils.managers import ConfigManager
-from neptun.utils.services import AuthenticationService
 
 config_manager = ConfigManager()
 console = Console()
-authentication_service = AuthenticationService()
 
 
 github_app = typer.Typer(name="Github Manager",
                          help="Manage your imported repositories & use the neptun gh-application.")
 
 
+def open_repository(path: Path, chat_id=None) -> Repository:
+    """The repository as the given chat (the active one by default) has seen it."""
+    try:
+        return Repository(path, store=SnapshotStore.next_to(config_manager.config_file_path),
+                          chat_id=chat_id or config_manager.snapshot().chat_id)
+    except ValueError as e:
+        typer.secho(str(e), fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+
 @github_app.command(name="install",
                     help="Install the official neptun-github-application onto a repository.")
 def install_github_app():
@@ -25,3 +37,41 @@ def install_github_app():
         typer.secho("Seems like chrome is not installed on your system.\nTo manually add the github-application, please visit: https://github.com/apps/neptun-github-app/installations", fg=typer.colors.RED)
 
 
+@github_app.command(name="changes",
+                    help="Show which tracked files changed since the assistant last received this repository.")
+def changes(
+        path: Path = typer.Argument(Path("."), exists=True, file_okay=False, help="Root of the git work tree."),
+        chat: Optional[int] = typer.Option(None, "--chat", help="Chat to compare with (default: the active chat)."),
+):
+    repository = open_repository(path, chat)
+    delta = repository.delta()
+
+    if delta.first_snapshot:
+        typer.secho(f"No context was sent for {repository.root} yet, all {delta.tracked} tracked files are new.",
+                    fg=typer.colors.BRIGHT_YELLOW)
+    elif not (delta.added or delta.modified or delta.deleted):
+        typer.secho("Nothing changed since the last context.", fg=typer.colors.GREEN)
+    else:
+        table = Table()
+        table.add_column("Change", justify="left", no_wrap=True)
+        table.add_column("File", justify="left")
+        for change, paths in (("added", delta.added), ("modified", delta.modified), ("deleted", delta.deleted)):
+            for file_path in paths:
+                table.add_row(change, file_path)
+        console.print(table)
+
+    typer.secho(f"{delta.tracked} tracked files in {delta.elapsed:.2f}s, {delta.hashed} hashed", fg=typer.colors.GREEN)
+
+
+@github_app.command(name="context",
+                    help="Print the context 'neptun assistant ask --repo' would send next. The snapshot is only "
+                         "advanced by ask, once the assistant has actually received it.")
+def context(
+        path: Path = typer.Argument(Path("."), exists=True, file_okay=False, help="Root of the git work tree."),
+        chat: Optional[int] = typer.Option(None, "--chat", help="Chat to compare with (default: the active chat)."),
+        full: bool = typer.Option(False, "--full", help="Ignore the last snapshot and summarize the whole "
+                                                        "repository."),
+):
+    repository = open_repository(path, chat)
+    delta = repository.delta(full=full)
+    typer.echo(describe_delta(repository.root, delta))
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import typer
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.table import Table
+
+from neptun.utils.managers import ConfigManager
+from neptun.utils.scanner import DEFAULT_WORKERS, ManifestStore, ProjectScanner, describe_manifest
+
+console = Console()
+config_manager = ConfigManager()
+
+project_app = typer.Typer(name="Project Scanner", help="Scan the local project so that the assistant knows its "
+                                                       "stack and layout.")
+
+
+def manifest_store() -> ManifestStore:
+    return ManifestStore.next_to(config_manager.config_file_path)
+
+
+@project_app.command(name="scan", help="Scan a project (only changed files are read again) and show its stack.")
+def scan(
+        path: Path = typer.Argument(Path("."), exists=True, file_okay=False, help="Root of the project."),
+        workers: int = typer.Option(DEFAULT_WORKERS, "--workers", "-w", min=1,
+                                    help="Threads listing directories and hashing files."),
+        full: bool = typer.Option(False, "--full", help="Ignore the stored manifest and hash every file again."),
+):
+    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
+        progress.add_task(description=f"Scanning {path.resolve()}...", total=None)
+        manifest, report = ProjectScanner(path, workers=workers, store=manifest_store()).scan(full=full)
+
+    table = Table(title="Detected stack")
+    table.add_column("Manifest", justify="left", no_wrap=True)
+    table.add_column("Stack", justify="left")
+    for file_path, entry in manifest.files.items():
+        if entry.stack:
+            table.add_row(file_path, ", ".join(entry.stack))
+
+    if table.row_count:
+        console.print(table)
+    else:
+        typer.secho("No known manifests found.", fg=typer.colors.BRIGHT_YELLOW)
+
+    typer.secho(f"{report.files} files in {report.elapsed:.2f}s: {report.hashed} hashed "
+                f"({report.bytes_hashed / 1024 / 1024:.1f} MiB), {report.reused} unchanged, "
+                f"{report.removed} removed, {report.ignored} ignored", fg=typer.colors.GREEN)
+
+
+@project_app.command(name="context", help="Print the project description that is attached to assistant prompts.")
+def context(
+        path: Path = typer.Argument(Path("."), exists=True, file_okay=False, help="Root of the project."),
+):
+    manifest, _ = ProjectScanner(path, store=manifest_store()).scan()
+    typer.echo(describe_manifest(manifest))
@@ -1,7 +1,5 @@
-import json
-from typing import List
-from pydantic import BaseModel, Field, RootModel
-import httpx
+from typing import List, Optional
+from pydantic import BaseModel, Field
 
 
 class SignUpHttpRequest(BaseModel):
@@ -19,9 +17,17 @@ class CreateChatHttpRequest(BaseModel):
     name: str
 
 
+class Attachment(BaseModel):
+    digest: str
+    name: str
+    size: int
+    truncated: bool = False
+
+
 class Message(BaseModel):
     role: str
     content: str
+    attachments: Optional[List[Attachment]] = None
 
 
 class ChatRequest(BaseModel):
@@ -1,8 +1,198 @@
-from typing import NamedTuple, Dict, Any, List
-from pydantic import BaseModel
+from typing import NamedTuple, Dict, Any, List, Optional, Tuple, Union
 
 
 class ConfigResponse(NamedTuple):
     error: int
 
 
+class ConfigSnapshot(NamedTuple):
+    neptun_api_server_host: Optional[str]
+    neptun_github_app_url: Optional[str]
+    neptun_session_cookie: Optional[str]
+    user_id: Optional[str]
+    email: Optional[str]
+    chat_id: Optional[str]
+    chat_name: Optional[str]
+    model: Optional[str]
+    http_max_connections: int
+    http_max_keepalive_connections: int
+    http_keepalive_expiry: float
+    http2: bool
+    http_connect_timeout: float
+    http_first_byte_timeout: float
+    http_chunk_timeout: float
+    http_retries: int
+    http_backoff_base: float
+    http_backoff_max: float
+    http_breaker_threshold: int
+    http_breaker_reset: float
+    http_hedge_delay: Optional[float]
+    http_compress_requests: bool
+    context_max_tokens: Optional[int]
+    context_keep_last: int
+    context_collapse_code: bool
+    tui_fps: int
+    tui_idle_timeout: float
+    metrics_enabled: bool
+    metrics_max_samples: int
+    log_level: str
+    log_max_bytes: int
+    log_backup_count: int
+    log_max_body_chars: int
+    cache_enabled: bool
+    cache_max_bytes: int
+    auth_status_ttl: float
+    attachment_max_bytes: int
+    attachment_chunk_size: int
+
+
+class TrimReport(NamedTuple):
+    messages_trimmed: int
+    tokens_trimmed: int
+    tokens_sent: int
+
+
+class RenderStats(NamedTuple):
+    frames: int
+    updates: int
+    dropped_updates: int
+    cpu_time: float
+    uptime: float
+
+
+class BatchJob(NamedTuple):
+    id: Any
+    prompt: str
+    model: Optional[str]
+
+
+class BatchResult(NamedTuple):
+    id: Any
+    model: Optional[str]
+    output: str
+    error: Optional[str]
+    latency: float
+
+
+class ModelRunStats(NamedTuple):
+    model: str
+    output: str
+    error: Optional[str]
+    time_to_first_token: Optional[float]
+    latency: float
+    tokens: int
+    tokens_per_second: Optional[float]
+
+
+class RequestTiming(NamedTuple):
+    method: str
+    endpoint: str
+    model: Optional[str]
+    status: Optional[int]
+    error: Optional[str]
+    connect: Optional[float]
+    tls: Optional[float]
+    time_to_first_byte: Optional[float]
+    transfer: Optional[float]
+    total: float
+    request_bytes: int
+    response_bytes: int
+    recorded_at: float
+
+
+class TimingSummary(NamedTuple):
+    name: str
+    count: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    ttfb_p50: Optional[float]
+    ttfb_p95: Optional[float]
+    ttfb_p99: Optional[float]
+    response_bytes: int
+
+
+class AuthVerdict(NamedTuple):
+    fingerprint: str
+    authenticated: bool
+    checked_at: float
+
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    body: bytes
+
+
+class FileEntry(NamedTuple):
+    size: int
+    mtime_ns: int
+    digest: str
+    stack: Tuple[str, ...]
+
+
+class ProjectManifest(NamedTuple):
+    root: str
+    files: Dict[str, FileEntry]
+    scanned_at: float
+
+
+class ScanReport(NamedTuple):
+    files: int
+    hashed: int
+    reused: int
+    removed: int
+    ignored: int
+    bytes_hashed: int
+    elapsed: float
+
+
+class IndexEntry(NamedTuple):
+    object_id: str
+    mtime_s: int
+    mtime_ns: int
+    size: int
+    mode: int
+
+
+class RepositoryDelta(NamedTuple):
+    added: List[str]
+    modified: List[str]
+    deleted: List[str]
+    tracked: int
+    hashed: int
+    first_snapshot: bool
+    identities: Dict[str, str]
+    elapsed: float
+
+
+class AttachmentReport(NamedTuple):
+    uploaded: int
+    referenced: int
+    bytes_read: int
+    bytes_sent: int
+    elapsed: float
+
+
+class TextDelta(NamedTuple):
+    text: str
+
+
+class FinishEvent(NamedTuple):
+    finish_reason: Optional[str]
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+
+
+class ErrorEvent(NamedTuple):
+    message: str
+
+
+class DataEvent(NamedTuple):
+    type: str
+    value: Any
+
+
+StreamEvent = Union[TextDelta, FinishEvent, ErrorEvent, DataEvent]
@@ -0,0 +1,153 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from neptun.model.responses import CachedResponse
+from neptun.utils.managers import CONFIG_FILE_PATH
+
+CACHE_DB_PATH = CONFIG_FILE_PATH.parent / "cache.db"
+MAX_BYTES = 16 * 1024 * 1024
+
+# only what is needed to hand the body back, the transfer headers describe the original wire format
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS responses_by_path ON responses (path);
+CREATE INDEX IF NOT EXISTS responses_by_access ON responses (accessed_at);
+"""
+
+
+def cache_key(request: httpx.Request) -> str:
+    return f"{request.method} {request.url}"
+
+
+def cache_path(url) -> str:
+    """The URL without its query, what invalidation is keyed on."""
+    return str(httpx.URL(str(url)).copy_with(query=None))
+
+
+class ResponseCache:
+    """Disk-backed LRU store of GET responses that carry a validator (ETag or Last-Modified).
+
+    Entries are never served without asking the server: `conditional_headers` turns an entry
+    into If-None-Match/If-Modified-Since and a 304 answer is replaced with the stored body.
+    The least recently used entries are evicted once the bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, max_bytes: int = MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def get(self, request: httpx.Request) -> Optional[CachedResponse]:
+        with self._lock, self.connection:
+            row = self.connection.execute("SELECT etag, last_modified, headers, body FROM responses WHERE key = ?",
+                                          (cache_key(request),)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                    (time.time(), cache_key(request)))
+
+        etag, last_modified, headers, body = row
+        return CachedResponse(etag=etag, last_modified=last_modified, headers=json.loads(headers), body=body)
+
+    @staticmethod
+    def conditional_headers(entry: CachedResponse) -> dict:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, response: httpx.Response) -> None:
+        """Keep a 200 answer that can be revalidated later, the body must have been read already."""
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if response.status_code != 200 or not (etag or last_modified) \
+                or "no-store" in response.headers.get("cache-control", ""):
+            return
+
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, path, etag, last_modified, headers, body, size, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(response.request), cache_path(response.request.url), etag, last_modified,
+                 json.dumps(headers), body, len(body), time.time()))
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        freed = 0
+        victims = []
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def replay(self, entry: CachedResponse, response: httpx.Response) -> httpx.Response:
+        """The stored answer in place of a 304, with any validators the server refreshed."""
+        headers = dict(entry.headers)
+        for name in ("etag", "last-modified"):
+            if name in response.headers:
+                headers[name] = response.headers[name]
+
+        if headers != entry.headers:
+            with self._lock, self.connection:
+                self.connection.execute("UPDATE responses SET etag = ?, last_modified = ?, headers = ? WHERE key = ?",
+                                        (headers.get("etag"), headers.get("last-modified"), json.dumps(headers),
+                                         cache_key(response.request)))
+
+        replayed = httpx.Response(200, headers=headers, content=entry.body, request=response.request,
+                                  extensions={"neptun.cache": "revalidated"})
+        replayed.read()
+        return replayed
+
+    def invalidate(self, *urls) -> None:
+        """Drop every cached response of these URLs, whatever their query."""
+        with self._lock, self.connection:
+            self.connection.executemany("DELETE FROM responses WHERE path = ?",
+                                        [(cache_path(url),) for url in urls])
+
+    def size(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self.connection.close()
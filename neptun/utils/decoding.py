@@ -0,0 +1,55 @@
+import json
+from functools import lru_cache
+from typing import Generic, Type, TypeVar, Union
+
+import httpx
+from pydantic import TypeAdapter, ValidationError
+
+T = TypeVar("T")
+E = TypeVar("E")
+
+
+@lru_cache(maxsize=None)
+def type_adapter(model: type) -> TypeAdapter:
+    """One adapter per model, its validator is built once and reused for every response."""
+    return TypeAdapter(model)
+
+
+def is_invalid_json(error: ValidationError) -> bool:
+    return any(detail["type"] == "json_invalid" for detail in error.errors())
+
+
+class ResponseDecoder(Generic[T, E]):
+    """Validates a response body straight from its bytes into the success or the error model.
+
+    The model is picked by status code (2xx is a success), so the body is parsed once and no
+    intermediate dict tree is built. The other model is only tried if the chosen one does not
+    fit, which covers servers that report errors with a 200.
+    """
+
+    def __init__(self, success: Type[T], error: Type[E]):
+        self.success = type_adapter(success)
+        self.error = type_adapter(error)
+
+    def decode(self, response: httpx.Response) -> Union[T, E]:
+        """A body that is not JSON at all (e.g. a proxy's HTML error page) becomes an error model built
+        from the status line, or raises json.JSONDecodeError if the status is 2xx."""
+        content = response.content
+        first, second = (self.success, self.error) if response.is_success else (self.error, self.success)
+
+        try:
+            return first.validate_json(content)
+        except ValidationError as error:
+            if is_invalid_json(error):
+                return self._decode_non_json(response)
+            try:
+                return second.validate_json(content)
+            except ValidationError:
+                raise error
+
+    def _decode_non_json(self, response: httpx.Response) -> E:
+        if response.is_success:
+            # what `response.json()` raised before, callers already handle it
+            raise json.JSONDecodeError("Response body is not valid JSON", response.text, 0)
+        return self.error.validate_python({"statusCode": response.status_code,
+                                           "statusMessage": response.reason_phrase or "Invalid response"})
@@ -1,5 +1,7 @@
+import math
+
 from neptun import ERRORS, DIR_ERROR, FILE_ERROR, JSON_ERROR, UPDATE_CONFIG_ERROR, CONFIG_KEY_NOT_FOUND_ERROR, ID_ERROR, \
-    NO_INTERNET_CONNECTION_ERROR
+    NO_INTERNET_CONNECTION_ERROR, CHAT_STREAM_ERROR, CIRCUIT_OPEN_ERROR, AUTH_SERVER_UNAVAILABLE_ERROR
 
 
 class BaseAppError(Exception):
@@ -47,3 +49,23 @@ class NoInternetConnectionError(BaseAppError):
 class NotAuthenticatedError(BaseAppError):
     def __init__(self):
         super().__init__(NO_INTERNET_CONNECTION_ERROR)
+
+
+class ChatStreamError(BaseAppError):
+    def __init__(self, message=None):
+        super().__init__(CHAT_STREAM_ERROR, message)
+
+
+class CircuitOpenError(BaseAppError):
+    def __init__(self, host=None, retry_in: float = None):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(CIRCUIT_OPEN_ERROR,
+                         f"Service unavailable ({host}), retry in {math.ceil(retry_in)}s" if host else None)
+
+
+class AuthServerUnavailableError(BaseAppError):
+    """The server gave no clear verdict on the session (a 5xx or no answer at all)."""
+
+    def __init__(self):
+        super().__init__(AUTH_SERVER_UNAVAILABLE_ERROR)
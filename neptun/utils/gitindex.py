@@ -0,0 +1,284 @@
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from neptun.model.responses import IndexEntry, RepositoryDelta
+from neptun.utils.managers import CONFIG_FILE_PATH
+
+REPOSITORIES_DIR_PATH = CONFIG_FILE_PATH.parent / "repositories"
+SNAPSHOT_VERSION = 2
+
+INDEX_SIGNATURE = b"DIRC"
+# ctime, mtime (seconds and nanoseconds), dev, ino, mode, uid, gid and size
+ENTRY_STATS = struct.Struct(">10I")
+EXTENDED_FLAG = 0x4000
+STAGE_MASK = 0x3000
+NAME_MASK = 0x0FFF
+S_IFDIR = 0o040000
+S_IFGITLINK = 0o160000
+
+MMAP_THRESHOLD = 1024 * 1024
+OBJECT_FORMAT = re.compile(r"^\s*objectformat\s*=\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+
+
+def find_git_dir(root: Path) -> Optional[Path]:
+    """The git directory of a work tree; `.git` may also be a file pointing elsewhere (worktrees, submodules)."""
+    dot_git = root / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        content = dot_git.read_text().strip()
+        if content.startswith("gitdir:"):
+            git_dir = Path(content[len("gitdir:"):].strip())
+            return git_dir if git_dir.is_absolute() else (root / git_dir).resolve()
+    return None
+
+
+def hash_algorithm(git_dir: Path) -> str:
+    try:
+        match = OBJECT_FORMAT.search((git_dir / "config").read_text())
+    except OSError:
+        match = None
+    return "sha256" if match and match.group(1).lower() == "sha256" else "sha1"
+
+
+def read_index(index_path: Path, digest_size: int = 20) -> Dict[str, IndexEntry]:
+    """Stage-0 entries of a git index (versions 2 to 4), keyed by path."""
+    data = index_path.read_bytes()
+    if data[:4] != INDEX_SIGNATURE:
+        raise ValueError(f"{index_path} is not a git index")
+
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        raise ValueError(f"unsupported git index version {version}")
+
+    entries: Dict[str, IndexEntry] = {}
+    offset, previous_path = 12, b""
+
+    for _ in range(count):
+        start = offset
+        stats = ENTRY_STATS.unpack_from(data, offset)
+        offset += ENTRY_STATS.size
+        object_id = data[offset:offset + digest_size].hex()
+        offset += digest_size
+        flags, = struct.unpack_from(">H", data, offset)
+        offset += 2
+        if version >= 3 and flags & EXTENDED_FLAG:
+            offset += 2
+
+        if version == 4:
+            # the path is stored as "drop N bytes of the previous path" plus a NUL-terminated suffix
+            strip, byte = 0, 0x80
+            first = True
+            while byte & 0x80:
+                byte = data[offset]
+                offset += 1
+                strip = byte & 0x7F if first else ((strip + 1) << 7) | (byte & 0x7F)
+                first = False
+            end = data.index(b"\0", offset)
+            path = previous_path[:len(previous_path) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            length = flags & NAME_MASK
+            end = data.index(b"\0", offset) if length == NAME_MASK else offset + length
+            path = data[offset:end]
+            # entries are NUL-padded to a multiple of eight bytes
+            offset = start + ((end - start) // 8 + 1) * 8
+
+        previous_path = path
+        mode = stats[6]
+        if flags & STAGE_MASK or mode & 0o170000 in (S_IFDIR, S_IFGITLINK):
+            continue
+
+        entries[path.decode("utf-8", errors="surrogateescape")] = IndexEntry(
+            object_id=object_id, mtime_s=stats[2], mtime_ns=stats[3], size=stats[9], mode=mode)
+
+    return entries
+
+
+def blob_id(path, size: int, algorithm: str = "sha1") -> str:
+    """The object id git gives the file's content, without writing anything to the repository."""
+    digest = hashlib.new(algorithm, b"blob %d\0" % size)
+
+    with open(path, "rb") as file:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def stat_matches(entry: IndexEntry, stat: os.stat_result, index_mtime_ns: int) -> bool:
+    """Like git's own check: the stat info still matches and the entry is not racily clean.
+
+    A file changed in the same timestamp granule in which the index was written can look
+    unchanged, so such entries are always hashed.
+    """
+    mtime_ns = entry.mtime_s * 1_000_000_000 + entry.mtime_ns
+    if mtime_ns >= index_mtime_ns:
+        return False
+    return (entry.size == stat.st_size & 0xFFFFFFFF and entry.mtime_s == int(stat.st_mtime)
+            and entry.mtime_ns in (0, stat.st_mtime_ns % 1_000_000_000))
+
+
+class SnapshotStore:
+    """The object ids last sent to the assistant, one gzipped JSON map per repository and chat.
+
+    Every chat has its own snapshot, a chat that never received the repository starts from scratch.
+    """
+
+    def __init__(self, directory=REPOSITORIES_DIR_PATH):
+        self.directory = Path(directory)
+
+    @classmethod
+    def next_to(cls, config_file_path) -> "SnapshotStore":
+        return cls(Path(config_file_path).parent / "repositories")
+
+    def path_for(self, root: Path, chat_id=None) -> Path:
+        key = f"{root}\0{chat_id or ''}"
+        return self.directory / f"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}.json.gz"
+
+    def load(self, root: Path, chat_id=None) -> Optional[Dict[str, str]]:
+        try:
+            data = json.loads(gzip.decompress(self.path_for(root, chat_id).read_bytes()))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != SNAPSHOT_VERSION or data.get("root") != str(root) \
+                or data.get("chat_id") != (str(chat_id) if chat_id else None):
+            return None
+        return data["files"]
+
+    def save(self, root: Path, files: Dict[str, str], chat_id=None) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(root, chat_id)
+        data = {"version": SNAPSHOT_VERSION, "root": str(root), "chat_id": str(chat_id) if chat_id else None,
+                "saved_at": time.time(), "files": files}
+
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(gzip.compress(json.dumps(data, separators=(",", ":")).encode(), compresslevel=1))
+        os.replace(temp_path, path)
+
+
+class Repository:
+    """A git work tree whose file identities come from its index instead of from hashing.
+
+    Tracked files whose stat info matches the index keep the index's object id; only the
+    others are read and hashed as git blobs. Untracked files are not considered.
+    """
+
+    def __init__(self, root, store: Optional[SnapshotStore] = None, chat_id=None):
+        self.root = Path(root).resolve()
+        # deltas are relative to what this chat has seen
+        self.chat_id = chat_id
+        self.git_dir = find_git_dir(self.root)
+        if self.git_dir is None:
+            raise ValueError(f"{self.root} is not a git work tree")
+        self.store = store or SnapshotStore()
+        self.algorithm = hash_algorithm(self.git_dir)
+
+    def identities(self) -> tuple[Dict[str, str], int]:
+        """Object id of every tracked file present in the work tree, and how many had to be hashed."""
+        index_path = self.git_dir / "index"
+        try:
+            index_mtime_ns = index_path.stat().st_mtime_ns
+            entries = read_index(index_path, 32 if self.algorithm == "sha256" else 20)
+        except FileNotFoundError:
+            return {}, 0
+
+        identities, hashed = {}, 0
+        # plain string paths, pathlib parsing would cost more than the stat call itself
+        prefix = f"{self.root}{os.sep}"
+        for path, entry in entries.items():
+            file_path = prefix + path
+            try:
+                stat = os.stat(file_path)
+                if stat_matches(entry, stat, index_mtime_ns):
+                    identities[path] = entry.object_id
+                else:
+                    identities[path] = blob_id(file_path, stat.st_size, self.algorithm)
+                    hashed += 1
+            except OSError:
+                # deleted from the work tree
+                continue
+
+        return identities, hashed
+
+    def delta(self, full: bool = False) -> RepositoryDelta:
+        """What changed since the last snapshot; everything counts as added if there is none (or with `full`)."""
+        start = time.perf_counter()
+        identities, hashed = self.identities()
+        previous = None if full else self.store.load(self.root, self.chat_id)
+        snapshot = previous or {}
+
+        return RepositoryDelta(
+            added=sorted(identities.keys() - snapshot.keys()),
+            modified=sorted(path for path, object_id in identities.items()
+                            if path in snapshot and snapshot[path] != object_id),
+            deleted=sorted(snapshot.keys() - identities.keys()),
+            tracked=len(identities),
+            hashed=hashed,
+            first_snapshot=previous is None,
+            identities=identities,
+            elapsed=time.perf_counter() - start)
+
+    def mark_sent(self, delta: RepositoryDelta) -> None:
+        """Remember the state the assistant has now seen, the next delta starts from here."""
+        self.store.save(self.root, delta.identities, self.chat_id)
+
+
+def _file_section(root: Path, path: str, budget: int) -> Optional[str]:
+    try:
+        content = (root / path).read_bytes()
+    except OSError:
+        return None
+    if b"\0" in content[:8192]:
+        return None
+
+    text = content.decode("utf-8", errors="replace")
+    if len(text) > budget:
+        text = text[:budget] + f"\n... [{len(text) - budget} more characters]"
+    return f"--- {path}\n```\n{text}\n```"
+
+
+def describe_delta(root, delta: RepositoryDelta, max_chars: int = 32_000, max_paths: int = 200) -> str:
+    """The change set as assistant context: changed paths, and the content of changed text files within
+    `max_chars`. A first snapshot is only summarized, sending a whole repository is rarely useful."""
+    root = Path(root)
+    changed = len(delta.added) + len(delta.modified) + len(delta.deleted)
+
+    if delta.first_snapshot:
+        lines = [f"Repository '{root.name}': {delta.tracked} tracked files (first snapshot, contents not included)."]
+    else:
+        lines = [f"Repository '{root.name}': {changed} of {delta.tracked} tracked files changed since the last "
+                 f"context ({len(delta.added)} added, {len(delta.modified)} modified, {len(delta.deleted)} deleted)."]
+        if not changed:
+            return lines[0]
+
+    for title, paths in (("Added", delta.added), ("Modified", delta.modified), ("Deleted", delta.deleted)):
+        if paths:
+            lines.append(f"{title}:")
+            lines += [f"- {path}" for path in paths[:max_paths]]
+            if len(paths) > max_paths:
+                lines.append(f"- ... {len(paths) - max_paths} more")
+
+    if not delta.first_snapshot:
+        budget = max_chars
+        for path in [*delta.modified, *delta.added]:
+            if budget <= 0:
+                lines.append("(remaining file contents omitted)")
+                break
+            section = _file_section(root, path, budget)
+            if section is not None:
+                lines.append(section)
+                budget -= len(section)
+
+    return "\n".join(lines)
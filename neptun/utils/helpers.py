@@ -5,6 +5,8 @@ from typing import List
 
 from pydantic import BaseModel
 
+from neptun.utils.parsers import parse_stream_text
+
 
 class ResponseContent(BaseModel):
     content: str
@@ -27,15 +29,7 @@ def singleton(cls):
 class ChatResponseConverter:
     @staticmethod
     def parse_response(response: str) -> str:
-        lines = response.splitlines()
-
-        parsed_lines = []
-
-        for line in lines:
-            parsed_line = line.split(':')[1].strip().strip('"')
-            parsed_lines.append(parsed_line)
-
-        return ''.join(parsed_lines)
+        return parse_stream_text(response)
 
     @staticmethod
     def clean_text(response: str) -> str:
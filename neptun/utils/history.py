@@ -0,0 +1,94 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from neptun.model.http_responses import Chat, ChatMessage
+from neptun.utils.managers import CONFIG_FILE_PATH
+
+HISTORY_DB_PATH = CONFIG_FILE_PATH.parent / "history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    model TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    neptun_user_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY,
+    chat_conversation_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    actor TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    neptun_user_id INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS chat_messages_by_chat ON chat_messages (chat_conversation_id, id);
+"""
+
+CHAT_COLUMNS = ("id", "name", "model", "created_at", "updated_at", "neptun_user_id")
+MESSAGE_COLUMNS = ("id", "chat_conversation_id", "message", "actor", "created_at", "updated_at", "neptun_user_id")
+
+
+class ChatHistoryStore:
+    """Local SQLite mirror of chats and their messages, so the chat can render before the network answers."""
+
+    def __init__(self, db_path=HISTORY_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def upsert_chats(self, chats: Iterable[Chat]) -> None:
+        rows = [tuple(getattr(chat, column) for column in CHAT_COLUMNS) for chat in chats]
+
+        with self._lock, self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO chats ({', '.join(CHAT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def get_chats(self) -> List[Chat]:
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(CHAT_COLUMNS)} FROM chats ORDER BY updated_at DESC").fetchall()
+
+        return [Chat(**dict(zip(CHAT_COLUMNS, row))) for row in rows]
+
+    def delete_chat(self, chat_id: int) -> None:
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM chat_messages WHERE chat_conversation_id = ?", (chat_id,))
+            self.connection.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+
+    def upsert_messages(self, messages: Iterable[ChatMessage]) -> None:
+        rows = [tuple(getattr(message, column) for column in MESSAGE_COLUMNS) for message in messages]
+
+        with self._lock, self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO chat_messages ({', '.join(MESSAGE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows)
+
+    def get_messages(self, chat_id: int, limit: Optional[int] = None) -> List[ChatMessage]:
+        """The latest `limit` messages of a chat (all of them if no limit is given), oldest first."""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(MESSAGE_COLUMNS)} FROM chat_messages WHERE chat_conversation_id = ? "
+                f"ORDER BY id DESC LIMIT ?", (chat_id, -1 if limit is None else limit)).fetchall()
+
+        return [ChatMessage(**dict(zip(MESSAGE_COLUMNS, row))) for row in reversed(rows)]
+
+    def get_sync_marker(self, chat_id: int) -> Tuple[Optional[int], Optional[str]]:
+        """Highest stored message id and updated_at of a chat; anything newer still has to be fetched."""
+        with self._lock:
+            return self.connection.execute(
+                "SELECT MAX(id), MAX(updated_at) FROM chat_messages WHERE chat_conversation_id = ?",
+                (chat_id,)).fetchone()
+
+    def close(self) -> None:
+        self.connection.close()
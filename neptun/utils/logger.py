@@ -0,0 +1,97 @@
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+from pathlib import Path
+
+from neptun.utils.managers import CONFIG_DIR_PATH, ConfigManager
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_FILE_NAME = "neptun.log"
+
+DEFAULT_MAX_BODY_CHARS = 2000
+
+_listener = None
+_max_body_chars = DEFAULT_MAX_BODY_CHARS
+
+
+class LogBody:
+    """Lazily rendered, truncated request/response body for %-style log calls.
+
+    logging.debug("Sent object: %s", LogBody(chat_request))
+
+    Nothing is serialized unless the record is actually emitted.
+    """
+
+    __slots__ = ("body",)
+
+    def __init__(self, body):
+        self.body = body
+
+    def __str__(self) -> str:
+        body = self.body
+        if hasattr(body, "model_dump_json"):
+            body = body.model_dump_json()
+        elif isinstance(body, bytes):
+            body = body.decode(errors="replace")
+        elif not isinstance(body, str):
+            body = str(body)
+
+        if _max_body_chars and len(body) > _max_body_chars:
+            return f"{body[:_max_body_chars]}... [{len(body) - _max_body_chars} more characters]"
+        return body
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler merges msg and args on the caller's thread, which for the event loop
+    means serializing every LogBody there. Records whose args are immutable or LogBody go on
+    the queue as they are; anything else could change before the listener gets to it and is
+    formatted right away as before.
+    """
+
+    DEFERRABLE_TYPES = (str, bytes, int, float, bool, type(None), LogBody)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if not isinstance(record.msg, str) or not isinstance(args, tuple) \
+                or not all(isinstance(arg, self.DEFERRABLE_TYPES) for arg in args):
+            return super().prepare(record)
+        return copy.copy(record)
+
+
+def setup_logging():
+    """Log to a size-rotated file under the app dir, written by a background thread.
+
+    The calling thread (e.g. the event loop) only puts records on a queue, the listener thread
+    formats and writes them. Level, rotation and body truncation come from the [logging] config
+    section. Safe to call more than once.
+    """
+    global _listener, _max_body_chars
+
+    if _listener is not None:
+        return
+
+    config = ConfigManager().snapshot()
+
+    log_file_path = Path(CONFIG_DIR_PATH) / LOG_FILE_NAME
+    log_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(log_file_path, maxBytes=config.log_max_bytes,
+                                                        backupCount=config.log_backup_count, delay=True,
+                                                        encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    _max_body_chars = config.log_max_body_chars
+
+    root_logger = logging.getLogger()
+    root_logger.addHandler(DeferredQueueHandler(log_queue))
+    level = logging.getLevelName(config.log_level.upper())
+    root_logger.setLevel(level if isinstance(level, int) else logging.INFO)
@@ -1,12 +1,21 @@
 import configparser
+import io
 import os
+import tempfile
+from contextlib import contextmanager
 from functools import wraps
 from pathlib import Path
 import typer
-from neptun.model.responses import ConfigResponse
+from neptun.model.responses import ConfigResponse, ConfigSnapshot
 from neptun import SUCCESS, CONFIG_KEY_NOT_FOUND_ERROR, __app_name__, DIR_ERROR, FILE_ERROR
 import json
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 
 CONFIG_DIR_PATH = Path(typer.get_app_dir(__app_name__))
 CONFIG_FILE_PATH = CONFIG_DIR_PATH / "config/config.ini"
@@ -30,22 +39,192 @@ def singleton(cls):
 def ensure_latest_config(method):
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        self.config.read(self.config_file_path)
+        self.reload_if_changed()
         return method(self, *args, **kwargs)
     return wrapper
 
 
+def file_signature(path) -> tuple | None:
+    """Cheap identity of a file's current content: (mtime_ns, size, inode)."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+@contextmanager
+def config_file_lock(config_file_path):
+    """Advisory lock that serializes config writers across neptun processes."""
+    with open(f"{config_file_path}.lock", 'a+') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, write):
+    """Let `write(file)` fill a temp file next to `path`, fsync it and swap it in with os.replace."""
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                             prefix=".config-", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, 'w') as temp_file:
+            write(temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def copy_config(config: configparser.ConfigParser) -> configparser.ConfigParser:
+    """An independent copy; round-tripping through the ini format keeps values raw (uninterpolated)."""
+    buffer = io.StringIO()
+    config.write(buffer)
+    copy = configparser.ConfigParser()
+    copy.read_string(buffer.getvalue())
+    return copy
+
+
+class ConfigBatch:
+    """Updates collected inside `ConfigManager.transaction()` and committed in one write."""
+
+    def __init__(self):
+        self.operations = []
+
+    def set(self, section: str, key: str, value: str):
+        self.operations.append((section, key, value))
+
+    def delete(self, section: str, key: str):
+        self.operations.append((section, key, None))
+
+    def apply(self, config: configparser.ConfigParser):
+        for section, key, value in self.operations:
+            if value is None:
+                if config.has_section(section):
+                    config.remove_option(section, key)
+                continue
+
+            if section not in config:
+                config.add_section(section)
+            config[section][key] = value
+
+
 @singleton
 class ConfigManager:
     def __init__(self, config_file_path=CONFIG_FILE_PATH):
         self.config_file_path = config_file_path
         self.config = configparser.ConfigParser()
+        self._signature = None
+        self._snapshot = None
         self._ensure_config_file_exists()
 
     def set_config_file_path(self, path: str):
         self.config_file_path = path
+        self._signature = None
         self._ensure_config_file_exists()
-        self.config.read(self.config_file_path)
+        self.reload_if_changed()
+
+    def reload_if_changed(self):
+        """Re-parse the config file only if its stat signature changed since the last parse."""
+        signature = file_signature(self.config_file_path)
+
+        if signature is not None and signature == self._signature:
+            return
+
+        config = configparser.ConfigParser()
+        config.read(self.config_file_path)
+
+        self.config = config
+        self._signature = signature
+        self._snapshot = None
+
+    def _mark_written(self):
+        self._signature = file_signature(self.config_file_path)
+        self._snapshot = None
+
+    @contextmanager
+    def transaction(self):
+        """Collect updates and commit them with a single locked, atomic write.
+
+        with config_manager.transaction() as batch:
+            batch.set("active_chat", "chat_id", "12")
+            batch.set("active_chat", "model", "mistralai/Mistral-7B-Instruct-v0.1")
+        """
+        batch = ConfigBatch()
+        yield batch
+
+        if not batch.operations:
+            return
+
+        with config_file_lock(self.config_file_path):
+            # Another process may have committed since our last read, apply the batch on top of its state.
+            self.reload_if_changed()
+            # readers keep seeing the old config until the new one is actually on disk
+            config = copy_config(self.config)
+            batch.apply(config)
+            atomic_write(self.config_file_path, config.write)
+            self.config = config
+            self._mark_written()
+
+    @ensure_latest_config
+    def snapshot(self) -> ConfigSnapshot:
+        """Typed view of the current config that services can capture once per request."""
+        if self._snapshot is None:
+            get = self.config.get
+            self._snapshot = ConfigSnapshot(
+                neptun_api_server_host=get('utils', 'neptun_api_server_host', fallback=None),
+                neptun_github_app_url=get('utils', 'neptun_github_app_url', fallback=None),
+                neptun_session_cookie=get('auth', 'neptun_session_cookie', fallback=None),
+                user_id=get('auth.user', 'id', fallback=None),
+                email=get('auth.user', 'email', fallback=None),
+                chat_id=get('active_chat', 'chat_id', fallback=None),
+                chat_name=get('active_chat', 'chat_name', fallback=None),
+                model=get('active_chat', 'model', fallback=None),
+                http_max_connections=self.config.getint('http', 'max_connections', fallback=10),
+                http_max_keepalive_connections=self.config.getint('http', 'max_keepalive_connections',
+                                                                  fallback=5),
+                http_keepalive_expiry=self.config.getfloat('http', 'keepalive_expiry', fallback=30.0),
+                http2=self.config.getboolean('http', 'http2', fallback=False),
+                http_connect_timeout=self.config.getfloat('http', 'connect_timeout', fallback=5.0),
+                http_first_byte_timeout=self.config.getfloat('http', 'first_byte_timeout', fallback=60.0),
+                http_chunk_timeout=self.config.getfloat('http', 'chunk_timeout', fallback=30.0),
+                http_retries=self.config.getint('http', 'retries', fallback=3),
+                http_backoff_base=self.config.getfloat('http', 'backoff_base', fallback=0.25),
+                http_backoff_max=self.config.getfloat('http', 'backoff_max', fallback=4.0),
+                http_breaker_threshold=self.config.getint('http', 'breaker_threshold', fallback=5),
+                http_breaker_reset=self.config.getfloat('http', 'breaker_reset', fallback=30.0),
+                http_hedge_delay=float(get('http', 'hedge_delay', fallback='') or 0) or None,
+                http_compress_requests=self.config.getboolean('http', 'compress_requests', fallback=True),
+                context_max_tokens=int(get('context', 'max_tokens', fallback='') or 0) or None,
+                context_keep_last=self.config.getint('context', 'keep_last', fallback=0),
+                context_collapse_code=self.config.getboolean('context', 'collapse_code', fallback=True),
+                tui_fps=self.config.getint('tui', 'fps', fallback=30),
+                tui_idle_timeout=self.config.getfloat('tui', 'idle_timeout', fallback=10.0),
+                metrics_enabled=self.config.getboolean('metrics', 'enabled', fallback=True),
+                metrics_max_samples=self.config.getint('metrics', 'max_samples', fallback=5000),
+                log_level=get('logging', 'level', fallback='INFO'),
+                log_max_bytes=self.config.getint('logging', 'max_bytes', fallback=1048576),
+                log_backup_count=self.config.getint('logging', 'backup_count', fallback=3),
+                log_max_body_chars=self.config.getint('logging', 'max_body_chars', fallback=2000),
+                cache_enabled=self.config.getboolean('cache', 'enabled', fallback=True),
+                cache_max_bytes=self.config.getint('cache', 'max_bytes', fallback=16777216),
+                auth_status_ttl=self.config.getfloat('session', 'status_ttl', fallback=300.0),
+                attachment_max_bytes=self.config.getint('attachments', 'max_bytes', fallback=1048576),
+                attachment_chunk_size=self.config.getint('attachments', 'chunk_size', fallback=262144),
+            )
+        return self._snapshot
 
     def search_for_configuration_and_configure(self):
         current_working_directory = Path(f"{os.getcwd()}/{__app_name__}-config.json")
@@ -56,13 +235,14 @@ class ConfigManager:
 
     def _write_default_config(self, config_file_path=DEFAULT_CONFIG):
         """Write the default configuration to the file."""
-        with open(self.config_file_path, 'w') as configfile:
-            self._write_section(configfile, "", config_file_path)
+        with config_file_lock(self.config_file_path):
+            atomic_write(self.config_file_path,
+                         lambda configfile: self._write_section(configfile, "", config_file_path))
 
     def write_provided_custom_config(self, path: str):
         """Write the provided configuration to the file."""
-        with open(path, 'w') as configfile:
-            self._write_section(configfile, "", DEFAULT_CONFIG)
+        with config_file_lock(path):
+            atomic_write(path, lambda configfile: self._write_section(configfile, "", DEFAULT_CONFIG))
 
     def _write_section(self, file, parent_section, section_dict, level=0):
         """Write a section and its nested sections to the file."""
@@ -76,33 +256,25 @@ class ConfigManager:
 
     def _ensure_config_file_exists(self):
         """Ensure the configuration directory and file exist."""
-        if not CONFIG_DIR_PATH.exists():
-            CONFIG_DIR_PATH.mkdir(parents=True, exist_ok=True)
-        if not CONFIG_FILE_PATH.exists():
-            CONFIG_FILE_PATH.touch()
+        config_file_path = Path(self.config_file_path)
+        if not config_file_path.parent.exists():
+            config_file_path.parent.mkdir(parents=True, exist_ok=True)
+        if not config_file_path.exists():
             self._write_default_config()
 
     @ensure_latest_config
     def read_config(self, section: str, key: str) -> str:
         return self.config[section][key]
 
-    @ensure_latest_config
     def write_config(self, section: str, key: str, value: str):
-        if section not in self.config:
-            self.config.add_section(section)
-
-        self.config[section][key] = value
-
-        with open(self.config_file_path, 'w') as configfile:
-            self.config.write(configfile)
+        with self.transaction() as batch:
+            batch.set(section, key, value)
 
     @ensure_latest_config
     def update_config(self, section: str, key: str, value: str) -> ConfigResponse:
         if section in self.config.sections() and key in self.config[section].keys():
-            self.config[section][key] = value
-
-            with open(self.config_file_path, 'w') as configfile:
-                self.config.write(configfile)
+            with self.transaction() as batch:
+                batch.set(section, key, value)
 
             return SUCCESS
         else:
@@ -111,10 +283,8 @@ class ConfigManager:
     @ensure_latest_config
     def delete_config(self, section: str, key: str):
         if section in self.config and key in self.config[section]:
-            self.config.remove_option(section, key)
-
-            with open(self.config_file_path, 'w') as configfile:
-                self.config.write(configfile)
+            with self.transaction() as batch:
+                batch.delete(section, key)
 
             print(f"Configuration '{key}' removed from section '{section}'")
         else:
@@ -160,15 +330,17 @@ class ConfigManager:
             return DIR_ERROR
 
     def update_authentication(self, id, session_cookie, email):
-        self.write_config("auth.user", "id", str(id))
-        self.write_config("auth.user", "email", str(email))
-        self.write_config("auth", "neptun_session_cookie", str(session_cookie))
+        with self.transaction() as batch:
+            batch.set("auth.user", "id", str(id))
+            batch.set("auth.user", "email", str(email))
+            batch.set("auth", "neptun_session_cookie", str(session_cookie))
         return SUCCESS
 
     def update_active_chat(self, id, name, model):
-        self.write_config("active_chat", "chat_id", str(id))
-        self.write_config("active_chat", "chat_name", str(name))
-        self.write_config("active_chat", "model", str(model))
+        with self.transaction() as batch:
+            batch.set("active_chat", "chat_id", str(id))
+            batch.set("active_chat", "chat_name", str(name))
+            batch.set("active_chat", "model", str(model))
         return SUCCESS
 
     @ensure_latest_config
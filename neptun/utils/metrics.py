@@ -0,0 +1,284 @@
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+import httpx
+
+from neptun.model.responses import RequestTiming, TimingSummary
+from neptun.utils.managers import CONFIG_FILE_PATH
+
+METRICS_DB_PATH = CONFIG_FILE_PATH.parent / "metrics.db"
+MAX_SAMPLES = 5000
+FLUSH_EVERY = 20
+
+# upper bounds of the latency histogram buckets, in seconds
+HISTOGRAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+MODEL_PATH = re.compile(r"^(?P<prefix>/ai/[^/]+)/(?P<publisher>[^/]+)/(?P<model>[^/]+)(?P<suffix>/.*)?$")
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS request_timings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    model TEXT,
+    status INTEGER,
+    error TEXT,
+    connect REAL,
+    tls REAL,
+    time_to_first_byte REAL,
+    transfer REAL,
+    total REAL NOT NULL,
+    request_bytes INTEGER NOT NULL,
+    response_bytes INTEGER NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+TIMING_COLUMNS = RequestTiming._fields
+
+
+def split_endpoint(url: httpx.URL) -> tuple[str, Optional[str]]:
+    """Group requests by route: ids become `{id}` and the model of AI routes is reported separately."""
+    path = url.path
+    match = MODEL_PATH.match(path)
+    if match:
+        return f"{match['prefix']}/{{model}}{match['suffix'] or ''}", f"{match['publisher']}/{match['model']}"
+
+    return ID_SEGMENT.sub("/{id}", path), None
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def histogram(values: Iterable[float], buckets=HISTOGRAM_BUCKETS) -> List[int]:
+    counts = [0] * len(buckets)
+    for value in values:
+        counts[next(index for index, bound in enumerate(buckets) if value <= bound)] += 1
+    return counts
+
+
+def summarize(timings: List[RequestTiming], key: Callable[[RequestTiming], Optional[str]]) -> List[TimingSummary]:
+    groups: dict[str, List[RequestTiming]] = {}
+    for timing in timings:
+        name = key(timing)
+        if name is not None:
+            groups.setdefault(name, []).append(timing)
+
+    summaries = []
+    for name, group in sorted(groups.items()):
+        totals = [timing.total for timing in group]
+        first_bytes = [timing.time_to_first_byte for timing in group if timing.time_to_first_byte is not None]
+        summaries.append(TimingSummary(name=name,
+                                       count=len(group),
+                                       errors=sum(1 for timing in group if timing.error or (timing.status or 0) >= 500),
+                                       p50=percentile(totals, 0.5),
+                                       p95=percentile(totals, 0.95),
+                                       p99=percentile(totals, 0.99),
+                                       ttfb_p50=percentile(first_bytes, 0.5),
+                                       ttfb_p95=percentile(first_bytes, 0.95),
+                                       ttfb_p99=percentile(first_bytes, 0.99),
+                                       response_bytes=sum(timing.response_bytes for timing in group)))
+    return summaries
+
+
+class MetricsStore:
+    """Rolling SQLite store of the last `max_samples` request timings.
+
+    Timings are buffered and written in batches by a background thread (and on close), so recording
+    one costs no disk I/O on the request path.
+    """
+
+    def __init__(self, db_path=METRICS_DB_PATH, max_samples: int = MAX_SAMPLES):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_samples = max_samples
+
+        self._buffer: List[RequestTiming] = []
+        # the buffer and the connection have their own locks, recording never waits for a write
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def record(self, timing: RequestTiming) -> None:
+        with self._lock:
+            self._buffer.append(timing)
+            if len(self._buffer) < FLUSH_EVERY or self._closed:
+                return
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_batches, name="neptun-metrics", daemon=True)
+                self._writer.start()
+        self._wake.set()
+
+    def _write_batches(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+
+        with self._db_lock:
+            with self.connection:
+                self.connection.executemany(
+                    f"INSERT INTO request_timings ({', '.join(TIMING_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(TIMING_COLUMNS))})", rows)
+                self.connection.execute(
+                    "DELETE FROM request_timings WHERE id <= (SELECT MAX(id) FROM request_timings) - ?",
+                    (self.max_samples,))
+
+    def get_timings(self, limit: Optional[int] = None) -> List[RequestTiming]:
+        """The latest timings, oldest first."""
+        self.flush()
+        with self._db_lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(TIMING_COLUMNS)} FROM request_timings ORDER BY id DESC LIMIT ?",
+                (limit or self.max_samples,)).fetchall()
+
+        return [RequestTiming(*row) for row in reversed(rows)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer = []
+        with self._db_lock, self.connection:
+            self.connection.execute("DELETE FROM request_timings")
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        self.connection.close()
+
+
+class CountingStream:
+    """A request body that counts the bytes actually sent, streamed and chunked uploads included."""
+
+    def __init__(self, stream, timer: "RequestTimer"):
+        self.stream = stream
+        self.timer = timer
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.timer.request_bytes += len(chunk)
+            yield chunk
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.timer.request_bytes += len(chunk)
+            yield chunk
+
+
+class RequestTimer:
+    """Collects the httpcore trace events of one request into a RequestTiming."""
+
+    def __init__(self, request: httpx.Request, record: Callable[[RequestTiming], None]):
+        self.request = request
+        self.record = record
+        self.response: Optional[httpx.Response] = None
+        self.started_at = time.perf_counter()
+        self.marks: dict[str, float] = {}
+        self.request_bytes = 0
+        self.done = False
+
+    def trace(self, name: str, info: dict) -> None:
+        # names look like "connection.connect_tcp.started" or "http11.receive_response_headers.complete"
+        event = name.split(".", 1)[1]
+        self.marks.setdefault(event, time.perf_counter())
+
+        if event == "send_request_body.started" and "request" in info:
+            # the content-length header is missing for chunked uploads, count what httpcore writes instead
+            info["request"].stream = CountingStream(info["request"].stream, self)
+        elif event.endswith(".failed"):
+            self.finish(error=repr(info.get("exception")))
+        elif event == "response_closed.started":
+            self.finish()
+
+    async def atrace(self, name: str, info: dict) -> None:
+        self.trace(name, info)
+
+    def _between(self, start: str, end: str) -> Optional[float]:
+        if start in self.marks and end in self.marks:
+            return self.marks[end] - self.marks[start]
+        return None
+
+    def finish(self, error: Optional[str] = None) -> None:
+        if self.done:
+            return
+        self.done = True
+
+        now = time.perf_counter()
+        endpoint, model = split_endpoint(self.request.url)
+        headers_received = self.marks.get("receive_response_headers.complete")
+
+        self.record(RequestTiming(
+            method=self.request.method,
+            endpoint=endpoint,
+            model=model,
+            status=self.response.status_code if self.response is not None else None,
+            error=error,
+            # DNS resolution happens inside the TCP connect, it is included here
+            connect=self._between("connect_tcp.started", "connect_tcp.complete"),
+            tls=self._between("start_tls.started", "start_tls.complete"),
+            time_to_first_byte=headers_received - self.started_at if headers_received else None,
+            transfer=now - headers_received if headers_received else None,
+            total=now - self.started_at,
+            request_bytes=self.request_bytes,
+            response_bytes=self.response.num_bytes_downloaded if self.response is not None else 0,
+            recorded_at=time.time(),
+        ))
+
+
+class RequestTracer:
+    """httpx event hooks that time every request of a client and pass the results to `record`."""
+
+    EXTENSION = "neptun.timer"
+
+    def __init__(self, record: Callable[[RequestTiming], None]):
+        self.record = record
+
+    def _on_request(self, request: httpx.Request) -> RequestTimer:
+        timer = RequestTimer(request, self.record)
+        request.extensions[self.EXTENSION] = timer
+        return timer
+
+    def _on_response(self, response: httpx.Response) -> None:
+        timer = response.request.extensions.get(self.EXTENSION)
+        if timer is not None:
+            timer.response = response
+
+    def event_hooks(self) -> dict:
+        def on_request(request: httpx.Request):
+            request.extensions["trace"] = self._on_request(request).trace
+
+        return {"request": [on_request], "response": [self._on_response]}
+
+    def async_event_hooks(self) -> dict:
+        async def on_request(request: httpx.Request):
+            request.extensions["trace"] = self._on_request(request).atrace
+
+        async def on_response(response: httpx.Response):
+            self._on_response(response)
+
+        return {"request": [on_request], "response": [on_response]}
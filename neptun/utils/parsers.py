@@ -0,0 +1,119 @@
+import json
+import logging
+import re
+from typing import List, Union
+
+from neptun.model.responses import TextDelta, FinishEvent, ErrorEvent, DataEvent, StreamEvent
+
+FRAME_SEPARATOR = b'\n'
+TYPE_SEPARATOR = b':'
+
+TEXT_FRAME = b'0'
+ERROR_FRAME = b'3'
+FINISH_MESSAGE_FRAME = b'd'
+
+TEXT_RUN = re.compile(rb'(?:0:"[^"\\\n]*(?:\\.[^"\\\n]*)*"\n)+')
+
+
+class DataStreamParser:
+    """Incremental parser for the AI data-stream protocol.
+
+    Every frame is a `<type>:<json>` line. Chunks may split frames anywhere (even inside a
+    multi-byte character); only the unfinished trailing frame is buffered between calls.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk: Union[bytes, str]) -> List[StreamEvent]:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+
+        events: List[StreamEvent] = []
+
+        end = chunk.rfind(FRAME_SEPARATOR)
+        if end == -1:
+            self._buffer += chunk
+            return events
+
+        start = 0
+        if self._buffer:
+            start = chunk.find(FRAME_SEPARATOR) + 1
+            self._buffer += chunk[:start]
+            self._parse_frames(bytes(self._buffer), 0, len(self._buffer), events)
+            self._buffer.clear()
+
+        self._parse_frames(chunk, start, end + 1, events)
+        self._buffer += chunk[end + 1:]
+
+        return events
+
+    def close(self) -> List[StreamEvent]:
+        """Flush a trailing frame that was not terminated by a newline."""
+        events: List[StreamEvent] = []
+
+        if self._buffer:
+            self._parse_frame(bytes(self._buffer), events)
+            self._buffer.clear()
+
+        return events
+
+    def _parse_frames(self, data: bytes, position: int, stop: int, events: List[StreamEvent]) -> None:
+        """Parse the complete, newline-terminated frames in `data[position:stop]`."""
+        while position < stop:
+            # Runs of text frames are by far the most common case: decode them as one json array.
+            run = TEXT_RUN.match(data, position, stop)
+            if run:
+                tokens = data[position + 2:run.end() - 1].replace(b'\n0:', b',')
+                try:
+                    events.append(TextDelta(''.join(json.loads(b'[' + tokens + b']'))))
+                except ValueError:
+                    for frame in data[position:run.end() - 1].split(FRAME_SEPARATOR):
+                        self._parse_frame(frame, events)
+                position = run.end()
+                continue
+
+            end = data.find(FRAME_SEPARATOR, position, stop)
+            self._parse_frame(data[position:end], events)
+            position = end + 1
+
+    @staticmethod
+    def _parse_frame(frame: bytes, events: List[StreamEvent]) -> None:
+        if frame.endswith(b'\r'):
+            frame = frame[:-1]
+        if not frame:
+            return
+
+        separator = frame.find(TYPE_SEPARATOR)
+        if separator <= 0:
+            logging.warning("Skipping malformed stream frame: %r", frame[:80])
+            return
+
+        frame_type = frame[:separator]
+        payload = frame[separator + 1:]
+
+        try:
+            value = json.loads(payload)
+        except ValueError:
+            logging.warning("Skipping stream frame with invalid payload: %r", frame[:80])
+            return
+
+        if frame_type == TEXT_FRAME:
+            events.append(TextDelta(value))
+        elif frame_type == ERROR_FRAME:
+            events.append(ErrorEvent(str(value)))
+        elif frame_type == FINISH_MESSAGE_FRAME and isinstance(value, dict):
+            usage = value.get("usage") or {}
+            events.append(FinishEvent(finish_reason=value.get("finishReason"),
+                                      prompt_tokens=usage.get("promptTokens"),
+                                      completion_tokens=usage.get("completionTokens")))
+        else:
+            events.append(DataEvent(frame_type.decode(), value))
+
+
+def parse_stream_text(response: str) -> str:
+    """Join the text deltas of a complete data-stream body."""
+    parser = DataStreamParser()
+    events = parser.feed(response) + parser.close()
+
+    return ''.join(event.text for event in events if isinstance(event, TextDelta))
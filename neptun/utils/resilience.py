@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import AsyncIterator, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from neptun.model.responses import ConfigSnapshot
+from neptun.utils.exceptions import CircuitOpenError
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT"})
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+class CircuitBreaker:
+    """Stops calling a host after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds a single trial request is let through (half-open); its
+    outcome closes the circuit again or restarts the timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the next trial request is let through."""
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class ResilienceLayer:
+    """Retries, per-host circuit breakers and hedging around the shared httpx clients.
+
+    Idempotent requests are retried on transport errors and on 429/502/503/504 with jittered
+    exponential backoff. Other requests are only retried when the connection could not be
+    established, since the server never saw them. A hedged request sends a second copy if the
+    first has not answered within `hedge_delay` seconds and uses whichever answers first.
+    """
+
+    def __init__(self, retries: int = 3, backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 breaker_threshold: int = 5, breaker_reset: float = 30.0, hedge_delay: float | None = None,
+                 chunk_timeout: float | None = 30.0):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.hedge_delay = hedge_delay
+        self.chunk_timeout = chunk_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: ConfigSnapshot) -> "ResilienceLayer":
+        return cls(retries=config.http_retries,
+                   backoff_base=config.http_backoff_base,
+                   backoff_max=config.http_backoff_max,
+                   breaker_threshold=config.http_breaker_threshold,
+                   breaker_reset=config.http_breaker_reset,
+                   hedge_delay=config.http_hedge_delay,
+                   chunk_timeout=config.http_chunk_timeout)
+
+    def breaker(self, url) -> CircuitBreaker:
+        host = urlsplit(str(url)).netloc
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return self.breakers[host]
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: a random delay up to the exponential backoff of this attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _should_retry(self, method: str, attempt: int, error: Exception = None,
+                      response: httpx.Response = None) -> bool:
+        if attempt >= self.retries:
+            return False
+        if error is not None:
+            return method in IDEMPOTENT_METHODS or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+        return method in IDEMPOTENT_METHODS and response.status_code in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def _record(breaker: CircuitBreaker, error: Exception = None, response: httpx.Response = None) -> None:
+        if error is not None or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def send(self, client: httpx.Client, method: str, url, hedge: bool = False, **kwargs) -> httpx.Response:
+        breaker = self.breaker(url)
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(urlsplit(str(url)).netloc, breaker.retry_in)
+
+            def request():
+                return client.request(method, url, **kwargs)
+
+            try:
+                response = self._hedged(request) if hedge and self.hedge_delay else request()
+            except httpx.TransportError as e:
+                self._record(breaker, error=e)
+                if not self._should_retry(method, attempt, error=e):
+                    raise
+                logging.debug("Retrying %s %s after %r", method, url, e)
+            else:
+                self._record(breaker, response=response)
+                if not self._should_retry(method, attempt, response=response):
+                    return response
+                logging.debug("Retrying %s %s after status %d", method, url, response.status_code)
+                response.close()
+
+            time.sleep(self.backoff(attempt))
+
+    async def asend(self, client: httpx.AsyncClient, method: str, url, hedge: bool = False, stream: bool = False,
+                    **kwargs) -> httpx.Response:
+        """Async `send`; with `stream=True` the body is not read and the caller must close the response."""
+        breaker = self.breaker(url)
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(urlsplit(str(url)).netloc, breaker.retry_in)
+
+            async def request():
+                return await client.send(client.build_request(method, url, **kwargs), stream=stream)
+
+            try:
+                response = await (self._ahedged(request) if hedge and self.hedge_delay else request())
+            except httpx.TransportError as e:
+                self._record(breaker, error=e)
+                if not self._should_retry(method, attempt, error=e):
+                    raise
+                logging.debug("Retrying %s %s after %r", method, url, e)
+            else:
+                self._record(breaker, response=response)
+                if not self._should_retry(method, attempt, response=response):
+                    return response
+                logging.debug("Retrying %s %s after status %d", method, url, response.status_code)
+                await response.aclose()
+
+            await asyncio.sleep(self.backoff(attempt))
+
+    async def iter_chunks(self, response: httpx.Response) -> AsyncIterator[bytes]:
+        """Stream the body, failing if the server goes quiet for longer than the chunk timeout."""
+        chunks = response.aiter_bytes().__aiter__()
+
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.chunk_timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise httpx.ReadTimeout(f"No data received for {self.chunk_timeout}s", request=response.request)
+            yield chunk
+
+    def _hedged(self, request: Callable[[], httpx.Response]) -> httpx.Response:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="neptun-hedge")
+
+        first = self._executor.submit(request)
+        done, _ = wait([first], timeout=self.hedge_delay)
+        if done:
+            return first.result()
+
+        futures = {first, self._executor.submit(request)}
+        winner, pending = None, futures
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+        if winner is None:
+            return first.result()
+
+        # the slower copy finishes in the background, its response is closed as soon as it arrives
+        for future in futures - {winner}:
+            future.add_done_callback(self._close_response)
+        return winner.result()
+
+    @staticmethod
+    def _close_response(future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    async def _ahedged(self, request) -> httpx.Response:
+        first = asyncio.ensure_future(request())
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_delay)
+        if done:
+            return first.result()
+
+        tasks = {first, asyncio.ensure_future(request())}
+        winner, pending = None, tasks
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+            return (winner or first).result()
+        finally:
+            # a copy that also answered is closed, one still in flight is cancelled
+            for task in tasks - {winner}:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    await task.result().aclose()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Iterable, Iterator, List
+
+from neptun import DEFAULT_CONCURRENCY
+from neptun.bot.context import estimate_tokens
+from neptun.model.http_requests import Attachment, ChatRequest, CreateChatHttpRequest, Message
+from neptun.model.http_responses import CreateChatHttpResponse
+from neptun.model.responses import BatchJob, BatchResult, ModelRunStats, TextDelta, FinishEvent, ErrorEvent
+from neptun.utils.exceptions import ChatStreamError
+from neptun.utils.services import ChatService
+
+
+@asynccontextmanager
+async def headless_chat(chat_id=None, model: str = None, name: str = "neptun ask") -> AsyncIterator[int]:
+    """The chat headless prompts are posted to: `chat_id` if one is given, otherwise a temporary chat that
+    is deleted again afterwards, so they never end up in the history of the user's active chat."""
+    if chat_id is not None:
+        yield chat_id
+        return
+
+    chat_service = ChatService()
+    model = model or chat_service.config_manager.snapshot().model
+    result = await asyncio.to_thread(chat_service.create_chat, CreateChatHttpRequest(name=name, model=model))
+    if not isinstance(result, CreateChatHttpResponse):
+        raise ChatStreamError(f"Could not create a chat: {result.statusCode} - {result.statusMessage}")
+
+    try:
+        yield result.chat.id
+    finally:
+        await asyncio.to_thread(chat_service.delete_selected_chat, result.chat.id)
+
+
+async def stream_answer(prompt: str, model: str = None, context: str = None,
+                        attachments: List[Attachment] = None, chat_id=None) -> AsyncIterator[str]:
+    """Stream the reply to a single prompt, optionally preceded by a system message with `context`."""
+    messages = [Message(role="system", content=context)] if context else []
+    chat_request = ChatRequest(messages=[*messages, Message(role="user", content=prompt, attachments=attachments)])
+
+    async for event in ChatService().stream_chat_message(chat_request, model=model, chat_id=chat_id):
+        if isinstance(event, TextDelta):
+            yield event.text
+        elif isinstance(event, ErrorEvent):
+            raise ChatStreamError(event.message)
+
+
+def read_batch_jobs(lines: Iterable[str]) -> Iterator[BatchJob]:
+    """Parse JSONL prompts: either a string or an object with `prompt` and optional `id` and `model`."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {line_number}: {e}") from e
+
+        if isinstance(item, str):
+            item = {"prompt": item}
+        if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+            raise ValueError(f"line {line_number}: expected a string or an object with a 'prompt'")
+
+        yield BatchJob(id=item.get("id", line_number), prompt=item["prompt"], model=item.get("model"))
+
+
+class BatchRunner:
+    """Runs prompts with at most `concurrency` streams in flight and yields results as they complete.
+
+    Jobs are pulled lazily from the iterable, so a large batch file is never held in memory.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, context: str = None,
+                 attachments: List[Attachment] = None, chat_id=None):
+        self.concurrency = max(concurrency, 1)
+        self.context = context
+        self.attachments = attachments
+        self.chat_id = chat_id
+
+    async def run(self, jobs: Iterable[BatchJob]) -> AsyncIterator[BatchResult]:
+        jobs = iter(jobs)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            try:
+                for job in jobs:
+                    await results.put(await self.run_job(job))
+            finally:
+                await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        running = len(workers)
+
+        try:
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                    continue
+                yield result
+
+            # surfaces errors raised while reading jobs
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def run_job(self, job: BatchJob) -> BatchResult:
+        start = time.perf_counter()
+        tokens, error = [], None
+
+        try:
+            async for token in stream_answer(job.prompt, model=job.model, context=self.context,
+                                             attachments=self.attachments, chat_id=self.chat_id):
+                tokens.append(token)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        model = job.model or ChatService().config_manager.snapshot().model
+        return BatchResult(id=job.id, model=model, output="".join(tokens), error=error,
+                           latency=time.perf_counter() - start)
+
+
+async def compare_models(prompt: str, models: list[str],
+                         on_token: Callable[[str, str], None] = None) -> list[ModelRunStats]:
+    """Send one prompt to all models at once; `on_token(model, text)` sees the replies as they stream."""
+    return list(await asyncio.gather(*(run_model(prompt, model, on_token) for model in models)))
+
+
+async def run_model(prompt: str, model: str, on_token: Callable[[str, str], None] = None) -> ModelRunStats:
+    chat_request = ChatRequest(messages=[Message(role="user", content=prompt)])
+    start = time.perf_counter()
+    time_to_first_token, completion_tokens, error = None, None, None
+    tokens = []
+
+    try:
+        # a temporary chat per model, the answers never land in the user's (differently bound) active chat
+        async with headless_chat(model=model, name=f"neptun compare {model}") as chat_id:
+            # chat setup is not part of the measurement
+            start = time.perf_counter()
+            async for event in ChatService().stream_chat_message(chat_request, model=model, chat_id=chat_id):
+                if isinstance(event, TextDelta):
+                    if time_to_first_token is None:
+                        time_to_first_token = time.perf_counter() - start
+                    tokens.append(event.text)
+                    if on_token:
+                        on_token(model, event.text)
+                elif isinstance(event, FinishEvent):
+                    completion_tokens = event.completion_tokens
+                elif isinstance(event, ErrorEvent):
+                    raise ChatStreamError(event.message)
+            latency = time.perf_counter() - start
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        latency = time.perf_counter() - start
+
+    output = "".join(tokens)
+
+    # text deltas may carry several tokens, prefer the server's count over a local estimate
+    token_count = completion_tokens or estimate_tokens(output)
+    generation_time = latency - (time_to_first_token or 0)
+
+    return ModelRunStats(model=model, output=output, error=error, time_to_first_token=time_to_first_token,
+                         latency=latency, tokens=token_count,
+                         tokens_per_second=token_count / generation_time if token_count and generation_time > 0
+                         else None)
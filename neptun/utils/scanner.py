@@ -0,0 +1,382 @@
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import re
+import time
+import tomllib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from neptun.model.responses import FileEntry, ProjectManifest, ScanReport
+from neptun.utils.managers import CONFIG_FILE_PATH
+
+PROJECTS_DIR_PATH = CONFIG_FILE_PATH.parent / "projects"
+MANIFEST_VERSION = 1
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+# smaller files are read in one go, larger ones are hashed through a read-only memory map
+MMAP_THRESHOLD = 1024 * 1024
+ALWAYS_IGNORED = frozenset({".git", ".hg", ".svn"})
+
+IgnoreRule = Tuple[re.Pattern, bool, bool]
+
+
+def translate_ignore_pattern(pattern: str) -> Optional[IgnoreRule]:
+    """A .gitignore line as (regex over the path relative to the .gitignore, negated, directories only)."""
+    pattern = pattern.rstrip("\n")
+    if not pattern.strip() or pattern.startswith("#"):
+        return None
+
+    if not pattern.endswith("\\ "):
+        pattern = pattern.rstrip(" ")
+    negated = pattern.startswith("!")
+    if negated or pattern.startswith("\\"):
+        pattern = pattern[1:]
+
+    directories_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # a slash anywhere but at the end ties the pattern to the .gitignore's directory
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    regex, index = "", 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex += "(?:.*/)?"
+            index += 3
+        elif pattern.startswith("/**", index) and index + 3 == len(pattern):
+            regex += "/.*"
+            index += 3
+        elif pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+        elif pattern[index] == "*":
+            regex += "[^/]*"
+            index += 1
+        elif pattern[index] == "?":
+            regex += "[^/]"
+            index += 1
+        elif pattern[index] == "[" and pattern.find("]", index + 2) != -1:
+            end = pattern.find("]", index + 2)
+            body = pattern[index + 1:end]
+            regex += f"[^{body[1:]}]" if body.startswith("!") else f"[{body}]"
+            index = end + 1
+        elif pattern[index] == "\\" and index + 1 < len(pattern):
+            regex += re.escape(pattern[index + 1])
+            index += 2
+        else:
+            regex += re.escape(pattern[index])
+            index += 1
+
+    prefix = "^" if anchored else "^(?:.*/)?"
+    return re.compile(f"{prefix}{regex}$"), negated, directories_only
+
+
+def parse_ignore_file(path: Path) -> List[IgnoreRule]:
+    try:
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+    return [rule for rule in map(translate_ignore_pattern, lines) if rule is not None]
+
+
+def is_ignored(ignore_files: Tuple[Tuple[str, List[IgnoreRule]], ...], path: str, is_dir: bool) -> bool:
+    """Apply the .gitignore files from the root down; the last matching rule decides."""
+    ignored = False
+    for base, rules in ignore_files:
+        relative = path[len(base) + 1:] if base else path
+        for regex, negated, directories_only in rules:
+            if (is_dir or not directories_only) and regex.match(relative):
+                ignored = not negated
+    return ignored
+
+
+def hash_file(path: Path, size: int, mmap_threshold: int = MMAP_THRESHOLD) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as file:
+        if size and size >= mmap_threshold:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def _frameworks(names, known: Dict[str, str]) -> List[str]:
+    names = {name.lower() for name in names}
+    return [label for name, label in known.items() if name in names]
+
+
+JS_FRAMEWORKS = {"next": "Next.js", "nuxt": "Nuxt", "react": "React", "vue": "Vue", "@angular/core": "Angular",
+                 "svelte": "Svelte", "express": "Express", "@nestjs/core": "NestJS", "vite": "Vite"}
+PY_FRAMEWORKS = {"django": "Django", "flask": "Flask", "fastapi": "FastAPI", "typer": "Typer",
+                 "celery": "Celery", "uvicorn": "Uvicorn", "gunicorn": "Gunicorn"}
+REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+DOCKER_FROM = re.compile(r"^\s*FROM\s+(?:--platform=\S+\s+)?(\S+)", re.IGNORECASE | re.MULTILINE)
+COMPOSE_SERVICE = re.compile(r"^[ ]{2}([A-Za-z0-9][\w.-]*):\s*$", re.MULTILINE)
+GO_VERSION = re.compile(r"^go\s+(\S+)", re.MULTILINE)
+
+
+def detect_package_json(content: bytes) -> List[str]:
+    data = json.loads(content)
+    dependencies = {**data.get("dependencies", {}), **data.get("devDependencies", {})}
+    node = data.get("engines", {}).get("node")
+    return [f"Node.js {node}" if node else "Node.js", *_frameworks(dependencies, JS_FRAMEWORKS)]
+
+
+def detect_pyproject(content: bytes) -> List[str]:
+    data = tomllib.loads(content.decode("utf-8"))
+    project = data.get("project", {})
+    poetry = data.get("tool", {}).get("poetry", {})
+
+    python = project.get("requires-python") or poetry.get("dependencies", {}).get("python")
+    names = [REQUIREMENT_NAME.match(requirement).group(1) for requirement in project.get("dependencies", [])
+             if REQUIREMENT_NAME.match(requirement)]
+    names += list(poetry.get("dependencies", {}))
+    return [f"Python {python}" if python else "Python", *_frameworks(names, PY_FRAMEWORKS)]
+
+
+def detect_requirements(content: bytes) -> List[str]:
+    names = [match.group(1) for line in content.decode("utf-8", errors="replace").splitlines()
+             if (match := REQUIREMENT_NAME.match(line))]
+    return ["Python", *_frameworks(names, PY_FRAMEWORKS)]
+
+
+def detect_dockerfile(content: bytes) -> List[str]:
+    images = DOCKER_FROM.findall(content.decode("utf-8", errors="replace"))
+    return [f"Docker FROM {image}" for image in images] or ["Docker"]
+
+
+def detect_compose(content: bytes) -> List[str]:
+    text = content.decode("utf-8", errors="replace")
+    # no YAML parser needed for the service names: the keys indented once below `services:`
+    match = re.search(r"^services:\s*$(.*?)(?=^\S|\Z)", text, re.MULTILINE | re.DOTALL)
+    services = COMPOSE_SERVICE.findall(match.group(1)) if match else []
+    return [f"Docker Compose services: {', '.join(services)}" if services else "Docker Compose"]
+
+
+def detect_go_mod(content: bytes) -> List[str]:
+    match = GO_VERSION.search(content.decode("utf-8", errors="replace"))
+    return [f"Go {match.group(1)}" if match else "Go"]
+
+
+DETECTORS: Dict[str, Callable[[bytes], List[str]]] = {
+    "package.json": detect_package_json,
+    "pyproject.toml": detect_pyproject,
+    "requirements.txt": detect_requirements,
+    "setup.py": lambda content: ["Python"],
+    "Pipfile": lambda content: ["Python (Pipenv)"],
+    "Dockerfile": detect_dockerfile,
+    "docker-compose.yml": detect_compose,
+    "docker-compose.yaml": detect_compose,
+    "compose.yml": detect_compose,
+    "compose.yaml": detect_compose,
+    "go.mod": detect_go_mod,
+    "Cargo.toml": lambda content: ["Rust"],
+    "pom.xml": lambda content: ["Java (Maven)"],
+    "build.gradle": lambda content: ["Java (Gradle)"],
+    "build.gradle.kts": lambda content: ["Kotlin (Gradle)"],
+    "Gemfile": lambda content: ["Ruby"],
+    "composer.json": lambda content: ["PHP"],
+}
+
+
+def detector_for(name: str) -> Optional[Callable[[bytes], List[str]]]:
+    if name.startswith("Dockerfile") or name.endswith(".dockerfile"):
+        return detect_dockerfile
+    return DETECTORS.get(name)
+
+
+def detect_stack(path: Path, name: str) -> Tuple[str, ...]:
+    detector = detector_for(name)
+    if detector is None:
+        return ()
+    try:
+        return tuple(detector(path.read_bytes()))
+    except (OSError, ValueError, UnicodeDecodeError, AttributeError):
+        return ()
+
+
+def manifest_path_for(root: Path, directory=PROJECTS_DIR_PATH) -> Path:
+    """One manifest per project root, named after a hash of its absolute path."""
+    return Path(directory) / f"{hashlib.blake2b(str(root).encode(), digest_size=8).hexdigest()}.json.gz"
+
+
+class ManifestStore:
+    """Compact on-disk manifests: gzipped JSON with one `[size, mtime_ns, digest, stack]` row per file."""
+
+    def __init__(self, directory=PROJECTS_DIR_PATH):
+        self.directory = Path(directory)
+
+    @classmethod
+    def next_to(cls, config_file_path) -> "ManifestStore":
+        """The store that belongs to a config file, like the history and metrics databases."""
+        return cls(Path(config_file_path).parent / "projects")
+
+    def load(self, root: Path) -> Optional[ProjectManifest]:
+        try:
+            with gzip.open(manifest_path_for(root, self.directory), "rt", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != MANIFEST_VERSION or data.get("root") != str(root):
+            return None
+
+        files = {path: FileEntry(size, mtime_ns, digest, tuple(stack))
+                 for path, (size, mtime_ns, digest, stack) in data["files"].items()}
+        return ProjectManifest(root=str(root), files=files, scanned_at=data["scanned_at"])
+
+    def save(self, manifest: ProjectManifest) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = manifest_path_for(Path(manifest.root), self.directory)
+        data = {"version": MANIFEST_VERSION, "root": manifest.root, "scanned_at": manifest.scanned_at,
+                "files": {file_path: [entry.size, entry.mtime_ns, entry.digest, list(entry.stack)]
+                          for file_path, entry in manifest.files.items()}}
+
+        # dumps() uses the C encoder, dump() into a stream would encode chunk by chunk in Python
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(gzip.compress(json.dumps(data, separators=(",", ":")).encode(), compresslevel=1))
+        os.replace(temp_path, path)
+
+
+class ProjectScanner:
+    """Walks a project with a thread pool and builds its manifest.
+
+    Every worker lists one directory and hashes the files in it that changed; a file whose
+    size and mtime match the previous manifest keeps its digest without being read. Ignored
+    paths (.gitignore files at any depth, plus VCS directories) are pruned from the walk.
+    """
+
+    def __init__(self, root, workers: int = DEFAULT_WORKERS, store: Optional[ManifestStore] = None,
+                 mmap_threshold: int = MMAP_THRESHOLD):
+        self.root = Path(root).resolve()
+        self.workers = workers
+        self.store = store or ManifestStore()
+        self.mmap_threshold = mmap_threshold
+
+    def scan(self, full: bool = False) -> Tuple[ProjectManifest, ScanReport]:
+        """Scan the project, reusing the stored manifest unless `full` is set, and store the result."""
+        start = time.perf_counter()
+        previous = {} if full else getattr(self.store.load(self.root), "files", {})
+
+        files: Dict[str, FileEntry] = {}
+        hashed = ignored = bytes_hashed = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="neptun-scan") as executor:
+            pending = {executor.submit(self._scan_directory, "", (), previous)}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory_files, subdirectories, directory_stats = future.result()
+                    files.update(directory_files)
+                    hashed += directory_stats[0]
+                    ignored += directory_stats[1]
+                    bytes_hashed += directory_stats[2]
+                    pending.update(executor.submit(self._scan_directory, relative, ignore_files, previous)
+                                   for relative, ignore_files in subdirectories)
+
+        manifest = ProjectManifest(root=str(self.root), files=dict(sorted(files.items())), scanned_at=time.time())
+        removed = len(previous.keys() - files.keys())
+        if hashed or removed or not previous:
+            self.store.save(manifest)
+
+        return manifest, ScanReport(files=len(files),
+                                    hashed=hashed,
+                                    reused=len(files) - hashed,
+                                    removed=removed,
+                                    ignored=ignored,
+                                    bytes_hashed=bytes_hashed,
+                                    elapsed=time.perf_counter() - start)
+
+    def _scan_directory(self, relative: str, ignore_files, previous: Dict[str, FileEntry]):
+        directory = self.root / relative if relative else self.root
+
+        gitignore = directory / ".gitignore"
+        if gitignore.is_file():
+            ignore_files = (*ignore_files, (relative, parse_ignore_file(gitignore)))
+
+        files: Dict[str, FileEntry] = {}
+        subdirectories = []
+        hashed = ignored = bytes_hashed = 0
+
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files, subdirectories, (0, 0, 0)
+
+        for entry in entries:
+            path = f"{relative}/{entry.name}" if relative else entry.name
+
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+
+            if entry.name in ALWAYS_IGNORED or is_ignored(ignore_files, path, is_dir):
+                ignored += 1
+                continue
+
+            if is_dir:
+                subdirectories.append((path, ignore_files))
+                continue
+
+            try:
+                stat = entry.stat(follow_symlinks=False)
+                cached = previous.get(path)
+                if cached is not None and cached.size == stat.st_size and cached.mtime_ns == stat.st_mtime_ns:
+                    files[path] = cached
+                    continue
+
+                digest = hash_file(Path(entry.path), stat.st_size, self.mmap_threshold)
+            except OSError:
+                continue
+
+            files[path] = FileEntry(size=stat.st_size, mtime_ns=stat.st_mtime_ns, digest=digest,
+                                    stack=detect_stack(Path(entry.path), entry.name))
+            hashed += 1
+            bytes_hashed += stat.st_size
+
+        return files, subdirectories, (hashed, ignored, bytes_hashed)
+
+
+def describe_manifest(manifest: ProjectManifest, max_entries: int = 40) -> str:
+    """Compact text description of a project (stack and layout) to give the assistant as context."""
+    root = Path(manifest.root)
+    total_size = sum(entry.size for entry in manifest.files.values())
+    lines = [f"Project '{root.name}': {len(manifest.files)} files, {total_size / 1024 / 1024:.1f} MiB"]
+
+    stack = [(path, entry.stack) for path, entry in manifest.files.items() if entry.stack]
+    if stack:
+        lines.append("Detected stack:")
+        lines += [f"- {path}: {', '.join(facts)}" for path, facts in stack[:max_entries]]
+        if len(stack) > max_entries:
+            lines.append(f"- ... {len(stack) - max_entries} more manifests")
+
+    top_level: Dict[str, int] = {}
+    for path in manifest.files:
+        name, separator, _ = path.partition("/")
+        top_level[name + separator] = top_level.get(name + separator, 0) + 1
+
+    lines.append("Layout:")
+    entries = sorted(top_level.items(), key=lambda item: (not item[0].endswith("/"), item[0]))
+    for name, count in entries[:max_entries]:
+        lines.append(f"- {name} ({count} file{'s' if count != 1 else ''})" if name.endswith("/") else f"- {name}")
+    if len(entries) > max_entries:
+        lines.append(f"- ... {len(entries) - max_entries} more entries")
+
+    return "\n".join(lines)
+
+
+def project_context(root, store: Optional[ManifestStore] = None) -> str:
+    """Rescan the project (only changed files are read) and describe it for the assistant."""
+    manifest, _ = ProjectScanner(root, store=store).scan()
+    return describe_manifest(manifest)
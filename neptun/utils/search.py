@@ -0,0 +1,137 @@
+from typing import Callable, Generic, Iterator, List, Optional, TypeVar
+
+from neptun.model.http_responses import Chat
+
+T = TypeVar("T")
+
+SEARCH_LIMIT = 10
+
+
+def fuzzy_score(query: str, text: str) -> Optional[int]:
+    """Score `query` as an in-order subsequence of `text` (both lower case), None if it is not one.
+
+    Consecutive characters and matches at word starts score higher, so "dckr" ranks
+    "docker setup" above "dark mode docs".
+    """
+    score, position, previous = 0, 0, -2
+
+    for character in query:
+        found = text.find(character, position)
+        if found == -1:
+            return None
+
+        score += 1
+        if found == previous + 1:
+            score += 3
+        if found == 0 or not text[found - 1].isalnum():
+            score += 2
+
+        previous, position = found, found + 1
+
+    # prefer shorter names among equally good matches
+    return score * 100 - len(text)
+
+
+class FuzzyIndex(Generic[T]):
+    """In-memory fuzzy index that narrows incrementally while a query is being typed.
+
+    When a query extends the previous one, only the previous matches are rescored.
+    """
+
+    def __init__(self, key: Callable[[T], str]):
+        self.key = key
+        self.entries: dict = {}
+        self._last_query: Optional[str] = None
+        self._last_matches: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, identifier, item: T) -> None:
+        self.entries[identifier] = (self.key(item).lower(), item)
+        self._last_query = None
+
+    def remove(self, identifier) -> None:
+        self.entries.pop(identifier, None)
+        self._last_query = None
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[T]:
+        query = query.lower().strip()
+        if not query:
+            return [item for _, item in list(self.entries.values())[:limit]]
+
+        if self._last_query is not None and query.startswith(self._last_query):
+            candidates = self._last_matches
+        else:
+            candidates = list(self.entries.values())
+
+        scored = [(score, text, item) for text, item in candidates
+                  if (score := fuzzy_score(query, text)) is not None]
+        scored.sort(key=lambda match: -match[0])
+
+        self._last_query = query
+        self._last_matches = [(text, item) for _, text, item in scored]
+        return [item for _, _, item in scored[:limit]]
+
+
+class ChatPicker:
+    """Chat choices for the pickers: the local history first, more pages only when a search needs them."""
+
+    def __init__(self, chat_service, limit: int = SEARCH_LIMIT):
+        self.chat_service = chat_service
+        self.limit = limit
+        self.index: FuzzyIndex[Chat] = FuzzyIndex(key=lambda chat: f"{chat.name} {chat.model}")
+        self._pages: Optional[Iterator[List[Chat]]] = None
+        self.exhausted = False
+
+        for chat in chat_service.history_store.get_chats():
+            self.index.add(chat.id, chat)
+
+    @staticmethod
+    def label(chat: Chat) -> str:
+        return f"{chat.id}: {chat.name}:[{chat.model}]"
+
+    def load_next_page(self) -> List[Chat]:
+        if self.exhausted:
+            return []
+        if self._pages is None:
+            self._pages = self.chat_service.iter_chat_pages()
+
+        page = next(self._pages, None)
+        if page is None:
+            self.exhausted = True
+            return []
+
+        for chat in page:
+            self.index.add(chat.id, chat)
+        return page
+
+    def search(self, query: str = "") -> List[Chat]:
+        """Best matches for `query`; remote pages are fetched only while there are too few matches."""
+        # the newest page always comes from the server so that fresh chats show up
+        if self._pages is None:
+            self.load_next_page()
+
+        matches = self._matches(query)
+        while len(matches) < self.limit and not self.exhausted:
+            self.load_next_page()
+            matches = self._matches(query)
+        return matches
+
+    def _matches(self, query: str) -> List[Chat]:
+        if query.strip():
+            return self.index.search(query, self.limit)
+
+        chats = sorted((chat for _, chat in self.index.entries.values()),
+                       key=lambda chat: chat.updated_at, reverse=True)
+        return chats[:self.limit]
+
+    def find(self, label: str) -> Optional[Chat]:
+        chat_id = label.split(":", 1)[0]
+        if chat_id.isdigit():
+            entry = self.index.entries.get(int(chat_id))
+            return entry[1] if entry else None
+        return None
+
+    def remove(self, chat: Chat) -> None:
+        self.index.remove(chat.id)
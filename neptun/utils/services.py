@@ -1,24 +1,36 @@
 import asyncio
+import gzip
 from functools import wraps
-from typing import Union
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Tuple, Union
 import httpx
-from pydantic import ValidationError
 from neptun.utils.managers import ConfigManager
 from neptun.model.http_requests import SignUpHttpRequest, LoginHttpRequest, CreateChatHttpRequest, Message, ChatRequest
 from neptun.model.http_responses import SignUpHttpResponse, GeneralErrorResponse, ErrorResponse, LoginHttpResponse, \
-    ChatsHttpResponse, CreateChatHttpResponse, ChatMessagesHttpResponse
+    ChatsHttpResponse, CreateChatHttpResponse, ChatMessagesHttpResponse, Chat
+from neptun.utils.decoding import ResponseDecoder
 from neptun.utils.exceptions import NotAuthenticatedError
 from neptun.utils.helpers import ChatResponseConverter
+from neptun.utils.parsers import DataStreamParser
+from neptun.model.responses import StreamEvent
+from neptun.utils.transport import HttpTransport
+from neptun.utils.history import ChatHistoryStore
+from neptun.utils.sessions import SessionValidator
+from neptun.utils.logger import LogBody
 
 import logging
 
+CHAT_PAGE_SIZE = 50
+JSON_HEADERS = {"Content-Type": "application/json"}
+GZIP_JSON_HEADERS = {**JSON_HEADERS, "Content-Encoding": "gzip"}
+# smaller bodies fit a single packet either way
+COMPRESS_MIN_BYTES = 1024
 
-logging.basicConfig(
-    filename='app.log',          # Name of the log file
-    filemode='a',                # Mode to open the file ('w' for overwrite, 'a' for append)
-    format='%(asctime)s - %(levelname)s - %(message)s', # Log format
-    level=logging.DEBUG          # Minimum logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-)
+LOGIN_DECODER = ResponseDecoder(LoginHttpResponse, ErrorResponse)
+SIGN_UP_DECODER = ResponseDecoder(SignUpHttpResponse, ErrorResponse)
+CHATS_DECODER = ResponseDecoder(ChatsHttpResponse, GeneralErrorResponse)
+CREATE_CHAT_DECODER = ResponseDecoder(CreateChatHttpResponse, ErrorResponse)
+CHAT_MESSAGES_DECODER = ResponseDecoder(ChatMessagesHttpResponse, ErrorResponse)
 
 
 def singleton(cls):
@@ -36,10 +48,12 @@ def singleton(cls):
 def ensure_authenticated(method):
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        id = self.config_manager.read_config(section='auth.user', key='id')
-        neptun_session_token = self.config_manager.read_config(section='auth', key='neptun_session_cookie')
+        config = self.config_manager.snapshot()
 
-        if neptun_session_token is None or id is None:
+        if config.neptun_session_cookie is None or config.user_id is None:
+            raise NotAuthenticatedError()
+
+        if not AuthenticationService().is_authenticated(config.neptun_session_cookie):
             raise NotAuthenticatedError()
 
         return method(self, *args, **kwargs)
@@ -51,171 +65,279 @@ def ensure_authenticated(method):
 class AuthenticationService:
 
     def __init__(self):
-        self.client = httpx.Client()
+        self.transport = HttpTransport()
         self.config_manager = ConfigManager()
+        self._session_validator = None
+
+    @property
+    def client(self) -> httpx.Client:
+        return self.transport.client
+
+    @property
+    def session_validator(self) -> SessionValidator:
+        """Cached verdicts on the session cookie, kept next to the active config file."""
+        status_path = Path(self.config_manager.config_file_path).parent / "auth-status.json"
+
+        if self._session_validator is None or self._session_validator.status_path != status_path:
+            self._session_validator = SessionValidator(self.check_authenticated, status_path,
+                                                       ttl=self.config_manager.snapshot().auth_status_ttl)
+        return self._session_validator
+
+    def is_authenticated(self, cookie=None, refresh: bool = False) -> bool:
+        """Whether the session cookie (the configured one by default) is valid, asking the server only when the
+        seal does not already tell and the last verdict is older than the status TTL.
+
+        Raises AuthServerUnavailableError if the server has to be asked but gives no clear answer."""
+        if cookie is None:
+            cookie = self.config_manager.snapshot().neptun_session_cookie
+        return self.session_validator.is_authenticated(cookie, refresh=refresh)
 
     def check_authenticated(self, cookie):
         url = f"{self.config_manager.read_config('utils', 'neptun_api_server_host')}/auth/check"
 
-        with self.client:
-            self.client.cookies.set('neptun-session', cookie)
+        self.transport.set_session_cookie(cookie)
 
-            request = self.client.head(url)
+        try:
+            request = self.transport.request("HEAD", url)
+        except httpx.TransportError as e:
+            logging.warning("Authentication check failed: %s", e)
+            return None
 
-            if request.status_code == 204:
-                return True
-            elif request.status_code == 401:
-                return False
+        if request.status_code == 204:
+            return True
+        elif request.status_code == 401:
+            return False
 
     def login(self, login_up_http_request: LoginHttpRequest) -> Union[LoginHttpResponse, ErrorResponse]:
         url = f"{self.config_manager.read_config('utils', 'neptun_api_server_host')}/auth/login"
 
-        with self.client:
-            response = self.client.post(url, data=login_up_http_request.dict())
-
-            response_data = response.json()
+        response = self.transport.request("POST", url, data=login_up_http_request.model_dump())
 
-            try:
-                session_cookie = None if not response.cookies.get("neptun-session") else response.cookies.get(
-                    "neptun-session")
-                login_response = LoginHttpResponse.parse_obj(response_data)
+        login_response = LOGIN_DECODER.decode(response)
+        if isinstance(login_response, LoginHttpResponse):
+            session_cookie = response.cookies.get("neptun-session") or None
 
-                login_response.session_cookie = session_cookie
-                return login_response
-            except ValidationError:
-                return ErrorResponse.parse_obj(response_data)
+            login_response.session_cookie = session_cookie
+            self.transport.set_session_cookie(session_cookie)
+            if session_cookie:
+                self.session_validator.store(session_cookie, True)
+        return login_response
 
     def sign_up(self, sign_up_http_request: SignUpHttpRequest) -> Union[SignUpHttpResponse, ErrorResponse]:
         url = f"{self.config_manager.read_config('utils', 'neptun_api_server_host')}/auth/sign-up"
 
-        with self.client:
-            response = self.client.post(url, data=sign_up_http_request.dict())
+        response = self.transport.request("POST", url, data=sign_up_http_request.model_dump())
 
-            response_data = response.json()
+        sign_up_response = SIGN_UP_DECODER.decode(response)
+        if isinstance(sign_up_response, SignUpHttpResponse):
+            session_cookie = response.cookies.get("neptun-session") or None
 
-            try:
-                session_cookie = None if not response.cookies.get("neptun-session") else response.cookies.get(
-                    "neptun-session")
-                sign_up_response = SignUpHttpResponse.parse_obj(response_data)
-                sign_up_response.session_cookie = session_cookie
-                return sign_up_response
-            except ValidationError:
-                return ErrorResponse.parse_obj(response_data)
+            sign_up_response.session_cookie = session_cookie
+            self.transport.set_session_cookie(session_cookie)
+            if session_cookie:
+                self.session_validator.store(session_cookie, True)
+        return sign_up_response
 
 
 @singleton
 class ChatService:
     def __init__(self):
         self.config_manager = ConfigManager()
-        self.client = httpx.Client(cookies={"neptun-session": self.config_manager
-                                   .read_config(section="auth",
-                                                key="neptun_session_cookie")})
-        self.async_client = httpx.AsyncClient(
-            cookies={"neptun-session": self.config_manager
-            .read_config(section="auth",
-                         key="neptun_session_cookie")}
-        )
+        self.transport = HttpTransport()
         self.chat_response_converter = ChatResponseConverter()
+        self._history_store = None
 
-    def get_available_ai_chats(self):
-        id = self.config_manager.read_config("auth.user", "id")
-        url = f"{self.config_manager.read_config('utils',
-                                                 'neptun_api_server_host')}/users/{id}/chats?order_by=updated_at:desc"
+    @property
+    def client(self) -> httpx.Client:
+        return self.transport.client
 
-        response = self.client.get(url)
+    @property
+    def history_store(self) -> ChatHistoryStore:
+        """Local chat history, kept next to the active config file."""
+        db_path = Path(self.config_manager.config_file_path).parent / "history.db"
 
-        response_data = response.json()
+        if self._history_store is None or self._history_store.db_path != db_path:
+            self._history_store = ChatHistoryStore(db_path)
+        return self._history_store
 
-        try:
-            chat_response = ChatsHttpResponse.model_validate(response_data)
-            return chat_response
-        except ValidationError:
-            return GeneralErrorResponse.model_validate(response_data)
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        return self.transport.async_client
+
+    def get_available_ai_chats(self, limit: int = None, offset: int = None):
+        """The user's chats, most recently updated first; a single page of them if `limit` is given."""
+        config = self.config_manager.snapshot()
+        url = f"{config.neptun_api_server_host}/users/{config.user_id}/chats"
+        params = {key: value for key, value in (("order_by", "updated_at:desc"), ("limit", limit), ("offset", offset))
+                  if value is not None}
+
+        response = self.transport.request("GET", url, hedge=True, cache=True, params=params)
+
+        chat_response = CHATS_DECODER.decode(response)
+        if isinstance(chat_response, ChatsHttpResponse):
+            self.history_store.upsert_chats(chat_response.chats or [])
+        return chat_response
+
+    def iter_chat_pages(self, page_size: int = CHAT_PAGE_SIZE) -> Iterator[List[Chat]]:
+        """Fetch the user's chats page by page, only as far as the caller keeps iterating."""
+        offset = 0
+
+        while True:
+            result = self.get_available_ai_chats(limit=page_size, offset=offset)
+
+            if not isinstance(result, ChatsHttpResponse):
+                logging.error("Error loading chats: %s - %s", result.statusCode, result.statusMessage)
+                return
+
+            page = result.chats or []
+            if page:
+                yield page
+
+            # a short page is the last one, a server that ignores paging answers with every chat at once
+            if len(page) != page_size:
+                return
+            offset += page_size
 
     def delete_selected_chat(self, chat_id):
 
-        id = self.config_manager.read_config("auth.user", "id")
-        url = f"{self.config_manager.read_config('utils',
-                                                 'neptun_api_server_host')}/users/{id}/chats/{chat_id}"
+        config = self.config_manager.snapshot()
+        url = f"{config.neptun_api_server_host}/users/{config.user_id}/chats/{chat_id}"
 
         try:
-            response = self.client.delete(url)
-            return True
-        except Exception:
+            response = self.transport.request("DELETE", url)
+        except httpx.HTTPError:
             return False
+        if not response.is_success:
+            logging.error("Deleting chat %s failed: %d", chat_id, response.status_code)
+            return False
+
+        # the local copy goes only once the server actually deleted the chat
+        self.history_store.delete_chat(chat_id)
+        self.transport.invalidate_cache(f"{config.neptun_api_server_host}/users/{config.user_id}/chats",
+                                        f"{url}/messages")
+        return True
 
     def create_chat(self, create_chat_http_request: CreateChatHttpRequest) \
             -> Union[CreateChatHttpResponse, ErrorResponse]:
-        id = self.config_manager.read_config("auth.user", "id")
-        url = f"{self.config_manager.read_config('utils', 'neptun_api_server_host')}/users/{id}/chats"
+        config = self.config_manager.snapshot()
+        url = f"{config.neptun_api_server_host}/users/{config.user_id}/chats"
 
-        response = self.client.post(url, data=create_chat_http_request.dict())
+        response = self.transport.request("POST", url, data=create_chat_http_request.model_dump())
+        self.transport.invalidate_cache(url)
 
-        response_data = response.json()
-
-        try:
-            chat_response = CreateChatHttpResponse.model_validate(response_data)
-            return chat_response
-        except ValidationError:
-            return ErrorResponse.model_validate(response_data)
+        return CREATE_CHAT_DECODER.decode(response)
 
-    async def get_chat_messages_by_chat_id(self) \
+    async def get_chat_messages_by_chat_id(self, chat_id=None, after_id: int = None, updated_after: str = None) \
             -> Union[ChatMessagesHttpResponse, ErrorResponse]:
-        user_id = self.config_manager.read_config("auth.user", "id")
-        chat_id = self.config_manager.read_config("active_chat", "chat_id")
+        """Fetch the messages of a chat (the active one by default), optionally only those newer than a marker.
 
-        url = f"{self.config_manager.read_config('utils', 'neptun_api_server_host')}/users/{user_id}/chats/{chat_id}/messages"
+        The marker is sent as query parameters and applied locally as well, so it is also
+        correct against servers that ignore it.
+        """
+        config = self.config_manager.snapshot()
+        chat_id = chat_id or config.chat_id
 
-        response = await self.async_client.get(url)
-        response_data = response.json()
+        url = f"{config.neptun_api_server_host}/users/{config.user_id}/chats/{chat_id}/messages"
+        params = {key: value for key, value in (("after_id", after_id), ("updated_after", updated_after))
+                  if value is not None}
 
-        try:
-            chat_messages_http_response = ChatMessagesHttpResponse.model_validate(response_data)
+        response = await self.transport.arequest("GET", url, hedge=True, cache=True, params=params)
+        chat_messages_http_response = CHAT_MESSAGES_DECODER.decode(response)
+        if not isinstance(chat_messages_http_response, ChatMessagesHttpResponse):
             return chat_messages_http_response
-        except ValidationError:
-            return ErrorResponse.model_validate(response_data)
+
+        if after_id is not None or updated_after is not None:
+            chat_messages_http_response.chat_messages = [
+                message for message in chat_messages_http_response.chat_messages
+                if (after_id is not None and message.id > after_id)
+                or (updated_after is not None and message.updated_at > updated_after)
+            ]
+
+        return chat_messages_http_response
 
     def extract_parts(self, s: str):
         before_slash = s.split('/')[0]
         after_slash = s.split('/')[1] if '/' in s else ''
         return before_slash, after_slash
 
-    async def post_chat_message(self, messages: ChatRequest) -> Union[str, None]:
-        try:
-            chat_id = self.config_manager.read_config("active_chat", "chat_id")
-            model = self.config_manager.read_config("active_chat", "model")
-            model_publisher, model_name = self.extract_parts(model)
+    @staticmethod
+    def chat_request_body(messages: Union[ChatRequest, bytes]) -> bytes:
+        """`messages` as a JSON body, pre-serialized bodies (see ConversationBuffer) are sent as they are."""
+        return messages if isinstance(messages, bytes) else messages.model_dump_json(exclude_none=True).encode()
+
+    def chat_request_content(self, messages: Union[ChatRequest, bytes]) -> Tuple[bytes, dict]:
+        """Body and headers of a chat request, gzipped unless compression is disabled or the body is small."""
+        body = self.chat_request_body(messages)
+        if self.config_manager.snapshot().http_compress_requests and len(body) >= COMPRESS_MIN_BYTES:
+            return gzip.compress(body, compresslevel=6), GZIP_JSON_HEADERS
+        return body, JSON_HEADERS
+
+    def attachment_url(self, digest: str, chat_id=None) -> str:
+        config = self.config_manager.snapshot()
+        chat_id = chat_id or config.chat_id
+        return f"{config.neptun_api_server_host}/users/{config.user_id}/chats/{chat_id}/attachments/{digest}"
+
+    async def has_attachment(self, digest: str, chat_id=None) -> bool:
+        """Whether the chat already holds a file with this content hash."""
+        response = await self.transport.arequest("HEAD", self.attachment_url(digest, chat_id))
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    async def upload_attachment(self, digest: str, body, chat_id=None, compressed: bool = True) -> None:
+        """Upload a file to the chat under its content hash; `body` is streamed (see AttachmentBody)."""
+        headers = {"Content-Type": "application/octet-stream"}
+        if compressed:
+            headers["Content-Encoding"] = "gzip"
 
-            logging.debug(f"Sent object: {messages.json()}")
+        response = await self.transport.arequest("PUT", self.attachment_url(digest, chat_id), content=body,
+                                                 headers=headers)
+        response.raise_for_status()
 
-            url = f"{self.config_manager.read_config('utils', 'neptun_api_server_host')}/ai/huggingface/{model_publisher}/{model_name}/chat?chat_id={chat_id}"
-            logging.debug(f"Constructed URL: {url}")
+    async def stream_chat_message(self, messages: Union[ChatRequest, bytes], model: str = None, chat_id=None) \
+            -> AsyncIterator[StreamEvent]:
+        """Stream the reply to `messages`, from the active chat's model unless another one is given."""
+        config = self.config_manager.snapshot()
+        model_publisher, model_name = self.extract_parts(model or config.model)
+        chat_id = chat_id or config.chat_id
 
-            response = await self.async_client.post(url, json=messages.dict())
+        url = f"{config.neptun_api_server_host}/ai/huggingface/{model_publisher}/{model_name}/chat?chat_id={chat_id}"
+        logging.debug("Streaming from URL: %s", url)
 
-            logging.debug(f"Response received: {response.text}")
+        parser = DataStreamParser()
+
+        content, headers = self.chat_request_content(messages)
+        response = await self.transport.arequest("POST", url, stream=True, content=content, headers=headers)
+        try:
+            response.raise_for_status()
 
-            response_data = self.chat_response_converter.parse_response(response=response.text)
+            async for chunk in self.transport.resilience.iter_chunks(response):
+                for event in parser.feed(chunk):
+                    yield event
+        finally:
+            await response.aclose()
 
-            return response.text
+        for event in parser.close():
+            yield event
 
-        except ValidationError as ve:
-            logging.error(f"Validation error: {ve}")
-        except Exception as e:
-            logging.error(f"An error occurred: {e}")
-        return None
+    async def post_chat_message(self, messages: Union[ChatRequest, bytes]) -> str:
+        """Send the chat and return the raw data-stream body; transport errors and error statuses are raised."""
+        config = self.config_manager.snapshot()
+        model_publisher, model_name = self.extract_parts(config.model)
 
+        logging.debug("Sent object: %s", LogBody(messages))
 
-def parse_response(response: str) -> str:
-    lines = response.splitlines()
+        url = f"{config.neptun_api_server_host}/ai/huggingface/{model_publisher}/{model_name}/chat?chat_id={config.chat_id}"
+        logging.debug("Constructed URL: %s", url)
 
-    parsed_lines = []
+        content, headers = self.chat_request_content(messages)
+        response = await self.transport.arequest("POST", url, content=content, headers=headers)
+        response.raise_for_status()
 
-    for line in lines:
-        parsed_line = line.split(':')[1].strip().strip('"')
-        parsed_lines.append(parsed_line)
+        logging.debug("Response received: %s", LogBody(response.text))
 
-    return ''.join(parsed_lines)
+        return response.text
 
 
 async def main():
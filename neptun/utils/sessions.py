@@ -0,0 +1,98 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from neptun.model.responses import AuthVerdict
+from neptun.utils.exceptions import AuthServerUnavailableError
+from neptun.utils.managers import CONFIG_FILE_PATH, atomic_write
+
+AUTH_STATUS_PATH = CONFIG_FILE_PATH.parent / "auth-status.json"
+STATUS_TTL = 300.0
+
+SEAL_PREFIX = "Fe26.2"
+SEAL_PARTS = 8
+SEAL_EXPIRATION_INDEX = 5
+
+# treat a session as expired slightly early, local and server clocks are rarely in sync
+CLOCK_SKEW = 30.0
+
+
+def session_expiry(cookie: Optional[str]) -> Optional[float]:
+    """Expiry (unix time) of a sealed `Fe26.2` session cookie, None if it is not sealed or carries none.
+
+    The seal is `Fe26.2*id*salt*iv*data*expiration*hmac-salt*hmac`, the expiration is plain
+    milliseconds and is readable without the password.
+    """
+    if not cookie:
+        return None
+
+    parts = cookie.split("*")
+    if len(parts) != SEAL_PARTS or parts[0] != SEAL_PREFIX:
+        return None
+
+    expiration = parts[SEAL_EXPIRATION_INDEX]
+    return int(expiration) / 1000 if expiration.isdigit() else None
+
+
+def fingerprint(cookie: str) -> str:
+    """Identifies the cookie in the status file without storing it twice."""
+    return hashlib.sha256(cookie.encode()).hexdigest()
+
+
+class SessionValidator:
+    """Answers "is this session cookie still good?" locally where possible.
+
+    An expired seal is rejected offline. Otherwise the last verdict of the server is reused
+    for `ttl` seconds and `check` (the HEAD to /auth/check) only runs once it is stale. A check
+    without a clear yes or no raises AuthServerUnavailableError, the session may well be fine.
+    """
+
+    def __init__(self, check: Callable[[str], Optional[bool]], status_path=AUTH_STATUS_PATH, ttl: float = STATUS_TTL):
+        self.check = check
+        self.status_path = Path(status_path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def cached_verdict(self, cookie: str) -> Optional[AuthVerdict]:
+        try:
+            verdict = AuthVerdict(**json.loads(self.status_path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+
+        if verdict.fingerprint != fingerprint(cookie) or time.time() - verdict.checked_at > self.ttl:
+            return None
+        return verdict
+
+    def store(self, cookie: str, authenticated: bool) -> None:
+        verdict = AuthVerdict(fingerprint=fingerprint(cookie), authenticated=authenticated, checked_at=time.time())
+
+        with self._lock:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.status_path, lambda file: json.dump(verdict._asdict(), file))
+
+    def forget(self) -> None:
+        with self._lock:
+            self.status_path.unlink(missing_ok=True)
+
+    def is_authenticated(self, cookie: Optional[str], refresh: bool = False) -> bool:
+        if not cookie or cookie == "None":
+            return False
+
+        expiry = session_expiry(cookie)
+        if expiry is not None and expiry - CLOCK_SKEW <= time.time():
+            return False
+
+        if not refresh:
+            verdict = self.cached_verdict(cookie)
+            if verdict is not None:
+                return verdict.authenticated
+
+        authenticated = self.check(cookie)
+        # anything but a clear yes or no (e.g. a 5xx) is not worth remembering
+        if authenticated is None:
+            raise AuthServerUnavailableError()
+        self.store(cookie, authenticated)
+        return authenticated
@@ -0,0 +1,214 @@
+import asyncio
+import atexit
+import logging
+from importlib.util import find_spec
+from pathlib import Path
+
+import httpx
+
+from neptun.utils.cache import ResponseCache
+from neptun.utils.managers import ConfigManager, singleton
+from neptun.utils.resilience import ResilienceLayer
+from neptun.utils.metrics import MetricsStore, RequestTracer
+
+SESSION_COOKIE_NAME = "neptun-session"
+
+
+@singleton
+class HttpTransport:
+    """Pooled keep-alive connections shared by every service, closed at process exit.
+
+    The sync and the async client share one SSL context and the session cookie. Every event loop
+    gets its own async client, closed while that loop shuts down (see `_close_with_loop`).
+    """
+
+    def __init__(self):
+        self.config_manager = ConfigManager()
+        config = self.config_manager.snapshot()
+
+        self.limits = httpx.Limits(max_connections=config.http_max_connections,
+                                   max_keepalive_connections=config.http_max_keepalive_connections,
+                                   keepalive_expiry=config.http_keepalive_expiry)
+        self.http2 = config.http2 and find_spec("h2") is not None
+        if config.http2 and not self.http2:
+            logging.warning("http2 is enabled but the 'h2' package is not installed, falling back to HTTP/1.1")
+
+        # the read timeout bounds the wait for the first byte, streams also enforce chunk_timeout between chunks
+        self.timeout = httpx.Timeout(connect=config.http_connect_timeout, read=config.http_first_byte_timeout,
+                                     write=config.http_connect_timeout, pool=config.http_connect_timeout)
+        self.resilience = ResilienceLayer.from_config(config)
+
+        self.tracer = RequestTracer(self.record_timing) if config.metrics_enabled else None
+        self.metrics_max_samples = config.metrics_max_samples
+        self._metrics_store = None
+
+        self.cache_enabled = config.cache_enabled
+        self.cache_max_bytes = config.cache_max_bytes
+        self._response_cache = None
+
+        self.ssl_context = httpx.create_ssl_context()
+        self.session_cookie = config.neptun_session_cookie or None
+
+        self._client = None
+        # event loop -> (async client, the generator that closes it when the loop shuts down)
+        self._async_clients = {}
+
+        atexit.register(self.close)
+
+    @property
+    def metrics_store(self) -> MetricsStore:
+        """Request timings, kept next to the active config file."""
+        db_path = Path(self.config_manager.config_file_path).parent / "metrics.db"
+
+        if self._metrics_store is None or self._metrics_store.db_path != db_path:
+            if self._metrics_store is not None:
+                self._metrics_store.close()
+            self._metrics_store = MetricsStore(db_path, max_samples=self.metrics_max_samples)
+        return self._metrics_store
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        """Revalidatable GET responses, kept next to the active config file."""
+        db_path = Path(self.config_manager.config_file_path).parent / "cache.db"
+
+        if self._response_cache is None or self._response_cache.db_path != db_path:
+            if self._response_cache is not None:
+                self._response_cache.close()
+            self._response_cache = ResponseCache(db_path, max_bytes=self.cache_max_bytes)
+        return self._response_cache
+
+    def record_timing(self, timing) -> None:
+        self.metrics_store.record(timing)
+
+    def _client_options(self) -> dict:
+        return {
+            "limits": self.limits,
+            "timeout": self.timeout,
+            "http2": self.http2,
+            "verify": self.ssl_context,
+            "cookies": {SESSION_COOKIE_NAME: self.session_cookie} if self.session_cookie else None,
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            event_hooks = self.tracer.event_hooks() if self.tracer else None
+            self._client = httpx.Client(**self._client_options(), event_hooks=event_hooks)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        # a client made outside of any loop goes to the first loop that asks for one
+        if loop is not None and loop not in self._async_clients and None in self._async_clients:
+            client, _ = self._async_clients.pop(None)
+            self._async_clients[loop] = client, self._close_with_loop(client, loop)
+
+        client, _ = self._async_clients.get(loop, (None, None))
+        if client is None or client.is_closed:
+            # clients of loops that are gone were closed on the way out
+            self._async_clients = {known: entry for known, entry in self._async_clients.items()
+                                   if not entry[0].is_closed and (known is None or not known.is_closed())}
+
+            event_hooks = self.tracer.async_event_hooks() if self.tracer else None
+            client = httpx.AsyncClient(**self._client_options(), event_hooks=event_hooks)
+            self._async_clients[loop] = client, self._close_with_loop(client, loop) if loop is not None else None
+        return client
+
+    @staticmethod
+    def _close_with_loop(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        """Close `client` while `loop` shuts down, once the loop is closed its connections cannot be closed anymore.
+
+        asyncio.run (and Textual) finalizes every started async generator of the loop before closing it.
+        The loop only keeps a weak reference, the caller holds on to the returned generator.
+        """
+        async def close_at_shutdown():
+            try:
+                yield
+            finally:
+                await client.aclose()
+
+        closer = close_at_shutdown()
+        loop.create_task(closer.__anext__())
+        return closer
+
+    def request(self, method: str, url, hedge: bool = False, cache: bool = False, **kwargs) -> httpx.Response:
+        """Send with the sync client through the resilience layer (retries, circuit breaker, hedging).
+
+        With `cache=True` a GET is sent as a conditional request if an earlier answer is cached,
+        and a 304 comes back as that answer.
+        """
+        entry = self._prepare_cached(method, url, kwargs) if cache else None
+        response = self.resilience.send(self.client, method, url, hedge=hedge, **kwargs)
+        return self._settle_cached(entry, response) if cache else response
+
+    async def arequest(self, method: str, url, hedge: bool = False, stream: bool = False, cache: bool = False,
+                       **kwargs) -> httpx.Response:
+        """Async `request`; the cache's SQLite work runs in a worker thread, never on the event loop."""
+        cache = cache and not stream
+        entry = await asyncio.to_thread(self._prepare_cached, method, url, kwargs) if cache else None
+        response = await self.resilience.asend(self.async_client, method, url, hedge=hedge, stream=stream, **kwargs)
+        return await asyncio.to_thread(self._settle_cached, entry, response) if cache else response
+
+    def _prepare_cached(self, method: str, url, kwargs: dict):
+        if method != "GET" or not self.cache_enabled:
+            return None
+
+        request = self.client.build_request(method, url, params=kwargs.get("params"))
+        entry = self.response_cache.get(request)
+        if entry is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **ResponseCache.conditional_headers(entry)}
+        return entry
+
+    def _settle_cached(self, entry, response: httpx.Response) -> httpx.Response:
+        if response.request.method != "GET" or not self.cache_enabled:
+            return response
+
+        if response.status_code == 304 and entry is not None:
+            return self.response_cache.replay(entry, response)
+
+        self.response_cache.store(response)
+        return response
+
+    def invalidate_cache(self, *urls) -> None:
+        """Forget the cached answers of these URLs, e.g. after a write that changed them."""
+        if self.cache_enabled:
+            self.response_cache.invalidate(*urls)
+
+    def set_session_cookie(self, cookie) -> None:
+        self.session_cookie = cookie or None
+
+        for client in (self._client, *(client for client, _ in self._async_clients.values())):
+            if client is None:
+                continue
+            client.cookies.delete(SESSION_COOKIE_NAME)
+            if self.session_cookie:
+                client.cookies.set(SESSION_COOKIE_NAME, self.session_cookie)
+
+    async def aclose(self) -> None:
+        """Close the async client of the running loop."""
+        client, _ = self._async_clients.pop(asyncio.get_running_loop(), (None, None))
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            self._client.close()
+
+        if self._metrics_store is not None:
+            self._metrics_store.close()
+            self._metrics_store = None
+
+        if self._response_cache is not None:
+            self._response_cache.close()
+            self._response_cache = None
+
+        # loops that were run by hand and never shut down still have their client
+        for loop, (client, _) in list(self._async_clients.items()):
+            if not client.is_closed and loop is not None and not loop.is_closed() and not loop.is_running():
+                loop.run_until_complete(client.aclose())
+        self._async_clients.clear()
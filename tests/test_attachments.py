@@ -0,0 +1,107 @@
+import asyncio
+import gzip
+import hashlib
+
+import pytest
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+from neptun.bot.attachments import AttachmentBody, AttachmentPipeline
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+async def collect(body) -> bytes:
+    return b"".join([chunk async for chunk in body])
+
+
+def test_body_is_streamed_in_chunks_and_can_be_sent_again(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(256)) * 1000)
+    body = AttachmentBody(path, 200_000, chunk_size=4096)
+
+    first = asyncio.run(collect(body))
+    assert asyncio.run(collect(body)) == first
+    assert gzip.decompress(first) == path.read_bytes()[:200_000]
+    assert body.bytes_sent == len(first) < 200_000
+
+
+def test_unchanged_files_are_referenced_instead_of_sent_again(stand_in, tmp_path):
+    from neptun.bot.chat import Conversation
+
+    seen = []
+    stand_in.reply = lambda model, messages: seen.append(messages[-1].get("attachments")) or "ok"
+    notes = tmp_path / "notes.md"
+    notes.write_text("# notes\n" * 500)
+
+    async def turn(conversation, files):
+        stream = conversation.send("look at this", files=files)
+        await stream
+        return stream.attachment_report
+
+    async def chat():
+        conversation = Conversation()
+        first = await turn(conversation, [notes])
+        received = stand_in.bytes_received
+        again = await turn(conversation, [notes])
+        notes.write_text("# changed\n")
+        changed = await turn(conversation, [notes])
+        await conversation.chat_service.transport.aclose()
+        return first, stand_in.bytes_received - received, again, changed
+
+    first, sent_again, again, changed = asyncio.run(chat())
+
+    assert (first.uploaded, again.uploaded, again.referenced, changed.uploaded) == (1, 0, 1, 1)
+    # gzipped on the way out, the repeated turn only carries the reference
+    assert first.bytes_sent < first.bytes_read
+    assert sent_again < first.bytes_read
+    assert seen[0] == seen[1] == [{"digest": hashlib.sha256(b"# notes\n" * 500).hexdigest(), "name": "notes.md",
+                                   "size": 4000, "truncated": False}]
+    assert stand_in.attachments[1][seen[2][0]["digest"]] == b"# changed\n"
+
+
+def test_files_over_the_budget_are_cut_off_and_known_digests_are_not_uploaded(stand_in, tmp_path):
+    from neptun.utils.services import ChatService
+
+    path = tmp_path / "big.log"
+    path.write_bytes(b"line\n" * 1000)
+
+    async def prepare():
+        chat_service = ChatService()
+        attachments, report = await AttachmentPipeline(chat_service, max_bytes=1000).prepare([path])
+        # a new session only learns from the server that the chat has the file
+        _, again = await AttachmentPipeline(chat_service, max_bytes=1000).prepare([path])
+        await chat_service.transport.aclose()
+        return attachments, report, again
+
+    attachments, report, again = asyncio.run(prepare())
+
+    assert (attachments[0].size, attachments[0].truncated) == (1000, True)
+    assert stand_in.attachments[1][attachments[0].digest] == b"line\n" * 200
+    assert (report.uploaded, again.uploaded, again.referenced) == (1, 0, 1)
+
+
+def test_files_are_hashed_off_the_event_loop(stand_in, tmp_path):
+    import threading
+    from neptun.utils.services import ChatService
+
+    path = tmp_path / "notes.md"
+    path.write_text("# notes\n")
+    threads = []
+
+    async def prepare():
+        chat_service = ChatService()
+        pipeline = AttachmentPipeline(chat_service)
+        digest = pipeline.digest
+        pipeline.digest = lambda path: threads.append(threading.get_ident()) or digest(path)
+        await pipeline.prepare([path])
+        await chat_service.transport.aclose()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(prepare())
+
+    assert threads and loop_thread not in threads
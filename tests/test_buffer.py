@@ -0,0 +1,71 @@
+import json
+import sys
+
+from neptun.bot.buffer import BufferedMessage, ConversationBuffer
+from neptun.model.http_requests import Attachment, ChatRequest, Message
+
+
+def test_request_body_matches_the_pydantic_serialization():
+    buffer = ConversationBuffer()
+    buffer.add("system", "You write deployment scripts.")
+    buffer.add("user", 'Quote "this" and keep ünïcödé\nacross lines')
+
+    window = [*buffer, Message(role="assistant", content="collapsed ```code```")]
+    expected = ChatRequest(messages=[Message(role=message.role, content=message.content) for message in window])
+
+    assert json.loads(ConversationBuffer.request_body(window)) == \
+        json.loads(expected.model_dump_json(exclude_none=True))
+
+
+def test_each_message_is_serialized_once():
+    buffer = ConversationBuffer()
+    first = buffer.add("user", "hello")
+    fragment = first.fragment
+
+    buffer.add("assistant", "hi there")
+    ConversationBuffer.request_body(buffer)
+
+    assert first.fragment is fragment
+    assert buffer[0] == Message(role="user", content="hello")
+    assert buffer[1].role is sys.intern("assistant")
+
+
+def test_attachments_are_serialized_with_their_message():
+    buffer = ConversationBuffer()
+    message = buffer.add("user", "see attached")
+    stale = message.fragment
+
+    attachments = [Attachment(digest="ab" * 32, name="notes.md", size=12)]
+    message.attach(attachments)
+
+    assert message.fragment != stale
+    assert json.loads(ConversationBuffer.request_body(buffer)) == \
+        json.loads(ChatRequest(messages=[Message(role="user", content="see attached", attachments=attachments)])
+                   .model_dump_json(exclude_none=True))
+
+
+def test_total_tokens_follow_every_change():
+    buffer = ConversationBuffer()
+    for index in range(6):
+        buffer.add("user", f"message number {index} " * (index + 1))
+
+    def total():
+        return sum(message.tokens for message in buffer)
+
+    buffer.pop()
+    buffer.pop(0)
+    assert buffer.total_tokens == total()
+
+    buffer.insert(1, BufferedMessage("assistant", "inserted " * 20))
+    buffer.remove(buffer[2])
+    buffer[0] = BufferedMessage("system", "replaced")
+    buffer[1:3] = [BufferedMessage("user", "sliced in " * 10)]
+    del buffer[-1]
+    buffer += [BufferedMessage("assistant", "added")]
+    assert buffer.total_tokens == total()
+
+    del buffer[:1]
+    assert buffer.total_tokens == total()
+
+    buffer.clear()
+    assert buffer.total_tokens == 0
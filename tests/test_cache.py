@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+from neptun.utils.cache import ResponseCache
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def make_response(url: str, body: bytes, etag: str) -> httpx.Response:
+    response = httpx.Response(200, headers={"ETag": etag, "Content-Type": "application/json"}, content=body,
+                              request=httpx.Request("GET", url))
+    response.read()
+    return response
+
+
+def test_repeated_reads_are_revalidated_and_writes_invalidate(stand_in):
+    from neptun.model.http_requests import CreateChatHttpRequest
+    from neptun.utils.services import ChatService
+
+    stand_in.add_chat("first")
+    stand_in.add_message(chat_id=1, message="hello")
+    chat_service = ChatService()
+
+    assert [chat.name for chat in chat_service.get_available_ai_chats().chats] == ["first"]
+    assert [chat.name for chat in chat_service.get_available_ai_chats().chats] == ["first"]
+    assert stand_in.not_modified == 1
+
+    for _ in range(2):
+        messages = asyncio.run(chat_service.get_chat_messages_by_chat_id(chat_id=1))
+        assert [message.message for message in messages.chat_messages] == ["hello"]
+    assert stand_in.not_modified == 2
+
+    chat_service.create_chat(CreateChatHttpRequest(name="second", model="mistralai/Mistral-7B-Instruct-v0.1"))
+    assert [chat.name for chat in chat_service.get_available_ai_chats().chats] == ["second", "first"]
+    assert stand_in.not_modified == 2
+
+    assert chat_service.delete_selected_chat(1)
+    assert chat_service.transport.response_cache.get(httpx.Request("GET", f"{stand_in.url}/users/1/chats/1/messages")) \
+        is None
+    assert [chat.name for chat in chat_service.get_available_ai_chats().chats] == ["second"]
+
+
+def test_least_recently_used_responses_are_evicted_over_the_size_cap(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.db", max_bytes=250)
+
+    for name in ("a", "b"):
+        cache.store(make_response(f"http://api/{name}", b"x" * 100, f'"{name}"'))
+    cache.get(httpx.Request("GET", "http://api/a"))
+    cache.store(make_response("http://api/c", b"x" * 100, '"c"'))
+
+    assert cache.get(httpx.Request("GET", "http://api/b")) is None
+    assert cache.get(httpx.Request("GET", "http://api/a")).etag == '"a"'
+    assert cache.size() == 200
+
+
+def test_async_requests_use_the_cache_off_the_event_loop(stand_in, monkeypatch):
+    import threading
+    from neptun.utils.services import ChatService
+
+    stand_in.add_message(chat_id=1, message="hello")
+    threads = []
+    for name in ("get", "store", "replay"):
+        original = getattr(ResponseCache, name)
+
+        def spy(self, *args, original=original):
+            threads.append(threading.current_thread())
+            return original(self, *args)
+
+        monkeypatch.setattr(ResponseCache, name, spy)
+
+    for _ in range(2):
+        asyncio.run(ChatService().get_chat_messages_by_chat_id(chat_id=1))
+
+    assert stand_in.not_modified == 1
+    assert threads and threading.main_thread() not in threads
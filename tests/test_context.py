@@ -0,0 +1,75 @@
+from neptun.bot.context import ContextWindow, COLLAPSED_CODE_BLOCK, estimate_message_tokens
+from neptun.model.http_requests import Message
+
+CODE = "```yaml\nservices:\n  db:\n    image: mysql:latest\n    environment:\n      MYSQL_DATABASE: mydb\n" \
+       "      MYSQL_USER: username\n      MYSQL_PASSWORD: password\n```"
+
+
+def conversation(turns: int) -> list[Message]:
+    messages = [Message(role="system", content="You generate deployment scripts.")]
+    for turn in range(turns):
+        messages.append(Message(role="user", content=f"question {turn} " + "word " * 50))
+        messages.append(Message(role="assistant", content=f"answer {turn} " + "word " * 50))
+    return messages
+
+
+def test_payload_stays_within_budget_however_long_the_chat_runs():
+    context_window = ContextWindow(model="mistralai/Mistral-7B-Instruct-v0.1", max_tokens=1024,
+                                   reserved_completion_tokens=0)
+
+    for turns in (10, 100, 1000):
+        messages = conversation(turns)
+        window, report = context_window.apply(messages)
+
+        assert report.tokens_sent == sum(estimate_message_tokens(message) for message in window)
+        assert report.tokens_sent <= 1024
+        assert window[0].role == "system"
+        assert window[-1] is messages[-1]
+        assert report.messages_trimmed == len(messages) - len(window)
+
+
+def test_keep_last_keeps_system_messages():
+    context_window = ContextWindow(model=None, keep_last=2, max_tokens=100_000)
+
+    window, report = context_window.apply(conversation(5))
+
+    assert [message.role for message in window] == ["system", "user", "assistant"]
+    assert report.messages_trimmed == 8
+
+
+def test_repeated_code_blocks_are_collapsed_except_the_newest():
+    messages = [
+        Message(role="assistant", content=f"first\n{CODE}"),
+        Message(role="user", content="again please"),
+        Message(role="assistant", content=f"second\n{CODE}"),
+    ]
+
+    window, report = ContextWindow(model=None, max_tokens=100_000).apply(messages)
+
+    assert window[0].content == f"first\n{COLLAPSED_CODE_BLOCK}"
+    assert window[2] is messages[2]
+    assert report.messages_trimmed == 0
+    assert report.tokens_trimmed > 0
+
+
+def test_buffered_messages_are_estimated_once_and_totalled_as_they_arrive(monkeypatch):
+    from neptun.bot import buffer as buffer_module
+    from neptun.bot.buffer import BufferedMessage, ConversationBuffer
+
+    messages = conversation(20)
+    buffer = ConversationBuffer(BufferedMessage(message.role, message.content) for message in messages[:-1])
+    buffer.extend([BufferedMessage(messages[-1].role, messages[-1].content)])
+
+    estimated = []
+    original = buffer_module.estimate_tokens
+    monkeypatch.setattr(buffer_module, "estimate_tokens", lambda text: estimated.append(text) or original(text))
+    context_window = ContextWindow(model=None, max_tokens=1024, reserved_completion_tokens=0, collapse_code=False)
+
+    for turn in range(3):
+        buffer.add("user", f"follow-up {turn}")
+        window, report = context_window.apply(buffer)
+
+    assert estimated == [f"follow-up {turn}" for turn in range(3)]
+    assert buffer.total_tokens == sum(estimate_message_tokens(message) for message in buffer)
+    assert report == context_window.apply([*messages, *[Message(role="user", content=f"follow-up {turn}")
+                                                        for turn in range(3)]])[1]
@@ -0,0 +1,34 @@
+import json
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from neptun.model.http_responses import ChatsHttpResponse, GeneralErrorResponse
+from neptun.utils.decoding import ResponseDecoder
+
+decoder = ResponseDecoder(ChatsHttpResponse, GeneralErrorResponse)
+
+
+def test_the_model_is_picked_by_status_code():
+    chats = decoder.decode(httpx.Response(200, content=b'{"chats": []}'))
+    error = decoder.decode(httpx.Response(404, content=b'{"statusCode": 404, "statusMessage": "Not Found"}'))
+
+    assert chats == ChatsHttpResponse(chats=[])
+    assert error == GeneralErrorResponse(statusCode=404, statusMessage="Not Found")
+
+
+def test_an_error_reported_with_a_success_status_still_decodes():
+    error = decoder.decode(httpx.Response(200, content=b'{"statusCode": 401, "statusMessage": "Unauthorized"}'))
+    assert error.statusCode == 401
+
+    with pytest.raises(ValidationError):
+        decoder.decode(httpx.Response(200, content=b'{"chats": "none"}'))
+
+
+def test_a_body_that_is_not_json_fails_the_way_callers_expect():
+    error = decoder.decode(httpx.Response(502, content=b"<html>Bad Gateway</html>"))
+    assert error == GeneralErrorResponse(statusCode=502, statusMessage="Bad Gateway")
+
+    with pytest.raises(json.JSONDecodeError):
+        decoder.decode(httpx.Response(200, content=b"<html>Maintenance</html>"))
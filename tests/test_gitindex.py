@@ -0,0 +1,96 @@
+import os
+import subprocess
+
+import pytest
+
+from neptun.utils.gitindex import Repository, SnapshotStore, blob_id, describe_delta, read_index
+
+
+def git(root, *args) -> str:
+    return subprocess.run(["git", "-C", str(root), *args], check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src" / "deep").mkdir(parents=True)
+    (root / "README.md").write_text("# repo\n")
+    (root / "src" / "app.py").write_text("print('app')\n")
+    (root / "src" / "deep" / "a-rather-long-module-name.py").write_text("x = 1\n")
+    (root / "src" / "deep" / "a-rather-long-module-name2.py").write_text("x = 2\n")
+    git(root, "init", "-q")
+    git(root, "add", ".")
+    # push every file's mtime before the index write, so nothing is racily clean
+    for path in root.rglob("*"):
+        if ".git" not in path.parts:
+            os.utime(path, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+    git(root, "update-index", "--really-refresh")
+    return root
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_index_entries_match_git(repo, version):
+    git(repo, "update-index", "--index-version", version)
+
+    expected = {}
+    for line in git(repo, "ls-files", "-s").splitlines():
+        meta, path = line.split("\t")
+        expected[path] = meta.split()[1]
+
+    entries = read_index(repo / ".git" / "index")
+    assert {path: entry.object_id for path, entry in entries.items()} == expected
+    assert blob_id(repo / "src" / "app.py", 13) == git(repo, "hash-object", "src/app.py").strip()
+
+
+def test_only_the_delta_is_hashed_and_described(repo, tmp_path):
+    repository = Repository(repo, store=SnapshotStore(tmp_path / "repositories"))
+
+    first = repository.delta()
+    assert first.first_snapshot and first.tracked == 4 and first.hashed == 0
+    assert "contents not included" in describe_delta(repo, first)
+    repository.mark_sent(first)
+
+    unchanged = repository.delta()
+    assert (unchanged.added, unchanged.modified, unchanged.deleted, unchanged.hashed) == ([], [], [], 0)
+
+    (repo / "src" / "app.py").write_text("print('changed')\n")
+    (repo / "README.md").unlink()
+    (repo / "new.txt").write_text("new\n")
+    git(repo, "add", "new.txt")
+
+    delta = repository.delta()
+    assert delta.added == ["new.txt"]
+    assert delta.modified == ["src/app.py"]
+    assert delta.deleted == ["README.md"]
+    assert delta.hashed <= 2
+    assert delta.identities["src/app.py"] == git(repo, "hash-object", "src/app.py").strip()
+
+    description = describe_delta(repo, delta)
+    assert "3 of 4 tracked files changed" in description
+    assert "print('changed')" in description and "# repo" not in description
+
+    repository.mark_sent(delta)
+    assert not repository.delta().modified
+
+
+def test_every_chat_has_its_own_snapshot(repo, tmp_path):
+    store = SnapshotStore(tmp_path / "repositories")
+    Repository(repo, store=store, chat_id=1).mark_sent(Repository(repo, store=store, chat_id=1).delta())
+
+    assert not Repository(repo, store=store, chat_id=1).delta().first_snapshot
+    assert Repository(repo, store=store, chat_id=2).delta().first_snapshot
+
+
+def test_printing_the_context_does_not_advance_the_snapshot(repo, tmp_path):
+    from typer.testing import CliRunner
+    from benchmarks.stand_in import configure_config_manager
+    from neptun.cmd.github import github_app, open_repository
+
+    configure_config_manager("http://localhost", tmp_path)
+
+    for _ in range(2):
+        result = CliRunner().invoke(github_app, ["context", str(repo)])
+        assert result.exit_code == 0
+        assert "first snapshot" in result.output
+
+    assert open_repository(repo).delta().first_snapshot
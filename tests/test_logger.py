@@ -0,0 +1,82 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from neptun.utils.logger import LogBody
+
+SCRIPT = """
+import logging
+from neptun.utils.logger import setup_logging, LogBody
+
+setup_logging()
+setup_logging()
+
+class Exploding:
+    def __str__(self):
+        raise AssertionError("serialized although DEBUG is off")
+
+logging.debug("Sent object: %s", LogBody(Exploding()))
+for index in range(500):
+    logging.info("Response received: %s", LogBody(str(index) * 500))
+"""
+
+
+def test_log_bodies_are_truncated_lazily():
+    body = LogBody("x" * 5000)
+
+    assert str(body).startswith("x" * 2000)
+    assert str(body).endswith("... [3000 more characters]")
+    assert str(LogBody("short")) == "short"
+
+
+def test_logs_rotate_under_the_app_dir_and_skip_disabled_levels(tmp_path):
+    config_dir = tmp_path / "neptun" / "config"
+    config_dir.mkdir(parents=True)
+    (config_dir / "config.ini").write_text("[logging]\nlevel = INFO\nmax_bytes = 20000\nbackup_count = 2\n"
+                                           "max_body_chars = 100\n")
+
+    working_dir = tmp_path / "work"
+    working_dir.mkdir()
+
+    subprocess.run([sys.executable, "-c", SCRIPT], check=True, cwd=working_dir,
+                   env={"XDG_CONFIG_HOME": str(tmp_path), "PYTHONPATH": str(Path(__file__).parents[1])})
+
+    log_files = sorted(path.name for path in (tmp_path / "neptun").glob("neptun.log*"))
+    assert log_files == ["neptun.log", "neptun.log.1", "neptun.log.2"]
+    assert "more characters]" in (tmp_path / "neptun" / "neptun.log").read_text()
+    assert list(working_dir.iterdir()) == []
+
+
+def test_bodies_are_rendered_on_the_listener_thread():
+    import logging
+    import logging.handlers
+    import queue
+    import threading
+
+    from neptun.utils.logger import DeferredQueueHandler
+
+    class Recorded:
+        def __str__(self):
+            rendered_on.append(threading.get_ident())
+            return "body"
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            messages.append(self.format(record))
+
+    rendered_on, messages = [], []
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, Collect())
+    logger = logging.getLogger("test_deferred")
+    logger.propagate = False
+    logger.addHandler(DeferredQueueHandler(log_queue))
+
+    listener.start()
+    try:
+        logger.warning("Sent object: %s", LogBody(Recorded()))
+        logger.warning("Mutable: %s", [1])
+    finally:
+        listener.stop()
+
+    assert messages == ["Sent object: body", "Mutable: [1]"]
+    assert rendered_on and threading.get_ident() not in rendered_on
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from neptun.utils.managers import ConfigManager
+
+CONFIG = """[utils]
+neptun_api_server_host = http://localhost
+
+[auth]
+neptun_session_cookie = cookie
+
+[auth.user]
+id = 5
+email = test@example.com
+
+[active_chat]
+chat_id = 12
+chat_name = test
+model = mistralai/Mistral-7B-Instruct-v0.1
+"""
+
+
+def make_config_manager(tmp_path) -> ConfigManager:
+    config_file_path = tmp_path / "config.ini"
+    config_file_path.write_text(CONFIG)
+    return ConfigManager.__wrapped__(config_file_path)
+
+
+def test_read_config_does_not_reparse_unchanged_file(tmp_path):
+    config_manager = make_config_manager(tmp_path)
+
+    assert config_manager.read_config("auth.user", "id") == "5"
+    parsed = config_manager.config
+
+    assert config_manager.read_config("active_chat", "chat_id") == "12"
+    assert config_manager.config is parsed
+    assert config_manager.snapshot() is config_manager.snapshot()
+
+
+def test_snapshot_follows_external_edits(tmp_path):
+    config_manager = make_config_manager(tmp_path)
+    assert config_manager.snapshot().chat_id == "12"
+
+    config_file_path = tmp_path / "config.ini"
+    config_file_path.write_text(CONFIG.replace("chat_id = 12", "chat_id = 345"))
+    os.utime(config_file_path, ns=(0, 0))
+
+    snapshot = config_manager.snapshot()
+    assert snapshot.chat_id == "345"
+    assert snapshot.model == "mistralai/Mistral-7B-Instruct-v0.1"
+    assert snapshot.user_id == "5"
+
+
+def test_transaction_commits_all_updates_in_one_write(tmp_path, monkeypatch):
+    config_manager = make_config_manager(tmp_path)
+    replaced = []
+    original_replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda *args: replaced.append(args) or original_replace(*args))
+
+    config_manager.update_active_chat(id=99, name="other", model="OpenAssistant/oasst-sft-4-pythia-12b-epoch-3.5")
+
+    assert len(replaced) == 1
+    reloaded = ConfigManager.__wrapped__(tmp_path / "config.ini")
+    assert reloaded.read_config("active_chat", "chat_id") == "99"
+    assert reloaded.read_config("active_chat", "chat_name") == "other"
+    assert reloaded.read_config("auth.user", "email") == "test@example.com"
+    assert not [path for path in os.listdir(tmp_path) if path.endswith(".tmp")]
+
+
+def test_transaction_merges_writes_from_other_processes(tmp_path):
+    config_manager = make_config_manager(tmp_path)
+    other_process = ConfigManager.__wrapped__(tmp_path / "config.ini")
+    assert config_manager.read_config("auth.user", "id") == "5"
+
+    other_process.write_config("auth.user", "id", "7")
+    config_manager.write_config("active_chat", "chat_id", "13")
+
+    assert other_process.read_config("active_chat", "chat_id") == "13"
+    assert config_manager.read_config("auth.user", "id") == "7"
+
+
+def test_failed_transaction_leaves_the_config_untouched(tmp_path, monkeypatch):
+    config_manager = make_config_manager(tmp_path)
+    assert config_manager.read_config("active_chat", "chat_id") == "12"
+
+    def replace(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", replace)
+
+    with pytest.raises(OSError):
+        config_manager.update_active_chat(id=99, name="other", model="OpenAssistant/oasst-sft-4-pythia-12b-epoch-3.5")
+
+    assert config_manager.read_config("active_chat", "chat_id") == "12"
+    assert config_manager.snapshot().chat_name == "test"
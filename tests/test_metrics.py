@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+from typer.testing import CliRunner
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+from neptun.model.responses import RequestTiming
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def test_every_request_is_timed_per_endpoint_and_model(stand_in):
+    from neptun.utils.metrics import summarize
+    from neptun.utils.runners import compare_models
+    from neptun.utils.services import ChatService
+    from neptun.utils.transport import HttpTransport
+
+    stand_in.add_message(1, "hello")
+    ChatService().get_available_ai_chats()
+
+    async def requests():
+        await ChatService().get_chat_messages_by_chat_id(1)
+        await compare_models("hi", ["a/b", "c/d"])
+        await HttpTransport().aclose()
+
+    asyncio.run(requests())
+
+    timings = HttpTransport().metrics_store.get_timings()
+    by_endpoint = {summary.name: summary for summary in summarize(timings, lambda timing: timing.endpoint)}
+    by_model = {summary.name: summary for summary in summarize(timings, lambda timing: timing.model)}
+
+    # compare_models also creates and deletes a temporary chat per model
+    assert set(by_endpoint) == {"/users/{id}/chats", "/users/{id}/chats/{id}", "/users/{id}/chats/{id}/messages",
+                                "/ai/huggingface/{model}/chat"}
+    assert set(by_model) == {"a/b", "c/d"}
+    stream = next(timing for timing in timings if timing.model == "a/b")
+    assert stream.status == 200 and stream.request_bytes > 0 and stream.response_bytes > 0
+    assert 0 < stream.time_to_first_byte <= stream.total
+
+
+def test_streamed_uploads_count_the_bytes_sent(stand_in, tmp_path):
+    from neptun.bot.attachments import AttachmentBody, digest_file
+    from neptun.utils.services import ChatService
+    from neptun.utils.transport import HttpTransport
+
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(256)) * 1000)
+    body = AttachmentBody(path, 200_000, chunk_size=4096, compress=False)
+    digest, _ = digest_file(path, 200_000)
+
+    async def upload():
+        await ChatService().upload_attachment(digest, body, compressed=False)
+        await HttpTransport().aclose()
+
+    asyncio.run(upload())
+
+    upload_timing = next(timing for timing in HttpTransport().metrics_store.get_timings() if timing.method == "PUT")
+    assert upload_timing.request_bytes == body.bytes_sent == 200_000
+
+
+def test_timings_are_written_in_the_background(tmp_path):
+    from neptun.utils.metrics import FLUSH_EVERY, MetricsStore
+
+    store = MetricsStore(tmp_path / "metrics.db")
+    timing = RequestTiming("GET", "/", None, 200, None, None, None, 0.1, 0.1, 0.2, 0, 10, 0.0)
+    for _ in range(FLUSH_EVERY):
+        store.record(timing)
+
+    deadline = time.monotonic() + 2
+    while store._buffer and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not store._buffer
+    assert len(store.get_timings()) == FLUSH_EVERY
+    store.close()
+
+def test_diag_prints_percentiles_and_probes_the_api(stand_in):
+    from neptun.cmd.diag import diag_app
+    from neptun.utils.services import AuthenticationService
+
+    AuthenticationService().check_authenticated("stand-in-session")
+
+    result = CliRunner().invoke(diag_app, ["--probes", "2"])
+
+    assert result.exit_code == 0
+    assert "/auth/check" in result.stdout
+    assert "Probe: HEAD" in result.stdout
+
+
+def test_diag_refuses_to_probe_without_an_api_server(stand_in):
+    from neptun.cmd.diag import diag_app
+    from neptun.utils.managers import ConfigManager
+
+    ConfigManager().update_config_dynamically(query="utils.neptun_api_server_host=None")
+
+    result = CliRunner().invoke(diag_app, ["--probes", "1"])
+
+    assert result.exit_code == 1
+    assert "No usable API server configured" in result.output
+    assert "Probe: HEAD" not in result.output
@@ -1,4 +1,46 @@
+import json
+
 from typer.testing import CliRunner
 from neptun import __app_name__, __version__, cli
+from neptun.model.responses import TextDelta, FinishEvent, ErrorEvent, DataEvent
+from neptun.utils.parsers import DataStreamParser, parse_stream_text
 
 runner = CliRunner()
+
+
+def test_stream_parser_keeps_colons_and_escapes():
+    body = '0:"mysql"\n0:":/"\n0:"build"\n0:":."\n0:"\\n"\n0:" \\""\n'
+
+    assert parse_stream_text(body) == 'mysql:/build:.\n "'
+
+
+def test_stream_parser_resumes_across_chunk_boundaries():
+    body = ('0:"Grüß"\n0:"\\u00e9"\n3:"rate limited"\nd:{"finishReason":"stop",'
+            '"usage":{"promptTokens":3,"completionTokens":2}}\n2:[1]').encode()
+    parser = DataStreamParser()
+
+    events = []
+    for i in range(len(body)):
+        events += parser.feed(body[i:i + 1])
+    events += parser.close()
+
+    assert events == [
+        TextDelta("Grüß"),
+        TextDelta("é"),
+        ErrorEvent("rate limited"),
+        FinishEvent(finish_reason="stop", prompt_tokens=3, completion_tokens=2),
+        DataEvent("2", [1]),
+    ]
+
+
+def test_stream_parser_round_trips_generated_tokens():
+    tokens = ["Here", ":", " \"quoted\"", "\n\n", "tab\t", "\\", "{}"]
+    body = ''.join(f"0:{json.dumps(token)}\n" for token in tokens)
+
+    assert parse_stream_text(body) == ''.join(tokens)
+
+
+def test_stream_parser_skips_invalid_frames_without_losing_neighbours():
+    body = '0:"a"\n0:"\\x"\n0:"b"\n'
+
+    assert parse_stream_text(body) == 'ab'
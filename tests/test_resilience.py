@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.stand_in import Faults, NeptunStandIn, configure_config_manager
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+@pytest.fixture
+def resilience():
+    from neptun.utils.resilience import ResilienceLayer
+    from neptun.utils.transport import HttpTransport
+
+    transport = HttpTransport()
+    previous, transport.resilience = transport.resilience, ResilienceLayer(backoff_base=0.001, backoff_max=0.01)
+    yield transport.resilience
+    transport.resilience = previous
+
+
+def test_idempotent_requests_are_retried_through_errors_and_resets(stand_in, resilience):
+    from neptun.model.http_responses import ChatsHttpResponse
+    from neptun.utils.services import ChatService
+
+    stand_in.add_chat("flaky")
+    stand_in.faults = Faults(error_rate=0.2, reset_rate=0.2)
+    resilience.breaker_threshold = 100
+
+    assert all(isinstance(ChatService().get_available_ai_chats(), ChatsHttpResponse) for _ in range(20))
+
+
+def test_circuit_breaker_stops_calling_a_failing_host(stand_in, resilience):
+    from neptun.utils.exceptions import CircuitOpenError
+    from neptun.utils.services import ChatService
+
+    stand_in.faults = Faults(error_rate=1.0)
+    resilience.retries = 0
+    resilience.breaker_threshold = 3
+
+    for _ in range(3):
+        assert asyncio.run(ChatService().get_chat_messages_by_chat_id(1)).statusCode == 503
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(ChatService().get_chat_messages_by_chat_id(1))
+
+    stand_in.faults = Faults()
+    resilience.breakers[httpx.URL(stand_in.url).netloc.decode()].opened_at -= resilience.breaker_reset
+    assert asyncio.run(ChatService().get_chat_messages_by_chat_id(1)).chat_messages == []
+
+
+def test_hedged_requests_cut_the_tail_of_slow_answers(stand_in, resilience):
+    from neptun.utils.services import ChatService
+
+    stand_in.faults = Faults(slow_rate=0.3, slow_delay=1.0)
+    resilience.hedge_delay = 0.05
+
+    async def fetch():
+        start = time.perf_counter()
+        await ChatService().get_chat_messages_by_chat_id(1)
+        return time.perf_counter() - start
+
+    latencies = [asyncio.run(fetch()) for _ in range(10)]
+
+    assert max(latencies) < 1.0
+
+
+def test_the_losing_hedged_response_is_closed():
+    from neptun.utils.resilience import ResilienceLayer
+
+    layer = ResilienceLayer(hedge_delay=0.02)
+    delays, responses = [0.2, 0.0], []
+
+    def request():
+        time.sleep(delays.pop(0))
+        response = httpx.Response(200, stream=httpx.ByteStream(b"{}"))
+        responses.append(response)
+        return response
+
+    winner = layer._hedged(request)
+    time.sleep(0.3)
+
+    assert winner is responses[0] and not winner.is_closed
+    assert responses[1].is_closed
+
+
+def test_commands_report_an_open_circuit(stand_in, resilience):
+    from typer.testing import CliRunner
+    from neptun import cli
+
+    resilience.breaker_threshold = 1
+    resilience.breaker(stand_in.url).record_failure()
+
+    result = CliRunner().invoke(cli.app, ["assistant", "list"])
+
+    assert result.exit_code == 1
+    assert "Service unavailable" in result.output and "retry in 30s" in result.output
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def test_ask_streams_the_answer_for_a_prompt_on_stdin(stand_in):
+    from neptun.cmd.assistant import assistant_app
+
+    result = CliRunner().invoke(assistant_app, ["ask"], input="How do I run nginx?")
+
+    assert result.exit_code == 0
+    assert result.stdout == "mistralai/Mistral-7B-Instruct-v0.1 says: How do I run nginx?\n"
+
+
+def test_ask_batch_writes_one_result_per_prompt(stand_in, tmp_path):
+    from neptun.cmd.assistant import assistant_app
+
+    batch_file = tmp_path / "prompts.jsonl"
+    batch_file.write_text("\n".join([json.dumps({"id": f"job-{index}", "prompt": f"prompt {index}"})
+                                     for index in range(20)] + [json.dumps("plain prompt")]))
+    output_file = tmp_path / "results.jsonl"
+
+    result = CliRunner().invoke(assistant_app, ["ask", "--batch", str(batch_file), "--output", str(output_file),
+                                                "--concurrency", "4", "--model", "test/model"])
+
+    assert result.exit_code == 0
+    results = {item["id"]: item for item in map(json.loads, output_file.read_text().splitlines())}
+    assert len(results) == 21
+    assert results["job-7"]["output"] == "test/model says: prompt 7"
+    assert results[21]["output"] == "test/model says: plain prompt"
+    assert all(item["error"] is None and item["latency"] > 0 for item in results.values())
+
+
+def test_compare_streams_one_prompt_to_every_model(stand_in):
+    from neptun import AVAILABLE_MODELS
+    from neptun.cmd.assistant import assistant_app
+
+    result = CliRunner().invoke(assistant_app, ["compare", "Hello there", "--json"])
+
+    assert result.exit_code == 0
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [item["model"] for item in results] == AVAILABLE_MODELS
+    for item in results:
+        assert item["output"] == f"{item['model']} says: Hello there"
+        assert item["tokens"] == 4
+        assert 0 < item["time_to_first_token"] <= item["latency"]
+
+
+def test_ask_batch_sends_the_project_context_with_every_prompt(stand_in, tmp_path):
+    from neptun.cmd.assistant import assistant_app
+
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "requirements.txt").write_text("fastapi\n")
+    stand_in.reply = lambda model, messages: "with context" if messages[0]["role"] == "system" else "without"
+
+    batch_file = tmp_path / "prompts.jsonl"
+    batch_file.write_text("\n".join(json.dumps(f"prompt {index}") for index in range(3)))
+
+    output_file = tmp_path / "results.jsonl"
+
+    result = CliRunner().invoke(assistant_app, ["ask", "--batch", str(batch_file), "--output", str(output_file),
+                                                "--project", str(project)])
+
+    assert result.exit_code == 0
+    assert [json.loads(line)["output"] for line in output_file.read_text().splitlines()] == ["with context"] * 3
+
+
+def test_ask_batch_reports_a_missing_batch_file(stand_in, tmp_path):
+    from neptun.cmd.assistant import assistant_app
+
+    result = CliRunner().invoke(assistant_app, ["ask", "--batch", str(tmp_path / "missing.jsonl")])
+
+    assert result.exit_code == 1
+    assert "Could not open" in result.output
+
+
+def test_headless_prompts_never_touch_the_active_chat(stand_in, tmp_path):
+    from neptun.cmd.assistant import assistant_app
+    from neptun.utils.managers import ConfigManager
+
+    active_chat = stand_in.add_chat("active")
+    assert int(ConfigManager().snapshot().chat_id) == active_chat["id"]
+    batch_file = tmp_path / "prompts.jsonl"
+    batch_file.write_text("\n".join(json.dumps(f"prompt {index}") for index in range(3)))
+
+    assert CliRunner().invoke(assistant_app, ["ask", "single prompt"]).exit_code == 0
+    assert CliRunner().invoke(assistant_app, ["ask", "--batch", str(batch_file),
+                                              "--output", str(tmp_path / "out.jsonl")]).exit_code == 0
+
+    assert len(stand_in.streamed_chats) == 4 and active_chat["id"] not in stand_in.streamed_chats
+    # the temporary chats are deleted again
+    assert stand_in.chats == [active_chat]
+
+
+def test_ask_posts_to_the_chat_given_with_chat(stand_in):
+    from neptun.cmd.assistant import assistant_app
+
+    chat = stand_in.add_chat("ci")
+
+    result = CliRunner().invoke(assistant_app, ["ask", "--chat", str(chat["id"]), "hello"])
+
+    assert result.exit_code == 0
+    assert stand_in.streamed_chats == [chat["id"]]
+    assert stand_in.chats == [chat]
+
+
+def test_compare_uses_a_temporary_chat_per_model(stand_in):
+    from neptun import AVAILABLE_MODELS
+    from neptun.cmd.assistant import assistant_app
+
+    active_chat = stand_in.add_chat("active")
+    created = []
+    add_chat = stand_in.add_chat
+    stand_in.add_chat = lambda *args, **kwargs: created.append(add_chat(*args, **kwargs)) or created[-1]
+
+    result = CliRunner().invoke(assistant_app, ["compare", "Hello there", "--json"])
+
+    assert result.exit_code == 0
+    assert sorted(chat["model"] for chat in created) == sorted(AVAILABLE_MODELS)
+    assert sorted(stand_in.streamed_chats) == sorted(chat["id"] for chat in created)
+    assert active_chat["id"] not in stand_in.streamed_chats
+    assert stand_in.chats == [active_chat]
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from neptun.utils.scanner import ManifestStore, ProjectScanner, describe_manifest, translate_ignore_pattern
+
+
+def matches(pattern: str, path: str, is_dir: bool = False) -> bool:
+    regex, negated, directories_only = translate_ignore_pattern(pattern)
+    return bool(regex.match(path)) and (is_dir or not directories_only)
+
+
+@pytest.mark.parametrize("pattern, path, is_dir, expected", [
+    ("*.log", "app.log", False, True),
+    ("*.log", "logs/deep/app.log", False, True),
+    ("/build", "build", True, True),
+    ("/build", "src/build", True, False),
+    ("node_modules/", "web/node_modules", True, True),
+    ("node_modules/", "node_modules", False, False),
+    ("docs/**/*.md", "docs/a/b/readme.md", False, True),
+    ("docs/**/*.md", "readme.md", False, False),
+    ("file[0-9].txt", "file7.txt", False, True),
+])
+def test_gitignore_patterns(pattern, path, is_dir, expected):
+    assert matches(pattern, path, is_dir) is expected
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "web" / "node_modules" / "react").mkdir(parents=True)
+    (root / "api").mkdir()
+    (root / ".gitignore").write_text("node_modules/\n*.log\n!keep.log\n")
+    (root / "api" / ".gitignore").write_text("/local.env\n")
+    (root / "web" / "package.json").write_text('{"dependencies": {"next": "14", "react": "18"}}')
+    (root / "web" / "node_modules" / "react" / "index.js").write_text("module.exports = {}")
+    (root / "api" / "pyproject.toml").write_text('[project]\nrequires-python = ">=3.12"\n'
+                                                 'dependencies = ["fastapi>=0.110", "uvicorn"]\n')
+    (root / "api" / "local.env").write_text("SECRET=1")
+    (root / "api" / "Dockerfile").write_text("FROM python:3.12-slim AS base\nFROM base\n")
+    (root / "compose.yaml").write_text("services:\n  api:\n    build: ./api\n  db:\n    image: postgres:16\n"
+                                       "volumes:\n  data:\n")
+    (root / "debug.log").write_text("noise")
+    (root / "keep.log").write_text("kept")
+    (root / "blob.bin").write_bytes(os.urandom(64 * 1024))
+    return root
+
+
+def test_scan_honours_gitignore_and_detects_the_stack(project, tmp_path):
+    scanner = ProjectScanner(project, workers=4, store=ManifestStore(tmp_path / "manifests"), mmap_threshold=1024)
+    manifest, report = scanner.scan()
+
+    assert sorted(manifest.files) == [".gitignore", "api/.gitignore", "api/Dockerfile", "api/pyproject.toml",
+                                      "blob.bin", "compose.yaml", "keep.log", "web/package.json"]
+    assert report.ignored == 3
+    assert manifest.files["web/package.json"].stack == ("Node.js", "Next.js", "React")
+    assert manifest.files["api/pyproject.toml"].stack == ("Python >=3.12", "FastAPI", "Uvicorn")
+    assert manifest.files["api/Dockerfile"].stack == ("Docker FROM python:3.12-slim", "Docker FROM base")
+    assert manifest.files["compose.yaml"].stack == ("Docker Compose services: api, db",)
+
+    context = describe_manifest(manifest)
+    assert "- web/package.json: Node.js, Next.js, React" in context
+    assert "- api/ (3 files)" in context
+    assert "- web/ (1 file)" in context
+
+
+def test_rescans_only_hash_changed_files(project, tmp_path):
+    store = ManifestStore(tmp_path / "manifests")
+    first, _ = ProjectScanner(project, store=store).scan()
+
+    (project / "keep.log").write_text("changed")
+    (project / "compose.yaml").unlink()
+    second, report = ProjectScanner(project, store=store).scan()
+
+    assert (report.hashed, report.reused, report.removed) == (1, 6, 1)
+    assert second.files["keep.log"].digest != first.files["keep.log"].digest
+    assert second.files["blob.bin"] == first.files["blob.bin"]
+
+    _, full_report = ProjectScanner(project, store=store).scan(full=True)
+    assert full_report.hashed == 7
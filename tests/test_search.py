@@ -0,0 +1,46 @@
+import pytest
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def test_fuzzy_index_ranks_word_starts_and_narrows_incrementally():
+    from neptun.utils.search import FuzzyIndex
+
+    index = FuzzyIndex(key=lambda name: name)
+    for name in ["dark mode docs", "docker setup", "kubernetes", "Docker compose for nginx"]:
+        index.add(name, name)
+
+    assert index.search("dckr") == ["docker setup", "Docker compose for nginx"]
+    assert index.search("dckr ng") == ["Docker compose for nginx"]
+    assert index.search("kube") == ["kubernetes"]
+
+
+def test_chat_picker_loads_pages_only_as_far_as_a_search_needs(stand_in):
+    from neptun.utils.search import ChatPicker
+    from neptun.utils.services import ChatService, CHAT_PAGE_SIZE
+
+    for index in range(500):
+        stand_in.add_chat(f"chat {index:03d}")
+    # the oldest chat, it is on the last page
+    stand_in.add_chat("docker compose setup")["updated_at"] = "2020-01-01T00:00:00+00:00"
+
+    picker = ChatPicker(ChatService())
+
+    assert len(picker.search()) == picker.limit
+    assert len(picker.index) == CHAT_PAGE_SIZE
+
+    (docker_chat,) = picker.search("dckr cmps")
+    assert docker_chat.name == "docker compose setup"
+    assert picker.exhausted and len(picker.index) == 501
+    assert picker.find(ChatPicker.label(docker_chat)) == docker_chat
+
+    # the next picker starts from the local history and does not have to page for it again
+    reopened = ChatPicker(ChatService())
+    assert reopened.index.search("dckr cmps") == [docker_chat]
@@ -0,0 +1,79 @@
+import pytest
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def test_authentication_service_reuses_one_pooled_connection(stand_in):
+    from neptun.utils.services import AuthenticationService
+
+    authentication_service = AuthenticationService()
+
+    assert all(authentication_service.check_authenticated("stand-in-session") for _ in range(5))
+    assert stand_in.connections == 1
+
+
+def test_conversation_syncs_only_messages_newer_than_the_local_store(stand_in):
+    import asyncio
+    from neptun.bot.chat import Conversation
+
+    for index in range(3):
+        stand_in.add_message(chat_id=1, message=f"message {index}")
+
+    conversation = Conversation()
+    assert conversation.load_cached_messages() == []
+    assert len(asyncio.run(conversation.sync_messages())) == 3
+
+    stand_in.add_message(chat_id=1, message="newer", actor="assistant")
+
+    reopened = Conversation()
+    assert [message.content for message in reopened.load_cached_messages()] == [
+        "message 0", "message 1", "message 2"]
+
+    new_messages = asyncio.run(reopened.sync_messages())
+    assert [(message.role, message.content) for message in new_messages] == [("assistant", "newer")]
+    assert len(reopened.history_store.get_messages(1)) == 4
+
+
+def test_a_failed_delete_keeps_the_local_history(stand_in):
+    import asyncio
+    from benchmarks.stand_in import Faults
+    from neptun.utils.services import ChatService
+
+    stand_in.add_chat("keep me")
+    stand_in.add_message(chat_id=1, message="hello")
+    chat_service = ChatService()
+    chat_service.history_store.upsert_messages(asyncio.run(chat_service.get_chat_messages_by_chat_id(1)).chat_messages)
+
+    stand_in.faults = Faults(error_rate=1.0)
+    assert chat_service.delete_selected_chat(1) is False
+    assert [message.message for message in chat_service.history_store.get_messages(1)] == ["hello"]
+
+    stand_in.faults = Faults()
+    assert chat_service.delete_selected_chat(1) is True
+    assert chat_service.history_store.get_messages(1) == []
+
+
+def test_each_event_loop_gets_its_own_client_closed_with_the_loop(stand_in):
+    import asyncio
+    from neptun.utils.transport import HttpTransport
+
+    transport = HttpTransport()
+
+    async def check():
+        client = transport.async_client
+        response = await transport.arequest("HEAD", f"{stand_in.url}/auth/check")
+        assert response.status_code == 204 and transport.async_client is client
+        return client
+
+    # nothing calls aclose, the clients still have to go with their loops
+    first, second = asyncio.run(check()), asyncio.run(check())
+
+    assert first is not second
+    assert first.is_closed and second.is_closed
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from benchmarks.stand_in import Faults, NeptunStandIn, configure_config_manager
+from neptun.utils.sessions import SessionValidator, session_expiry
+
+
+def seal(expires_at=None) -> str:
+    expiration = "" if expires_at is None else str(int(expires_at * 1000))
+    return f"Fe26.2**salt*iv*data*{expiration}*hmac-salt*hmac"
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def test_session_expiry_is_read_from_the_seal():
+    assert session_expiry(seal(1700000000.5)) == 1700000000.5
+    assert session_expiry(seal()) is None
+    assert session_expiry("stand-in-session") is None
+    assert session_expiry("") is None
+
+
+def test_verdicts_are_cached_until_the_ttl_and_expired_seals_never_reach_the_server(tmp_path):
+    checks = []
+    validator = SessionValidator(lambda cookie: checks.append(cookie) or True, tmp_path / "auth-status.json", ttl=60)
+    cookie = seal(time.time() + 3600)
+
+    assert validator.is_authenticated(cookie)
+    assert validator.is_authenticated(cookie)
+    assert len(checks) == 1
+
+    assert validator.is_authenticated(cookie, refresh=True)
+    assert len(checks) == 2
+
+    assert not validator.is_authenticated(seal(time.time() - 10))
+    assert not validator.is_authenticated("")
+    assert len(checks) == 2
+
+    validator.ttl = 0
+    assert validator.is_authenticated(cookie)
+    assert len(checks) == 3
+
+
+def test_authenticated_commands_skip_the_round_trip_with_a_fresh_verdict(stand_in):
+    from neptun.utils.services import AuthenticationService
+
+    authentication_service = AuthenticationService()
+    assert authentication_service.is_authenticated()
+
+    # the server would now fail every request, the cached verdict still answers
+    stand_in.faults = Faults(error_rate=1.0)
+    assert authentication_service.is_authenticated()
+
+
+def test_no_verdict_from_the_server_is_not_a_logged_out_session(tmp_path):
+    from neptun.utils.exceptions import AuthServerUnavailableError
+
+    validator = SessionValidator(lambda cookie: None, tmp_path / "auth-status.json", ttl=60)
+
+    with pytest.raises(AuthServerUnavailableError):
+        validator.is_authenticated(seal(time.time() + 3600))
+    assert not (tmp_path / "auth-status.json").exists()
+
+
+def test_commands_report_an_unavailable_auth_server(stand_in):
+    from typer.testing import CliRunner
+    from neptun.cmd.assistant import assistant_app
+
+    stand_in.faults = Faults(error_rate=1.0)
+    result = CliRunner().invoke(assistant_app, ["ask", "hello"])
+
+    assert result.exit_code == 1
+    assert "Authentication server unavailable" in result.output
+    assert "log in" not in result.output
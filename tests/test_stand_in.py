@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.__main__ import compare
+from benchmarks.stand_in import NeptunStandIn, StreamProfile, configure_config_manager
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def test_login_returns_a_sealed_session(stand_in):
+    from neptun.model.http_requests import LoginHttpRequest
+    from neptun.model.http_responses import ErrorResponse, LoginHttpResponse
+    from neptun.utils.services import AuthenticationService
+    from neptun.utils.sessions import session_expiry
+
+    stand_in.add_user("stand-in@example.com", "secret")
+    authentication_service = AuthenticationService()
+
+    response = authentication_service.login(LoginHttpRequest(email="stand-in@example.com", password="secret"))
+    assert isinstance(response, LoginHttpResponse)
+    assert session_expiry(response.session_cookie) > time.time()
+    assert authentication_service.is_authenticated(response.session_cookie)
+
+    rejected = authentication_service.login(LoginHttpRequest(email="stand-in@example.com", password="wrong"))
+    assert isinstance(rejected, ErrorResponse) and rejected.statusCode == 401
+
+
+def test_stream_profile_paces_tokens_and_injects_errors(stand_in):
+    from neptun.bot.chat import Conversation
+    from neptun.utils.exceptions import ChatStreamError
+
+    async def turn():
+        return await Conversation().send("one two three four")
+
+    stand_in.stream = StreamProfile(latency=0.05, token_rate=100)
+    start = time.perf_counter()
+    reply = asyncio.run(turn())
+    assert reply.content.endswith("says: one two three four")
+    # the latency plus five gaps between the six tokens at 100 tokens per second
+    assert time.perf_counter() - start >= 0.05 + 5 * 0.01
+
+    stand_in.stream = StreamProfile(error_rate=1.0)
+
+    async def consume():
+        async for _ in Conversation().send("hello"):
+            pass
+
+    with pytest.raises(ChatStreamError):
+        asyncio.run(consume())
+
+
+def test_benchmark_comparison_respects_the_direction_of_each_metric():
+    baseline = {"chat_list": {"cold_ms": 100, "reads_per_s": 1000, "turns": 20}}
+    current = {"chat_list": {"cold_ms": 130, "reads_per_s": 1300, "turns": 40}}
+
+    rows = {metric: regressed for metric, _, _, _, regressed in compare(baseline, current, tolerance=0.2)}
+    assert rows == {"chat_list.cold_ms": True, "chat_list.reads_per_s": False}
@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ["textual", "httpx", "questionary", "prompt_toolkit", "pydantic", "neptun.bot.tui",
+                 "neptun.utils.services", "neptun.utils.scanner", "neptun.utils.gitindex", "neptun.utils.runners"]
+
+PROBE = """
+import json, sys
+from neptun import cli
+try:
+    cli.app(sys.argv[1:], prog_name="neptun")
+except SystemExit:
+    pass
+print(json.dumps(sorted(name for name in {heavy} if name in sys.modules)))
+"""
+
+
+def loaded_heavy_modules(*args) -> list[str]:
+    result = subprocess.run([sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES), *args],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_config_commands_do_not_import_the_chat_stack():
+    assert loaded_heavy_modules("config", "--help") == []
+
+
+def test_version_does_not_import_any_sub_app():
+    assert loaded_heavy_modules("--version") == []
+
+
+def test_assistant_help_does_not_import_the_tui():
+    loaded = loaded_heavy_modules("assistant", "--help")
+
+    assert "textual" not in loaded
+    assert "neptun.bot.tui" not in loaded
+
+
+def test_assistant_help_does_not_import_the_command_dependencies():
+    loaded = loaded_heavy_modules("assistant", "--help")
+
+    assert not {"httpx", "questionary", "prompt_toolkit", "neptun.utils.services", "neptun.utils.scanner",
+                "neptun.utils.gitindex", "neptun.utils.runners"} & set(loaded)
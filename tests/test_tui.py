@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+
+from benchmarks.stand_in import NeptunStandIn, configure_config_manager
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    with NeptunStandIn() as stand_in:
+        configure_config_manager(stand_in.url, tmp_path)
+        yield stand_in
+
+
+def test_conversation_view_keeps_a_bounded_window_of_messages(stand_in):
+    from neptun.bot.tui import NeptunChatApp
+    from neptun.bot.widgets import MessageBox, MAX_LIVE_MESSAGES
+
+    for index in range(2000):
+        stand_in.add_message(1, f"message {index}\n" * (index % 3 + 1))
+
+    async def scroll():
+        app = NeptunChatApp()
+        async with app.run_test(size=(100, 40)) as pilot:
+            await pilot.pause(0.5)
+            view = app.query_one("#conversation_box")
+            assert view.boxes[-1].index == 1999
+
+            for _ in range(20):
+                view.scroll_home(animate=False)
+                await pilot.pause(0.05)
+
+            assert view.boxes[0].index < 1999 - MAX_LIVE_MESSAGES
+            assert len([box for box in view.query(MessageBox) if box.index is not None]) <= MAX_LIVE_MESSAGES
+
+    asyncio.run(scroll())
+
+
+ANSWER = ("Here is a compose file:\n```yaml\nversion: '3'\n\nservices:\n  web:\n    image: nginx\n```\n"
+          "Start it with:\n\n- `docker compose up`\n- open the browser\n\nDone.")
+
+
+def test_markdown_splitter_closes_blocks_while_streaming():
+    from neptun.bot.rendering import MarkdownBlockSplitter, split_markdown_blocks
+
+    splitter = MarkdownBlockSplitter()
+    closed = []
+    for token in ANSWER:
+        closed += splitter.feed(token)
+
+    # the fenced block is not split at its inner blank line and closes at the fence
+    assert closed[:2] == ["Here is a compose file:", "```yaml\nversion: '3'\n\nservices:\n  web:\n    image: nginx\n```"]
+    assert splitter.open_block == "Done."
+    assert closed + splitter.close() == split_markdown_blocks(ANSWER)
+
+
+def test_finished_markdown_blocks_are_parsed_once():
+    from neptun.bot.rendering import render_markdown_block, split_markdown_blocks
+
+    blocks = split_markdown_blocks(ANSWER)
+
+    assert [render_markdown_block(block) for block in blocks] == [render_markdown_block(block) for block in blocks]
+
+
+def test_render_scheduler_coalesces_updates_and_idles(stand_in):
+    from neptun.bot.tui import NeptunChatApp
+
+    async def stream():
+        app = NeptunChatApp()
+        async with app.run_test(size=(100, 40)) as pilot:
+            scheduler = app.render_scheduler
+            rendered = []
+
+            for token in range(500):
+                scheduler.schedule("stream", lambda token=token: rendered.append(token))
+            await pilot.pause(0.2)
+
+            assert rendered == [499]
+
+            scheduler.idle_timeout = 0
+            frames = scheduler.stats().frames
+            scheduler.add_animation(lambda: rendered.append("frame"))
+            await pilot.pause(0.2)
+
+            stats = scheduler.stats()
+            assert stats.frames == frames
+            assert stats.dropped_updates >= 499
+
+    asyncio.run(stream())
+
+
+def test_paging_older_messages_while_a_reply_streams(stand_in):
+    from benchmarks.stand_in import StreamProfile
+    from neptun.bot.tui import NeptunChatApp
+    from neptun.bot.widgets import MessageBox, MAX_LIVE_MESSAGES
+
+    for index in range(300):
+        stand_in.add_message(1, f"message {index}\n" * (index % 3 + 1))
+    stand_in.stream = StreamProfile(token_rate=15)
+
+    async def chat():
+        app = NeptunChatApp()
+        async with app.run_test(size=(100, 40)) as pilot:
+            await pilot.pause(0.5)
+            view = app.query_one("#conversation_box")
+            app.query_one("#message_input").value = " ".join(f"word{index}" for index in range(40))
+            # pressing enter would only return once the whole reply has streamed
+            app.run_worker(app.process_conversation())
+            await pilot.pause(0.2)
+
+            pending = view.boxes[-1]
+            for _ in range(20):
+                view.scroll_home(animate=False)
+                await pilot.pause(0.05)
+
+            # the streaming reply is never unmounted to make room for older messages
+            assert pending in view.boxes and pending.is_attached
+            assert view.boxes[0].index < 300 - MAX_LIVE_MESSAGES // 2
+            assert len(view.boxes) <= MAX_LIVE_MESSAGES
+
+            while app.query_one("#message_input").disabled:
+                await pilot.pause(0.1)
+            await pilot.pause(0.5)
+
+        assert pending.text.endswith("word39")
+        assert app.return_code in (None, 0)
+
+    asyncio.run(chat())
+
+
+def test_a_failing_render_callback_is_dropped_without_stopping_the_app(stand_in):
+    from neptun.bot.tui import NeptunChatApp
+
+    def gone():
+        raise RuntimeError("widget was removed")
+
+    async def render():
+        app = NeptunChatApp()
+        async with app.run_test(size=(100, 40)) as pilot:
+            scheduler = app.render_scheduler
+            rendered = []
+
+            scheduler.add_animation(gone)
+            scheduler.schedule("gone", gone)
+            scheduler.schedule("stream", lambda: rendered.append("token"))
+            await pilot.pause(0.2)
+
+            assert rendered == ["token"]
+            assert gone not in scheduler._animations
+            assert app.is_running
+
+    asyncio.run(render())
+
+
+@pytest.mark.parametrize("text, blocks", [
+    ("Steps:\n\n1. build\n\n2. test\n\n   with coverage\n\n3. ship\n\nDone.",
+     ["Steps:", "1. build\n\n2. test\n\n   with coverage\n\n3. ship", "Done."]),
+    ("Run this:\n\n    make build\n\n    make test\n\nThen deploy.",
+     ["Run this:\n\n    make build\n\n    make test", "Then deploy."]),
+    ("- item\n\n  ```sh\n  echo\n\n  done\n  ```\n- next\n\nEnd.",
+     ["- item\n\n  ```sh\n  echo\n\n  done\n  ```\n- next", "End."]),
+])
+def test_blank_lines_do_not_split_lists_or_indented_code(text, blocks):
+    from neptun.bot.rendering import MarkdownBlockSplitter, split_markdown_blocks
+
+    splitter = MarkdownBlockSplitter()
+    closed = []
+    for token in text:
+        closed += splitter.feed(token)
+
+    assert closed + splitter.close() == blocks == split_markdown_blocks(text)
+
+
+def test_open_block_is_only_parsed_again_when_it_changed(monkeypatch):
+    from textual.app import App
+    from neptun.bot import widgets
+    from neptun.bot.rendering import render_open_block
+
+    parsed = []
+    monkeypatch.setattr(widgets, "render_open_block", lambda block: parsed.append(block) or render_open_block(block))
+
+    class MessageApp(App):
+        def compose(self):
+            yield widgets.MarkdownMessage()
+
+    async def stream():
+        app = MessageApp()
+        async with app.run_test() as pilot:
+            message = app.query_one(widgets.MarkdownMessage)
+            for token in ["Hello", "", " world", "", "\n\n", "Next"]:
+                message.append(token)
+            await pilot.pause()
+
+    asyncio.run(stream())
+
+    assert parsed == ["Hello", "Hello world", "Hello world\n\n", "Next"]